@@ -331,6 +331,35 @@ async def export_clips(
     }
 
 
+def _clip_subtitles(transcription: dict, clip: dict) -> List[dict]:
+    """Subtitles for a clip from the full transcription, timed relative to the clip"""
+    source_words = transcription.get("words", [])
+    
+    subtitles = []
+    if source_words:
+        for w in source_words:
+            if w["end_time"] > clip["start_time"] and w["start_time"] < clip["end_time"]:
+                sub = {
+                    "text": w["text"],
+                    "start_time": max(0.0, w["start_time"] - clip["start_time"]),
+                    "end_time": min(clip["duration"], w["end_time"] - clip["start_time"])
+                }
+                subtitles.append(sub)
+    elif transcription.get("sentences"):
+        for s in transcription["sentences"]:
+            if s["end_time"] > clip["start_time"] and s["start_time"] < clip["end_time"]:
+                sub = {
+                    "text": s["text"],
+                    "start_time": max(0.0, s["start_time"] - clip["start_time"]),
+                    "end_time": min(clip["duration"], s["end_time"] - clip["start_time"])
+                }
+                subtitles.append(sub)
+    else:
+        # Fallback
+        subtitles = [{"text": clip["transcript"], "start_time": 0, "end_time": clip["duration"]}]
+    return subtitles
+
+
 async def process_export(
     export_id: str,
     job: dict,
@@ -345,103 +374,80 @@ async def process_export(
     
     try:
         video_path = Path(job["original_path"])
-        total_clips = len(request.clip_ids)
         
+        # Create output directory
+        output_dir = settings.OUTPUT_DIR / job["id"]
+        output_dir.mkdir(parents=True, exist_ok=True)
+        
+        needs_resize = request.aspect_ratio != (16, 9) or request.layout == "stacked"
+        
+        # One export per clip (trim, crop and subtitles in a single pass), run in parallel
+        clips = []
+        pipelines = []
         for i, clip_id in enumerate(request.clip_ids):
             # Find clip data
             clip = next((c for c in job["clips"] if c["id"] == clip_id), None)
             if not clip:
                 continue
             
-            export["progress_message"] = f"Processing clip {i+1}/{total_clips}"
-            export["progress"] = int((i / total_clips) * 100)
-            
-            # Create output directory
-            output_dir = settings.OUTPUT_DIR / job["id"]
-            output_dir.mkdir(parents=True, exist_ok=True)
+            pipeline = {
+                "input_path": str(video_path),
+                "output_path": str(output_dir / f"clip_{i+1}.mp4"),
+                "start_time": clip["start_time"],
+                "end_time": clip["end_time"],
+            }
+            if needs_resize:
+                pipeline["fps"] = 60  # Force 60fps for viral
+            if request.add_subtitles:
+                # Extract actual subtitles from full transcription
+                pipeline["subtitles"] = _clip_subtitles(job.get("transcription", {}), clip)
             
-            # Step 1: Trim clip
-            clip_path = output_dir / f"clip_{i+1}_raw.mp4"
-            video_editor_service.trim_clip(
-                input_path=video_path,
-                output_path=clip_path,
-                start_time=clip["start_time"],
-                end_time=clip["end_time"],
-            )
+            clips.append((i, clip))
+            pipelines.append(pipeline)
+        
+        def on_progress(done: int, total: int):
+            export["progress_message"] = f"Processed {done}/{total} clips"
+            export["progress"] = int((done / total) * 90)
+        
+        if needs_resize:
+            # Face tracking runs on the trimmed clips (mostly stream copies),
+            # in this process where its models live
+            export["progress_message"] = "Trimming clips"
+            trimmed = video_editor_service.export_clips_parallel([
+                {
+                    "input_path": str(video_path),
+                    "output_path": str(output_dir / f"clip_{i+1}_raw.mp4"),
+                    "start_time": clip["start_time"],
+                    "end_time": clip["end_time"],
+                    # Only read back by face tracking, never delivered
+                    "smart_cut": True,
+                }
+                for i, clip in clips
+            ])
             
-            # Step 2: Resize (if needed)
-            if request.aspect_ratio != (16, 9) or request.layout == "stacked":
-                resized_path = output_dir / f"clip_{i+1}_resized.mp4"
+            for n, ((i, clip), pipeline, clip_path) in enumerate(zip(clips, pipelines, trimmed)):
+                export["progress_message"] = f"Analyzing clip {n+1}/{len(pipelines)}"
                 
                 # Determine AR for face tracking
                 face_ar = request.aspect_ratio
                 if request.layout == "stacked":
                     face_ar = (1, 1)  # Square crop for face in stacked mode
                     
-                crops = resize_service.resize(
-                    video_path=clip_path,
+                pipeline["crops_data"] = resize_service.resize(
+                    video_path=Path(clip_path),
                     pyannote_token=settings.HUGGINGFACE_TOKEN,
                     aspect_ratio=face_ar,
                 )
                 
                 if request.layout == "stacked":
-                    video_editor_service.apply_stacked_layout(
-                        input_path=clip_path,
-                        output_path=resized_path,
-                        crops_data=crops,
-                        fps=60  # Force 60fps for viral
-                    )
-                else:
-                    video_editor_service.resize_video(
-                        input_path=clip_path,
-                        output_path=resized_path,
-                        crops_data=crops,
-                        fps=60  # Force 60fps
-                    )
-                clip_path = resized_path
-            
-            # Step 3: Add subtitles (if requested)
-            if request.add_subtitles:
-                subtitled_path = output_dir / f"clip_{i+1}_subtitled.mp4"
-                
-                # Extract actual subtitles from full transcription
-                full_transcription = job.get("transcription", {})
-                source_words = full_transcription.get("words", [])
-                
-                subtitles = []
-                if source_words:
-                    for w in source_words:
-                        if w["end_time"] > clip["start_time"] and w["start_time"] < clip["end_time"]:
-                            sub = {
-                                "text": w["text"],
-                                "start_time": max(0.0, w["start_time"] - clip["start_time"]),
-                                "end_time": min(clip["duration"], w["end_time"] - clip["start_time"])
-                            }
-                            subtitles.append(sub)
-                elif full_transcription.get("sentences"):
-                    for s in full_transcription["sentences"]:
-                        if s["end_time"] > clip["start_time"] and s["start_time"] < clip["end_time"]:
-                            sub = {
-                                "text": s["text"],
-                                "start_time": max(0.0, s["start_time"] - clip["start_time"]),
-                                "end_time": min(clip["duration"], s["end_time"] - clip["start_time"])
-                            }
-                            subtitles.append(sub)
-                else:
-                    # Fallback
-                    subtitles = [{"text": clip["transcript"], "start_time": 0, "end_time": clip["duration"]}]
-                
-                video_editor_service.add_subtitles(
-                    video_path=clip_path,
-                    output_path=subtitled_path,
-                    subtitles=subtitles,
-                    font_size=50,
-                    font_color="yellow",
-                    outline_color="black"
-                )
-                clip_path = subtitled_path
+                    pipeline["layout"] = "stacked"
+        
+        clip_paths = video_editor_service.export_clips_parallel(pipelines, progress_callback=on_progress)
+        
+        for (i, clip), clip_path in zip(clips, clip_paths):
+            clip_path = Path(clip_path)
             
-            # Step 4: Add music (if requested)
+            # Add music (if requested)
             if request.add_music and request.music_track:
                 music_path = settings.BASE_DIR / "assets" / "music" / request.music_track
                 if music_path.exists():
@@ -455,7 +461,7 @@ async def process_export(
             
             # Add to outputs
             export["outputs"].append({
-                "clip_id": clip_id,
+                "clip_id": clip["id"],
                 "output_path": str(clip_path),
                 "description": clip.get("description", ""),
                 "hashtags": clip.get("hashtags", []),
@@ -635,6 +641,7 @@ async def generate_preview(
                 end_time=clip["end_time"],
                 aspect_ratio=(aspect_ratio_w, aspect_ratio_h),
                 subtitles=subtitles if with_subtitles else None,
+                draft=True,
             )
         
         return {"url": f"/outputs/{job_id}/{output_filename}", "status": "ready"}
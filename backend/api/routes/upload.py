@@ -5,12 +5,13 @@ Enhanced with multi-platform support and AI features
 from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks
 from fastapi.responses import JSONResponse, StreamingResponse
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Literal
 import uuid
 import shutil
 import aiofiles
 import json
 import asyncio
+import functools
 
 from config import settings
 from models.schemas import VideoUploadRequest, YouTubeUploadRequest, URLUploadRequest, VideoJobResponse, ProcessingStatus
@@ -31,6 +32,7 @@ async def upload_video(
     aspect_ratio_h: int = 16,
     generate_description: bool = True,
     description_language: str = "en",
+    description_priority: Literal["interactive", "batch"] = "interactive",
 ):
     """
     Upload a video for processing
@@ -69,6 +71,7 @@ async def upload_video(
         "aspect_ratio": (aspect_ratio_w, aspect_ratio_h),
         "generate_description": generate_description,
         "description_language": description_language,
+        "description_priority": description_priority,
         "clips": [],
     }
     
@@ -133,6 +136,7 @@ async def upload_from_url(
         "aspect_ratio": request.aspect_ratio,
         "generate_description": request.generate_description,
         "description_language": request.description_language,
+        "description_priority": request.description_priority,
         "generate_summary": request.generate_summary,
         "summary_language": request.summary_language,
         "clips": [],
@@ -278,7 +282,7 @@ async def process_video_job(job_id: str):
         
         # Pass either the ClipsAI object or the full transcription dict for fallback
         transcription_for_clips = transcription.get("_transcription_obj") or transcription
-        clips = clip_finder_service.find_clips(
+        clips = await clip_finder_service.find_clips_async(
             transcription_obj=transcription_for_clips
         )
         job["clips"] = clips
@@ -289,16 +293,31 @@ async def process_video_job(job_id: str):
             job["status"] = ProcessingStatus.GENERATING_DESCRIPTION
             job["message"] = "Generating descriptions..."
             
-            for clip in job["clips"]:
-                try:
-                    result = description_service.generate_description(
-                        transcript=clip["transcript"],
+            try:
+                transcripts = [clip["transcript"] for clip in job["clips"]]
+                if job.get("description_priority") == "batch":
+                    # Cheaper provider batch API; may take a long time to finish
+                    loop = asyncio.get_running_loop()
+                    results = await loop.run_in_executor(
+                        None,
+                        functools.partial(
+                            description_service.generate_descriptions_batch,
+                            transcripts,
+                            language=job["description_language"],
+                        ),
+                    )
+                else:
+                    # All clips are described concurrently
+                    results = await description_service.agenerate_many(
+                        transcripts,
                         language=job["description_language"],
                     )
+                for clip, result in zip(job["clips"], results):
                     clip["description"] = result["description"]
                     clip["hashtags"] = result["hashtags"]
-                except Exception as e:
-                    # Don't fail the whole job if description fails
+            except Exception as e:
+                # Don't fail the whole job if description fails
+                for clip in job["clips"]:
                     clip["description"] = clip["transcript"][:200] + "..."
                     clip["hashtags"] = ["#video", "#clip"]
             
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Literal
 from datetime import datetime
 from enum import Enum
 
@@ -39,6 +39,7 @@ class URLUploadRequest(BaseModel):
     aspect_ratio: tuple[int, int] = (9, 16)
     generate_description: bool = True
     description_language: str = "en"
+    description_priority: Literal["interactive", "batch"] = "interactive"  # "batch" = provider Batch API, cheaper but slower
     generate_summary: bool = False  # Generate AI summary
     summary_language: str = "en"  # Language for summary
 
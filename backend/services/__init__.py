@@ -1,76 +1,69 @@
 # Services package
-from .transcriber import transcription_service, TranscriptionService
-from .clipper import clip_finder_service, ClipFinderService
-from .resizer import resize_service, ResizeService
-from .editor import video_editor_service, VideoEditorService
-from .description import description_service, DescriptionGeneratorService
-from .effects import effects_service, EffectsService
-from .youtube import youtube_service, YouTubeService
-from .facecam import facecam_detector, FacecamDetector
-from .captions import captions_service, CaptionsService, CaptionStyle, CAPTION_THEMES
+#
+# Services are imported on first access (PEP 562), so importing one module
+# of the package - e.g. services.editor in an export worker process - does
+# not load torch, sentence-transformers and the other services' models.
+import importlib
 
-# New AI-Video-Transcriber inspired services
-from .summarizer import summarizer_service, SummarizerService
-from .translator import translator_service, TranslatorService
-from .video_downloader import video_downloader_service, VideoDownloaderService
-from .exporter import (
-    export_to_markdown,
-    export_to_srt,
-    export_to_vtt,
-    export_to_json,
-)
-
-# Enhanced Services (NEW)
-from .enhanced_clipper import enhanced_clip_finder_service
-from .enhanced_captions import enhanced_captions_service
-from .scene_detection import scene_detection_service
-from .camera_switching import camera_switching_service
-from .optimized_processor import optimized_video_processor
-from .batch_processor import batch_processing_service
-from .quality_presets import quality_presets_service, QUALITY_PRESETS, QualityPreset
-
-__all__ = [
+_EXPORTS = {
     # Existing services
-    "transcription_service",
-    "TranscriptionService",
-    "clip_finder_service",
-    "ClipFinderService",
-    "resize_service",
-    "ResizeService",
-    "video_editor_service",
-    "VideoEditorService",
-    "description_service",
-    "DescriptionGeneratorService",
-    "effects_service",
-    "EffectsService",
-    "youtube_service",
-    "YouTubeService",
-    "facecam_detector",
-    "FacecamDetector",
+    "transcription_service": ".transcriber",
+    "TranscriptionService": ".transcriber",
+    "clip_finder_service": ".clipper",
+    "ClipFinderService": ".clipper",
+    "resize_service": ".resizer",
+    "ResizeService": ".resizer",
+    "video_editor_service": ".editor",
+    "VideoEditorService": ".editor",
+    "description_service": ".description",
+    "DescriptionGeneratorService": ".description",
+    "effects_service": ".effects",
+    "EffectsService": ".effects",
+    "youtube_service": ".youtube",
+    "YouTubeService": ".youtube",
+    "facecam_detector": ".facecam",
+    "FacecamDetector": ".facecam",
     # Captions service
-    "captions_service",
-    "CaptionsService",
-    "CaptionStyle",
-    "CAPTION_THEMES",
+    "captions_service": ".captions",
+    "CaptionsService": ".captions",
+    "CaptionStyle": ".captions",
+    "CAPTION_THEMES": ".captions",
+    "BurnJob": ".captions",
     # New AI-Video-Transcriber services
-    "summarizer_service",
-    "SummarizerService",
-    "translator_service",
-    "TranslatorService",
-    "video_downloader_service",
-    "VideoDownloaderService",
-    "export_to_markdown",
-    "export_to_srt",
-    "export_to_vtt",
-    "export_to_json",
+    "summarizer_service": ".summarizer",
+    "SummarizerService": ".summarizer",
+    "translator_service": ".translator",
+    "TranslatorService": ".translator",
+    "video_downloader_service": ".video_downloader",
+    "VideoDownloaderService": ".video_downloader",
+    "export_to_markdown": ".exporter",
+    "export_to_srt": ".exporter",
+    "export_to_vtt": ".exporter",
+    "export_to_json": ".exporter",
     # Enhanced Services
-    "enhanced_clip_finder_service",
-    "enhanced_captions_service",
-    "scene_detection_service",
-    "camera_switching_service",
-    "optimized_video_processor",
-    "batch_processing_service",
-    "quality_presets_service",
-    "QUALITY_PRESETS",
-    "QualityPreset",
-]
+    "enhanced_clip_finder_service": ".enhanced_clipper",
+    "enhanced_captions_service": ".enhanced_captions",
+    "scene_detection_service": ".scene_detection",
+    "camera_switching_service": ".camera_switching",
+    "optimized_video_processor": ".optimized_processor",
+    "batch_processing_service": ".batch_processor",
+    "quality_presets_service": ".quality_presets",
+    "QUALITY_PRESETS": ".quality_presets",
+    "QualityPreset": ".quality_presets",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    """Import the service module that defines name on first access"""
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,273 @@
+"""
+Shared heuristic scoring for the clip finders
+Keyword/emotion matching, per-sentence features and window scoring used by
+both ClipFinderService and EnhancedClipFinderService.
+"""
+import bisect
+import functools
+import operator
+import re
+from typing import List, Dict, Any, Iterable, Optional, Set, Tuple
+import numpy as np
+
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
+
+
+# All-caps words of 3+ chars (same as str.isupper per token for Latin script)
+CAPS_RE = re.compile(r"(?<!\S)(?=\S*[A-ZÀ-ÖØ-Þ])[^\sa-zß-öø-ÿ]{3,}(?!\S)")
+
+# Per-sentence features: keyword masks, emotion masks and cumulative
+# exclamation, CAPS-word and word counts (each with a leading zero)
+SentenceFeatures = Tuple[List[int], List[int], np.ndarray, np.ndarray, np.ndarray]
+
+
+class HeuristicScorer:
+    """
+    Text virality heuristic over one keyword/emotion vocabulary.
+
+    The keyword matcher and emotion bitmasks are built once per vocabulary;
+    finders keep a module-level instance so every service shares it.
+    """
+
+    def __init__(
+        self,
+        viral_keywords: Iterable[Tuple[str, float]],
+        positive_words: Iterable[str],
+        negative_words: Iterable[str],
+        pace_scores: Tuple[Tuple[float, float], ...] = ((2.5, 5.0),),
+    ):
+        """
+        Args:
+            viral_keywords: (keyword, multiplier) pairs
+            positive_words: Positive emotional words
+            negative_words: Negative emotional words
+            pace_scores: (words-per-second threshold, bonus) pairs, highest threshold first
+        """
+        viral_keywords = tuple(viral_keywords)
+        positive_words = frozenset(positive_words)
+        negative_words = frozenset(negative_words)
+
+        self.keywords = tuple(word for word, _ in viral_keywords)
+        self.keyword_multipliers = tuple(multiplier for _, multiplier in viral_keywords)
+        self.pace_scores = pace_scores
+
+        # One bit per emotional word, so per-sentence hits can be OR-ed per clip
+        self.emotion_bits = {
+            word: 1 << idx for idx, word in enumerate(sorted(positive_words | negative_words))
+        }
+        self.positive_mask = functools.reduce(
+            operator.or_, (self.emotion_bits[w] for w in positive_words), 0
+        )
+        self.negative_mask = functools.reduce(
+            operator.or_, (self.emotion_bits[w] for w in negative_words), 0
+        )
+
+        self._automaton, self._keyword_re, self._keyword_implied = self._build_keyword_matcher()
+
+    def _build_keyword_matcher(self):
+        """Compile the viral keywords into one automaton (or one regex) over all keywords"""
+        if HAS_AHOCORASICK:
+            automaton = ahocorasick.Automaton()
+            for idx, word in enumerate(self.keywords):
+                automaton.add_word(word, idx)
+            automaton.make_automaton()
+            return automaton, None, None
+
+        # Zero-width lookahead reports the longest keyword at every position;
+        # keywords contained in it are credited through the implied map
+        alternation = "|".join(map(re.escape, sorted(self.keywords, key=len, reverse=True)))
+        implied = {
+            word: [idx for idx, other in enumerate(self.keywords) if other in word]
+            for word in self.keywords
+        }
+        return None, re.compile(f"(?=({alternation}))"), implied
+
+    def match_keywords(self, text_lower: str) -> Set[int]:
+        """Indices into the viral keywords of the keywords that occur in the text"""
+        if self._automaton is not None:
+            return {idx for _, idx in self._automaton.iter(text_lower)}
+        # findall runs the whole scan in C; repeated hits are collapsed before
+        # mapping each one to the keywords it contains
+        implied = self._keyword_implied
+        return {idx for word in set(self._keyword_re.findall(text_lower)) for idx in implied[word]}
+
+    def sentence_features(self, texts: List[str]) -> SentenceFeatures:
+        """
+        Heuristic features per sentence, computed once per transcription
+
+        Keyword and emotional-word hits are bitmasks, OR-ed over a clip's
+        sentences (each word counts once per clip). Exclamations, CAPS words
+        and word counts are additive, returned as cumulative sums with a
+        leading zero.
+        """
+        n = len(texts)
+        keyword_masks = [0] * n
+        emotion_masks = [0] * n
+        counts = np.zeros((3, n + 1), dtype=np.int64)
+        emotion_bits = self.emotion_bits
+
+        for k, text in enumerate(texts):
+            text_lower = text.lower()
+            for idx in self.match_keywords(text_lower):
+                keyword_masks[k] |= 1 << idx
+            for word in emotion_bits.keys() & text_lower.split():
+                emotion_masks[k] |= emotion_bits[word]
+
+            counts[0, k + 1] = text.count("!")
+            # Uppercase words longer than 2 chars (avoids 'I', 'A')
+            counts[1, k + 1] = len(CAPS_RE.findall(text))
+            counts[2, k + 1] = len(text.split())
+
+        exc_cum, caps_cum, wc_cum = np.cumsum(counts, axis=1)
+        return keyword_masks, emotion_masks, exc_cum, caps_cum, wc_cum
+
+    def score_window(self, features: SentenceFeatures, start: int, end: int, duration: float) -> float:
+        """Heuristic score of sentences[start:end] from precomputed features"""
+        keyword_masks, emotion_masks, exc_cum, caps_cum, wc_cum = features
+        return self.score_features(
+            functools.reduce(operator.or_, keyword_masks[start:end], 0),
+            functools.reduce(operator.or_, emotion_masks[start:end], 0),
+            int(exc_cum[end] - exc_cum[start]),
+            int(caps_cum[end] - caps_cum[start]),
+            int(wc_cum[end] - wc_cum[start]),
+            duration,
+        )
+
+    def calculate_heuristic_score(self, text: str, duration: float) -> float:
+        """Calculate virality score (0-100)"""
+        return self.score_window(self.sentence_features([text]), 0, 1, duration)
+
+    def score_features(
+        self,
+        keyword_mask: int,
+        emotion_mask: int,
+        exc_count: int,
+        caps_count: int,
+        word_count: int,
+        duration: float,
+    ) -> float:
+        """Calculate virality score (0-100) from aggregated text features"""
+        base_score = 70.0
+
+        # Keyword bonus
+        keyword_score = sum(
+            5.0 * multiplier
+            for idx, multiplier in enumerate(self.keyword_multipliers)
+            if keyword_mask >> idx & 1
+        )
+        keyword_score = min(25.0, keyword_score)
+
+        # Pace bonus (words per second)
+        wps = word_count / duration if duration > 0 else 0
+        pace_score = 0.0
+        for threshold, bonus in self.pace_scores:
+            if wps > threshold:
+                pace_score = bonus
+                break
+
+        # Sentiment/Emotion Bonus
+        sentiment_score = 0.0
+        pos_hits = (emotion_mask & self.positive_mask).bit_count()
+        neg_hits = (emotion_mask & self.negative_mask).bit_count()
+
+        if pos_hits > 0 or neg_hits > 0:
+            # Emotion is good for virality, whether positive or negative
+            sentiment_score += min(5.0, (pos_hits + neg_hits) * 2.0)
+
+        # Intensity (CAPS and Exclamations)
+        if exc_count > 0:
+            sentiment_score += min(3.0, exc_count * 1.0)
+        if caps_count > 0:
+            sentiment_score += min(3.0, caps_count * 1.0)
+
+        total_score = base_score + keyword_score + pace_score + sentiment_score
+        return min(99.9, total_score)
+
+
+def sentence_columns(
+    sentences: List[Dict[str, Any]],
+) -> Tuple[List[str], List[float], List[float], List[int], List[int]]:
+    """Texts, start/end times and start/end chars of the sentences as parallel lists"""
+    texts = [s["text"] for s in sentences]
+    starts = [s["start_time"] for s in sentences]
+    ends = [s["end_time"] for s in sentences]
+    start_chars = [s.get("start_char", 0) for s in sentences]
+    end_chars = [s.get("end_char", 0) for s in sentences]
+    return texts, starts, ends, start_chars, end_chars
+
+
+def word_time_index(words: List[Dict[str, Any]]) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """Start and end time arrays for searching words, or None if they are not time-ordered"""
+    starts = np.fromiter((word["start_time"] for word in words), dtype=np.float64, count=len(words))
+    ends = np.fromiter((word["end_time"] for word in words), dtype=np.float64, count=len(words))
+    if (starts[1:] >= starts[:-1]).all() and (ends[1:] >= ends[:-1]).all():
+        return starts, ends
+    return None
+
+
+def words_between(
+    words: List[Dict[str, Any]],
+    index: Optional[Tuple[np.ndarray, np.ndarray]],
+    start_time: float,
+    end_time: float,
+) -> List[Dict[str, Any]]:
+    """Words that lie entirely within [start_time, end_time]"""
+    if index is None:
+        return [
+            word for word in words
+            if word["start_time"] >= start_time and word["end_time"] <= end_time
+        ]
+    starts, ends = index
+    lo = int(np.searchsorted(starts, start_time, side="left"))
+    hi = int(np.searchsorted(ends, end_time, side="right"))
+    return words[lo:hi]
+
+
+def remove_overlaps(clips: List[dict]) -> List[dict]:
+    """
+    Remove clips that overlap significantly, keeping higher scored ones
+
+    Clips must already be sorted by score, best first.
+    """
+    if not clips:
+        return []
+
+    kept_clips = []
+
+    # Kept clips ordered by start time: only those starting less than the
+    # longest kept duration before a candidate's start can intersect it
+    kept_starts = []
+    kept_by_start = []
+    max_kept_duration = 0.0
+
+    for clip in clips:
+        clip_start = clip["start_time"]
+        clip_end = clip["end_time"]
+        lo = bisect.bisect_left(kept_starts, clip_start - max_kept_duration)
+        hi = bisect.bisect_left(kept_starts, clip_end)
+
+        is_overlap = False
+        for kept in kept_by_start[lo:hi]:
+            # Check intersection
+            start = max(clip_start, kept["start_time"])
+            end = min(clip_end, kept["end_time"])
+            overlap = max(0, end - start)
+
+            # If overlap is > 30% of the smaller clip's duration, reject it
+            min_dur = min(clip["duration"], kept["duration"])
+            if overlap > (0.3 * min_dur):
+                is_overlap = True
+                break
+
+        if not is_overlap:
+            kept_clips.append(clip)
+            idx = bisect.bisect_right(kept_starts, clip_start)
+            kept_starts.insert(idx, clip_start)
+            kept_by_start.insert(idx, clip)
+            max_kept_duration = max(max_kept_duration, clip_end - clip_start)
+
+    return kept_clips
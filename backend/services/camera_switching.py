@@ -2,14 +2,113 @@
 Smart Camera Switching Service
 Analyzes video to detect different camera angles and creates optimal switching points
 """
+import functools
+import heapq
 import logging
+import math
+import re
+from collections import OrderedDict
 from pathlib import Path
 from typing import List, Dict, Tuple, Optional
 import cv2
 import numpy as np
 
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
 logger = logging.getLogger(__name__)
 
+# NVDEC decode is only used when OpenCV was built with CUDA + cudacodec
+CUDA_AVAILABLE = False
+try:
+    CUDA_AVAILABLE = (
+        hasattr(cv2, "cudacodec") and cv2.cuda.getCudaEnabledDeviceCount() > 0
+    )
+except Exception as e:
+    logger.debug(f"CUDA check failed: {e}")
+
+if CUDA_AVAILABLE:
+    logger.info("OpenCV CUDA video decode available")
+
+# Words that mark an interesting moment in the transcription (substring match)
+_KEYWORD_RE = re.compile(r"wow|incredible|amazing|check this|look|secret", re.IGNORECASE)
+
+# Integer codes for per-sample view classifications
+VIEW_TYPES = ("unknown", "facecam", "gameplay")
+_VIEW_CODES = {view_type: code for code, view_type in enumerate(VIEW_TYPES)}
+
+# Normalized contrast bands that classify a frame without face detection;
+# only frames between them run the (much more expensive) Haar cascade
+CONFIDENT_GAMEPLAY_CONTRAST = 0.45
+CONFIDENT_UNKNOWN_CONTRAST = 0.12
+
+# Face-detection results memoized per video, keyed by perceptual frame hash
+FACE_CACHE_SIZE = 128
+
+# Frames are downscaled to this width before face detection and statistics.
+# Face-size checks are ratios of the frame area, so they are unaffected.
+ANALYSIS_WIDTH = 320
+
+
+_LEVELS = np.arange(256, dtype=np.uint64)
+_LEVELS_SQ = _LEVELS * _LEVELS
+
+
+def _mean_std_py(gray: np.ndarray) -> Tuple[float, float]:
+    """
+    Mean and standard deviation of a uint8 grayscale frame
+
+    One integer pass over the pixels (a 256-bin histogram) gives exact sums
+    of values and squares without float64 temporaries or a second pass.
+    """
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.uint64)
+    n = gray.size
+    mean = int(hist @ _LEVELS) / n
+    var = int(hist @ _LEVELS_SQ) / n - mean * mean
+    return mean, math.sqrt(max(var, 0.0))
+
+
+if HAS_NUMBA:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _mean_std(gray):
+        """Single-pass mean and standard deviation of a grayscale frame"""
+        flat = gray.ravel()
+        n = flat.size
+        s = 0.0
+        s2 = 0.0
+        for i in prange(n):
+            v = float(flat[i])
+            s += v
+            s2 += v * v
+        m = s / n
+        return m, math.sqrt(max(s2 / n - m * m, 0.0))
+else:
+    _mean_std = _mean_std_py
+
+
+def _dhash(gray) -> int:
+    """64-bit difference hash of a grayscale frame (near-identical frames collide)"""
+    if isinstance(gray, np.ndarray):
+        tiny = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    else:
+        tiny = cv2.cuda.resize(gray, (9, 8), interpolation=cv2.INTER_AREA).download()
+    return int.from_bytes(np.packbits(tiny[:, 1:] > tiny[:, :-1]).tobytes(), "little")
+
+
+@functools.lru_cache(maxsize=2)
+def _get_face_cascade(use_cuda: bool):
+    """Load the Haar face detector once per device (XML parsing is not free)"""
+    cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+    if use_cuda:
+        face_cascade = cv2.cuda.CascadeClassifier_create(cascade_path)
+        face_cascade.setScaleFactor(1.1)
+        face_cascade.setMinNeighbors(4)
+        return face_cascade
+    return cv2.CascadeClassifier(cascade_path)
+
 
 class CameraSwitchingService:
     """Service for intelligent camera switching between spectator and gameplay"""
@@ -60,63 +159,62 @@ class CameraSwitchingService:
                 logger.warning("Could not determine video FPS or frame count")
                 return []
 
-            # Load face detector
-            try:
-                face_cascade = cv2.CascadeClassifier(
-                    cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-                )
-            except:
-                logger.warning("Could not load face cascade")
-                return []
-
             sample_step = int(sample_interval * fps)
             if sample_step < 1:
                 sample_step = 1
 
-            camera_views = []
-            current_view = None
-            current_start_time = 0.0
+            # Analyze a downscaled copy of each sampled frame
+            analysis_size = None
+            if frame_width > ANALYSIS_WIDTH:
+                analysis_size = (
+                    ANALYSIS_WIDTH,
+                    max(1, int(ANALYSIS_WIDTH * frame_height / frame_width)),
+                )
+                frame_width, frame_height = analysis_size
+
+            frames = None
+            if CUDA_AVAILABLE:
+                reader = self._open_cuda_reader(video_path)
+                if reader is not None:
+                    frames = self._iter_sampled_frames_cuda(
+                        reader, total_frames, sample_step, analysis_size
+                    )
+            use_cuda = frames is not None
+            if not use_cuda:
+                frames = self._iter_sampled_frames(
+                    cap, total_frames, sample_step, analysis_size
+                )
 
-            frame_idx = 0
-            while frame_idx < total_frames:
-                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
-                ret, frame = cap.read()
+            # Load face detector (on the same device the frames live on)
+            face_cascade = self._load_face_detector(use_cuda)
+            if face_cascade is None:
+                return []
+
+            # Adjacent samples of the same shot usually hash identically
+            face_cache = OrderedDict()
+
+            # Per-sample view codes (see VIEW_TYPES) and confidences
+            max_samples = total_frames // sample_step + 1
+            codes = np.empty(max_samples, dtype=np.int8)
+            confidences = np.empty(max_samples, dtype=np.float64)
+            num_samples = 0
 
-                if not ret:
-                    break
+            for _, gray, stats in frames:
+                if stats is None:
+                    stats = self._frame_stats(gray)
 
                 # Analyze frame
                 view_type = self._classify_camera_view(
-                    frame, face_cascade, frame_width, frame_height, min_face_size
+                    gray, face_cascade, frame_width, frame_height, min_face_size, stats,
+                    face_cache,
                 )
+                codes[num_samples] = _VIEW_CODES[view_type]
+                confidences[num_samples] = self._get_view_confidence(gray, view_type, stats)
+                num_samples += 1
 
-                # Detect view change
-                if view_type != current_view:
-                    # End previous segment
-                    if current_view is not None:
-                        camera_views.append({
-                            "view_type": current_view,
-                            "start_time": current_start_time,
-                            "end_time": frame_idx / fps,
-                            "duration": (frame_idx / fps) - current_start_time,
-                            "confidence": self._get_view_confidence(frame, view_type),
-                        })
-
-                    # Start new segment
-                    current_view = view_type
-                    current_start_time = frame_idx / fps
-
-                frame_idx += sample_step
-
-            # Add final segment
-            if current_view is not None:
-                camera_views.append({
-                    "view_type": current_view,
-                    "start_time": current_start_time,
-                    "end_time": total_frames / fps,
-                    "duration": (total_frames / fps) - current_start_time,
-                    "confidence": 1.0,
-                })
+            camera_views = self._build_view_segments(
+                codes[:num_samples], confidences[:num_samples], sample_step, fps, total_frames
+            )
 
             cap.release()
 
@@ -131,40 +229,220 @@ class CameraSwitchingService:
             cap.release()
             return []
 
+    def _build_view_segments(
+        self,
+        codes: np.ndarray,
+        confidences: np.ndarray,
+        sample_step: int,
+        fps: float,
+        total_frames: int,
+    ) -> List[Dict[str, any]]:
+        """
+        Collapse per-sample view codes into contiguous view segments
+
+        Args:
+            codes: View code of each sampled frame
+            confidences: Classification confidence of each sampled frame
+            sample_step: Frames between samples
+            fps: Video frame rate
+            total_frames: Total frames in the video
+
+        Returns:
+            List of camera view segments
+        """
+        if len(codes) == 0:
+            return []
+
+        # Sample indices where the view changes
+        changes = np.flatnonzero(np.diff(codes)) + 1
+        starts = np.concatenate(([0], changes))
+
+        start_times = starts * sample_step / fps
+        end_times = np.append(changes * sample_step / fps, total_frames / fps)
+
+        # A segment's confidence is taken from the sample that ends it
+        segment_confidences = np.append(confidences[changes], 1.0)
+
+        return [
+            {
+                "view_type": VIEW_TYPES[codes[start]],
+                "start_time": float(start_time),
+                "end_time": float(end_time),
+                "duration": float(end_time - start_time),
+                "confidence": float(confidence),
+            }
+            for start, start_time, end_time, confidence in zip(
+                starts, start_times, end_times, segment_confidences
+            )
+        ]
+
+    def _open_cuda_reader(self, video_path: Path):
+        """Open an NVDEC-backed reader, or None if the codec/container is unsupported"""
+        try:
+            return cv2.cudacodec.createVideoReader(str(video_path))
+        except cv2.error as e:
+            logger.warning(f"CUDA video reader unavailable, using CPU decode: {e}")
+            return None
+
+    def _request_gray_output(self, reader) -> bool:
+        """Ask NVDEC to output the Y (luma) plane of NV12 instead of BGRA"""
+        try:
+            return reader.set(cv2.cudacodec.ColorFormat_GRAY) is not False
+        except (AttributeError, cv2.error) as e:
+            logger.debug(f"Gray decode output unsupported, converting from BGRA: {e}")
+            return False
+
+    def _load_face_detector(self, use_cuda: bool):
+        """Load the Haar face detector, on the GPU when frames are decoded there"""
+        try:
+            return _get_face_cascade(use_cuda)
+        except Exception as e:
+            logger.warning(f"Could not load face cascade: {e}")
+            return None
+
+    def _detect_faces(self, gray, face_cascade):
+        """Run face detection, keeping GPU frames on-device"""
+        if isinstance(gray, cv2.cuda_GpuMat):
+            return face_cascade.convert(face_cascade.detectMultiScale(gray))
+        return face_cascade.detectMultiScale(gray, 1.1, 4)
+
+    def _iter_sampled_frames(
+        self,
+        cap,
+        total_frames: int,
+        sample_step: int,
+        analysis_size: Optional[Tuple[int, int]] = None,
+    ):
+        """
+        Yield (frame_idx, gray, stats) for sampled frames decoded on the CPU
+
+        Decode, resize and gray buffers are allocated on the first frame and
+        reused afterwards, so the yielded gray array is only valid until the
+        next iteration.
+        """
+        frame = small = gray = None
+
+        frame_idx = 0
+        while frame_idx < total_frames:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+            if not cap.grab():
+                break
+
+            ret, frame = cap.retrieve(frame)
+            if not ret:
+                break
+
+            source = frame
+            if analysis_size is not None:
+                small = cv2.resize(
+                    frame, analysis_size, dst=small, interpolation=cv2.INTER_AREA
+                )
+                source = small
+
+            gray = cv2.cvtColor(source, cv2.COLOR_BGR2GRAY, dst=gray)
+
+            yield frame_idx, gray, None
+            frame_idx += sample_step
+
+    def _iter_sampled_frames_cuda(
+        self,
+        reader,
+        total_frames: int,
+        sample_step: int,
+        analysis_size: Optional[Tuple[int, int]] = None,
+    ):
+        """
+        Yield (frame_idx, gray, stats) for sampled frames decoded with NVDEC
+
+        Frames stay in GPU memory: brightness/contrast are computed on-device and
+        the gray GpuMat is handed straight to the CUDA face detector. When the
+        decoder can emit the luma plane directly no color conversion is done.
+        """
+        decodes_gray = self._request_gray_output(reader)
+
+        frame_idx = 0
+        while frame_idx < total_frames:
+            ret, gpu_frame = reader.nextFrame()
+
+            if not ret:
+                break
+
+            if frame_idx % sample_step == 0:
+                if decodes_gray:
+                    gpu_gray = gpu_frame
+                else:
+                    gpu_gray = cv2.cuda.cvtColor(gpu_frame, cv2.COLOR_BGRA2GRAY)
+                if analysis_size is not None:
+                    gpu_gray = cv2.cuda.resize(
+                        gpu_gray, analysis_size, interpolation=cv2.INTER_AREA
+                    )
+                mean, stddev = cv2.cuda.meanStdDev(gpu_gray)
+                stats = (
+                    float(np.ravel(mean)[0]) / 255.0,
+                    float(np.ravel(stddev)[0]) / 128.0,
+                )
+                yield frame_idx, gpu_gray, stats
+
+            frame_idx += 1
+
+    def _frame_stats(self, gray: np.ndarray) -> Tuple[float, float]:
+        """Normalized (brightness, contrast) of a grayscale frame"""
+        mean, std = _mean_std(gray)
+        return mean / 255.0, std / 128.0
+
     def _classify_camera_view(
         self,
-        frame: np.ndarray,
+        gray,
         face_cascade,
         frame_width: int,
         frame_height: int,
         min_face_size: float,
+        stats: Optional[Tuple[float, float]] = None,
+        face_cache: Optional[OrderedDict] = None,
     ) -> str:
         """
         Classify the current camera view
 
+        Args:
+            gray: Grayscale frame (ndarray, or GpuMat on the CUDA path)
+            stats: Precomputed (brightness, contrast), e.g. from the GPU decode path
+            face_cache: Optional LRU of frame hash -> facecam decision
+
         Returns:
             'facecam', 'gameplay', or 'unknown'
         """
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-
-        # Detect faces
-        faces = face_cascade.detectMultiScale(gray, 1.1, 4)
+        # Cheap frame statistics first
+        brightness, contrast = stats if stats is not None else self._frame_stats(gray)
 
-        if len(faces) > 0:
-            # Check if there's a significant face (likely facecam)
-            for (x, y, w, h) in faces:
-                face_area = w * h
-                frame_area = frame_width * frame_height
-                face_ratio = face_area / frame_area
-
-                if face_ratio >= min_face_size:
-                    return "facecam"
+        # Early out when contrast alone is conclusive
+        if contrast > CONFIDENT_GAMEPLAY_CONTRAST:
+            return "gameplay"
+        if contrast < CONFIDENT_UNKNOWN_CONTRAST:
+            return "unknown"
+
+        # Reuse the face decision for a visually identical earlier frame
+        frame_hash = None
+        has_face = None
+        if face_cache is not None:
+            frame_hash = _dhash(gray)
+            has_face = face_cache.get(frame_hash)
+            if has_face is not None:
+                face_cache.move_to_end(frame_hash)
+
+        if has_face is None:
+            has_face = self._has_significant_face(
+                gray, face_cascade, frame_width, frame_height, min_face_size
+            )
+            if face_cache is not None:
+                face_cache[frame_hash] = has_face
+                if len(face_cache) > FACE_CACHE_SIZE:
+                    face_cache.popitem(last=False)
+
+        if has_face:
+            return "facecam"
 
         # No significant face detected - check for gameplay characteristics
         # High contrast, fast motion, colorful = likely gameplay
-        brightness = np.mean(gray) / 255.0
-        contrast = np.std(gray) / 128.0
-
         # Gameplay usually has higher contrast
         if contrast > 0.3:
             return "gameplay"
@@ -172,10 +450,36 @@ class CameraSwitchingService:
         # Default to unknown
         return "unknown"
 
-    def _get_view_confidence(self, frame: np.ndarray, view_type: str) -> float:
-        """Calculate confidence score for view classification"""
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    def _has_significant_face(
+        self,
+        gray,
+        face_cascade,
+        frame_width: int,
+        frame_height: int,
+        min_face_size: float,
+    ) -> bool:
+        """Whether the frame contains a face large enough to be a facecam"""
+        # Detect faces
+        faces = self._detect_faces(gray, face_cascade)
+
+        # Check if there's a significant face (likely facecam)
+        for (x, y, w, h) in faces:
+            face_area = w * h
+            frame_area = frame_width * frame_height
+            face_ratio = face_area / frame_area
+
+            if face_ratio >= min_face_size:
+                return True
+
+        return False
 
+    def _get_view_confidence(
+        self,
+        gray,
+        view_type: str,
+        stats: Optional[Tuple[float, float]] = None,
+    ) -> float:
+        """Calculate confidence score for view classification"""
         if view_type == "facecam":
             # High confidence if there are clear face features
             # This would be enhanced with better face detection
@@ -183,7 +487,7 @@ class CameraSwitchingService:
 
         elif view_type == "gameplay":
             # Higher confidence if high contrast
-            contrast = np.std(gray) / 128.0
+            _, contrast = stats if stats is not None else self._frame_stats(gray)
             return min(1.0, 0.5 + contrast)
 
         else:
@@ -207,33 +511,57 @@ class CameraSwitchingService:
         if not camera_views:
             return []
 
-        # Merge short segments into neighboring longer segments
+        # Smooth transitions between views
+        # Add transition buffer times
+        transition_buffer = 0.5  # 0.5 second buffer
+
+        # Index of the next segment long enough to keep, for each segment
+        next_long_idx = [None] * len(camera_views)
+        upcoming = None
+        for i in range(len(camera_views) - 1, -1, -1):
+            next_long_idx[i] = upcoming
+            if camera_views[i]["duration"] >= min_duration:
+                upcoming = i
+
         processed_views = []
+        pending_start = None  # Start of a short run handed to the next segment
+
+        for i, view in enumerate(camera_views):
+            prev_view = processed_views[-1] if processed_views else None
 
-        for view in camera_views:
             if view["duration"] < min_duration:
-                # Too short - merge with previous or next
-                if processed_views:
-                    last_view = processed_views[-1]
-                    # Extend previous view
-                    last_view["end_time"] = view["end_time"]
-                    last_view["duration"] += view["duration"]
+                # Too short - merge into the longer neighbor
+                next_idx = next_long_idx[i]
+                next_duration = camera_views[next_idx]["duration"] if next_idx is not None else None
+
+                if pending_start is None and prev_view is not None and (
+                    next_duration is None or prev_view["duration"] >= next_duration
+                ):
+                    prev_view["end_time"] = view["end_time"]
+                    prev_view["duration"] = prev_view["end_time"] - prev_view["start_time"]
+                elif next_duration is not None:
+                    if pending_start is None:
+                        pending_start = view["start_time"]
                 else:
-                    # No previous view, keep as is
+                    # Nothing long enough around it, keep as is
                     processed_views.append(view.copy())
-            else:
-                processed_views.append(view.copy())
+                continue
 
-        # Smooth transitions between views
-        # Add transition buffer times
-        transition_buffer = 0.5  # 0.5 second buffer
+            current = view.copy()
+            if pending_start is not None:
+                current["start_time"] = pending_start
+                current["duration"] = current["end_time"] - pending_start
+                pending_start = None
 
-        for i in range(len(processed_views) - 1):
-            current = processed_views[i]
-            next_view = processed_views[i + 1]
+            # Coalesce with the previous segment when merging left two of a kind
+            if prev_view is not None and prev_view["view_type"] == current["view_type"]:
+                prev_view["end_time"] = current["end_time"]
+                prev_view["duration"] = prev_view["end_time"] - prev_view["start_time"]
+                continue
 
-            # Adjust start/end times with buffer
-            current["transition_time"] = current["end_time"] + transition_buffer
+            if prev_view is not None:
+                prev_view["transition_time"] = prev_view["end_time"] + transition_buffer
+            processed_views.append(current)
 
         return processed_views
 
@@ -256,62 +584,66 @@ class CameraSwitchingService:
         Returns:
             List of recommended switch points
         """
-        # Filter views within clip range
-        clip_views = [
-            v for v in camera_views
-            if v["start_time"] < clip_end and v["end_time"] > clip_start
-        ]
-
-        switch_points = []
+        num_views = len(camera_views)
+        starts = np.fromiter((v["start_time"] for v in camera_views), dtype=np.float64, count=num_views)
+        ends = np.fromiter((v["end_time"] for v in camera_views), dtype=np.float64, count=num_views)
 
-        # Find view boundaries
-        for view in clip_views:
-            # Start of this view (if within clip)
-            if view["start_time"] > clip_start:
-                switch_points.append({
-                    "time": view["start_time"],
-                    "type": "switch_to_" + view["view_type"],
-                    "confidence": view["confidence"],
-                })
+        # Filter views within clip range
+        in_clip = (starts < clip_end) & (ends > clip_start)
 
-            # End of this view (if within clip)
-            if view["end_time"] < clip_end:
-                switch_points.append({
-                    "time": view["end_time"],
-                    "type": "switch_from_" + view["view_type"],
-                    "confidence": view["confidence"],
-                })
+        # Find view boundaries: start/end of each view (if within clip)
+        start_idx = np.flatnonzero(in_clip & (starts > clip_start))
+        end_idx = np.flatnonzero(in_clip & (ends < clip_end))
 
         # Add evenly spaced switches if too few
-        if len(switch_points) < (clip_end - clip_start) / preferred_switch_interval:
+        timed_times = np.empty(0, dtype=np.float64)
+        if len(start_idx) + len(end_idx) < (clip_end - clip_start) / preferred_switch_interval:
             num_switches = int((clip_end - clip_start) / preferred_switch_interval)
-            for i in range(1, num_switches + 1):
-                t = clip_start + (i * preferred_switch_interval)
-                if t < clip_end:
-                    switch_points.append({
-                        "time": t,
-                        "type": "timed_switch",
-                        "confidence": 0.7,
-                    })
-
-        # Sort by time and deduplicate
-        switch_points = sorted(switch_points, key=lambda x: x["time"])
-
-        # Remove duplicates (within 0.5s)
+            timed_times = clip_start + np.arange(1, num_switches + 1) * preferred_switch_interval
+            timed_times = timed_times[timed_times < clip_end]
+
+        # Candidate points; ties keep view order (start before end), then timed
+        times = np.concatenate((starts[start_idx], ends[end_idx], timed_times))
+        kinds = np.concatenate((
+            np.zeros(len(start_idx), dtype=np.int8),
+            np.ones(len(end_idx), dtype=np.int8),
+            np.full(len(timed_times), 2, dtype=np.int8),
+        ))
+        view_idx = np.concatenate((start_idx, end_idx, np.full(len(timed_times), -1)))
+        tie_order = np.concatenate((
+            2 * start_idx,
+            2 * end_idx + 1,
+            2 * num_views + np.arange(len(timed_times)),
+        ))
+
+        # Sort by time and filter to clip range
+        order = np.lexsort((tie_order, times))
+        order = order[(times[order] > clip_start) & (times[order] < clip_end)]
+        sorted_times = times[order]
+
+        # Remove duplicates (within 0.5s of the last kept point)
+        keep = []
+        i = 0
+        while i < len(sorted_times):
+            keep.append(order[i])
+            i = int(np.searchsorted(sorted_times, sorted_times[i] + 0.5, side="right"))
+
         filtered_points = []
-        for point in switch_points:
-            if not filtered_points:
-                filtered_points.append(point)
+        for k in keep:
+            if kinds[k] == 2:
+                filtered_points.append({
+                    "time": float(times[k]),
+                    "type": "timed_switch",
+                    "confidence": 0.7,
+                })
             else:
-                last_point = filtered_points[-1]
-                if abs(point["time"] - last_point["time"]) > 0.5:
-                    filtered_points.append(point)
-
-        # Filter to clip range
-        filtered_points = [
-            p for p in filtered_points
-            if clip_start < p["time"] < clip_end
-        ]
+                view = camera_views[view_idx[k]]
+                prefix = "switch_to_" if kinds[k] == 0 else "switch_from_"
+                filtered_points.append({
+                    "time": view["start_time"] if kinds[k] == 0 else view["end_time"],
+                    "type": prefix + view["view_type"],
+                    "confidence": view["confidence"],
+                })
 
         return filtered_points
 
@@ -332,37 +664,36 @@ class CameraSwitchingService:
         Returns:
             Timeline with camera switches and highlights
         """
-        timeline = []
-
-        # Add camera view segments
-        for view in camera_views:
-            timeline.append({
+        # Camera view segments
+        camera_changes = (
+            {
                 "time": view["start_time"],
                 "type": "camera_change",
                 "view_type": view["view_type"],
                 "duration": view["duration"],
                 "confidence": view["confidence"],
-            })
-
-        # Find interesting moments in transcription
-        interesting_keywords = ["wow", "incredible", "amazing", "check this", "look", "secret"]
-
-        for word in transcription_words:
-            word_text = word.get("text", "").lower()
-
-            if any(keyword in word_text for keyword in interesting_keywords):
-                timeline.append({
-                    "time": word["start_time"],
-                    "type": "highlight",
-                    "text": word["text"],
-                    "reason": "interesting_keyword",
-                })
-
-        # Sort timeline by time
-        timeline = sorted(timeline, key=lambda x: x["time"])
-
-        # Filter to clip duration
-        timeline = [t for t in timeline if t["time"] < clip_duration]
+            }
+            for view in camera_views
+        )
+
+        # Interesting moments in transcription
+        highlights = (
+            {
+                "time": word["start_time"],
+                "type": "highlight",
+                "text": word["text"],
+                "reason": "interesting_keyword",
+            }
+            for word in transcription_words
+            if _KEYWORD_RE.search(word.get("text", ""))
+        )
+
+        # Both streams are chronological: merge them and stop at the clip end
+        timeline = []
+        for entry in heapq.merge(camera_changes, highlights, key=lambda x: x["time"]):
+            if entry["time"] >= clip_duration:
+                break
+            timeline.append(entry)
 
         return timeline
 
@@ -3,14 +3,33 @@ AI Captions Service
 Beautiful, animated captions with karaoke-style word highlighting
 Inspired by SubsAI and modern viral video styles
 """
+import bisect
+import functools
+import json
 import logging
 from pathlib import Path
-from typing import Optional, List, Dict, Any, Literal
+from typing import Optional, List, Dict, Any, Iterator, Literal, NamedTuple, Tuple
 from dataclasses import dataclass
 from enum import Enum
 import subprocess
 import tempfile
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
+
+# Fast JSON decoding for raw transcriptions (optional)
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# JIT-compiled caption timing kernel (optional - falls back to NumPy)
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
 
 logger = logging.getLogger(__name__)
 
@@ -43,6 +62,18 @@ class CaptionTheme:
     animation: Optional[str] = None      # ASS animation effects
 
 
+@dataclass
+class BurnJob:
+    """One captioned render for CaptionsService.burn_many"""
+    video_path: Path
+    output_path: Path
+    words: List[Dict[str, Any]]
+    theme_id: str = "viral"
+    style: CaptionStyle = CaptionStyle.KARAOKE
+    words_per_line: int = 3
+    time_offset: float = 0.0
+
+
 # Predefined themes
 CAPTION_THEMES: Dict[str, CaptionTheme] = {
     "viral": CaptionTheme(
@@ -132,6 +163,253 @@ CAPTION_THEMES: Dict[str, CaptionTheme] = {
 }
 
 
+def _build_header_template(theme: CaptionTheme) -> str:
+    """ASS header for a theme, leaving only size/resolution fields as placeholders"""
+    bold = -1 if theme.bold else 0
+    
+    return f"""[Script Info]
+Title: ClipAI Captions
+ScriptType: v4.00+
+WrapStyle: 0
+ScaledBorderAndShadow: yes
+YCbCr Matrix: TV.709
+PlayResX: {{width}}
+PlayResY: {{height}}
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
+Style: Default,{theme.font_name},{{font_size}},{theme.primary_color},{theme.secondary_color},{theme.outline_color},{theme.back_color},{bold},0,0,0,100,100,0,0,1,{{outline}},{{shadow}},{theme.alignment},20,20,{{margin_v}},1
+Style: Highlight,{theme.font_name},{{font_size}},{theme.secondary_color},{theme.primary_color},{theme.outline_color},{theme.back_color},{bold},0,0,0,100,100,0,0,1,{{outline}},{{shadow}},{theme.alignment},20,20,{{margin_v}},1
+{{extra_styles}}
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+"""
+
+
+def _centiseconds(seconds: float) -> int:
+    """Round a timestamp to ASS centiseconds, clamped at zero"""
+    return 0 if seconds <= 0 else int(seconds * 100 + 0.5)
+
+
+def _format_ass_time(seconds: float) -> str:
+    """Format time for ASS format: H:MM:SS.cc"""
+    return _format_centiseconds(_centiseconds(seconds))
+
+
+@functools.lru_cache(maxsize=4096)
+def _format_centiseconds(cs: int) -> str:
+    """Format a centisecond count as H:MM:SS.cc"""
+    hours, cs = divmod(cs, 360000)
+    minutes, cs = divmod(cs, 6000)
+    secs, cs = divmod(cs, 100)
+    return f"{hours:d}:{minutes:02d}:{secs:02d}.{cs:02d}"
+
+
+class _W(NamedTuple):
+    """Caption word with offset-adjusted timestamps"""
+    text: str
+    start: float
+    end: float
+
+
+def _normalize_words(words: List[Dict[str, Any]], offset: float) -> List[_W]:
+    """Strip word text, drop empty words and apply the time offset"""
+    if words and isinstance(words[0], _W):
+        # Already normalized (see load_transcription_bytes)
+        if not offset:
+            return words
+        return [_W(w.text, w.start - offset, w.end - offset) for w in words]
+    
+    normalized = []
+    for w in words:
+        text = w.get("text", "").strip()
+        if text:
+            normalized.append(_W(text, w.get("start_time", 0) - offset, w.get("end_time", 0) - offset))
+    return normalized
+
+
+def load_transcription_bytes(data: bytes) -> Dict[str, Any]:
+    """
+    Decode a JSON transcription and pre-normalize its words
+    
+    The normalized words are stored under "_words_normalized" so repeated
+    generate_from_transcription calls skip per-word dict lookups.
+    """
+    transcription = orjson.loads(data) if HAS_ORJSON else json.loads(data)
+    transcription["_words_normalized"] = _normalize_words(transcription.get("words", []), 0.0)
+    return transcription
+
+
+# Word endings that force a caption line break
+_SENTENCE_END = frozenset(".!?")
+
+
+# Escapes ASS override-block characters in caption text
+_ASS_ESCAPE = str.maketrans({"\\": "\\\\", "{": "\\{", "}": "\\}"})
+
+
+def _prep_word(word: str, _table=_ASS_ESCAPE) -> str:
+    """Uppercase and escape a word for ASS dialogue text"""
+    return word.upper().translate(_table)
+
+
+def _build_karaoke_dialogues(lines: List[Dict[str, Any]]) -> str:
+    """Build one Dialogue per caption line, timing each word with \\k tags"""
+    out = []
+    
+    for line in lines:
+        line_end = line["end"]
+        if line_end <= 0:
+            continue
+        
+        # Each word is highlighted until the next word starts, so pauses stay in sync
+        marks = [_centiseconds(w.start) for w in line["words"]]
+        marks.append(max(marks[-1], _centiseconds(line_end)))
+        text = " ".join(
+            f"{{\\k{max(0, marks[i + 1] - marks[i])}}}{upper}"
+            for i, upper in enumerate(line["uppers"])
+        )
+        
+        start_str = _format_ass_time(line["start"])
+        end_str = _format_ass_time(line_end)
+        out.append(f"Dialogue: 0,{start_str},{end_str},Highlight,,0,0,0,,{text}\n")
+    
+    return "".join(out)
+
+
+# Compiled karaoke builder (optional - see _captions_fast.pyx)
+try:
+    from ._captions_fast import build_karaoke_dialogues
+    HAS_CAPTIONS_FAST = True
+except ImportError:
+    build_karaoke_dialogues = _build_karaoke_dialogues
+    HAS_CAPTIONS_FAST = False
+
+
+# Escapes a path for a single-quoted FFmpeg filter argument in one pass:
+# quotes close and re-open the quoting, ':' and filtergraph separators are escaped
+_ASS_PATH_TRANS = str.maketrans({
+    "\\": "/",
+    ":": "\\:",
+    "'": "'\\\\\\''",
+    "[": "\\[",
+    "]": "\\]",
+    ",": "\\,",
+})
+
+
+# Hardware H.264 encoders, in order of preference
+_HW_ENCODERS = (
+    ("nvenc", "h264_nvenc"),
+    ("vaapi", "h264_vaapi"),
+    ("qsv", "h264_qsv"),
+    ("videotoolbox", "h264_videotoolbox"),
+)
+_VAAPI_DEVICE = "/dev/dri/renderD128"
+
+# Consumer NVIDIA GPUs cap the number of simultaneous NVENC sessions
+MAX_NVENC_SESSIONS = 2
+
+
+@functools.lru_cache(maxsize=1)
+def _detect_hwaccel() -> Optional[str]:
+    """Detect the preferred hardware H.264 encoder (checked once per process)"""
+    try:
+        result = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-encoders"],
+            capture_output=True, text=True, timeout=10
+        )
+    except Exception as e:
+        logger.warning(f"Could not list FFmpeg encoders: {e}")
+        return None
+    
+    for hwaccel, encoder in _HW_ENCODERS:
+        if encoder not in result.stdout:
+            continue
+        if hwaccel == "vaapi" and not os.path.exists(_VAAPI_DEVICE):
+            continue
+        logger.info(f"Using {encoder} for hardware encoding")
+        return hwaccel
+    return None
+
+
+@functools.lru_cache(maxsize=256)
+def _probe_dims(path_str: str, mtime_ns: int, size: int) -> tuple[int, int]:
+    """Probe video width and height (mtime/size key the cache to the file contents)"""
+    cmd = [
+        "ffprobe", "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "stream=width,height",
+        "-of", "csv=p=0:s=x",
+        path_str
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    width, height = map(int, result.stdout.strip().split("x"))
+    return width, height
+
+
+def _compute_event_numbers_py(
+    starts: np.ndarray, ends: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Per-word (start_cs, end_cs, bounce_ms) for the bounce builder"""
+    starts = np.maximum(starts, 0.0)
+    start_cs = np.where(starts <= 0, 0, (starts * 100 + 0.5)).astype(np.int64)
+    end_cs = np.where(ends <= 0, 0, (ends * 100 + 0.5)).astype(np.int64)
+    bounce_ms = np.minimum(150, ((ends - starts) * 1000 / 3).astype(np.int64))
+    return start_cs, end_cs, bounce_ms
+
+
+if HAS_NUMBA:
+    @njit(cache=True)
+    def _compute_event_numbers(starts, ends):
+        """Per-word (start_cs, end_cs, bounce_ms) in one pass"""
+        n = starts.size
+        start_cs = np.zeros(n, dtype=np.int64)
+        end_cs = np.zeros(n, dtype=np.int64)
+        bounce_ms = np.zeros(n, dtype=np.int64)
+        for i in range(n):
+            start = max(starts[i], 0.0)
+            end = ends[i]
+            if start > 0:
+                start_cs[i] = int(start * 100 + 0.5)
+            if end > 0:
+                end_cs[i] = int(end * 100 + 0.5)
+            bounce_ms[i] = min(150, int((end - start) * 1000 / 3))
+        return start_cs, end_cs, bounce_ms
+else:
+    _compute_event_numbers = _compute_event_numbers_py
+
+
+# Per-theme ASS headers, specialized once at import time
+_HEADER_TEMPLATES: Dict[str, str] = {
+    theme_id: _build_header_template(theme)
+    for theme_id, theme in CAPTION_THEMES.items()
+}
+
+# Per-theme bounce word tags; only timings and the word are filled per word
+_BOUNCE_TEMPLATES: Dict[str, str] = {
+    theme_id: (
+        "{{\\t(0,{bms},\\fscx120\\fscy120)\\t({bms},{bms2},\\fscx100\\fscy100)"
+        f"\\c{theme.secondary_color}}}}}{{word}}{{{{\\c{theme.primary_color}}}}}"
+    )
+    for theme_id, theme in CAPTION_THEMES.items()
+}
+
+# Gradient line tags, one per consecutive color pair of the cycle
+_GRADIENT_COLORS = [
+    "&H00FF6B9D",  # Pink
+    "&H00C850C0",  # Purple
+    "&H00FFDE59",  # Yellow
+    "&H0059FFDE",  # Cyan
+    "&H006BFF9D",  # Green
+]
+_GRADIENT_FADE_TEMPLATES = [
+    f"{{{{\\t(0,{{fade_ms}},\\c{next_color})\\c{color}}}}}"
+    "{{\\t(0,100,\\fscx105\\fscy105)\\t(100,200,\\fscx100\\fscy100)}}{text}"
+    for color, next_color in zip(_GRADIENT_COLORS, _GRADIENT_COLORS[1:] + _GRADIENT_COLORS[:1])
+]
+
+
 class CaptionsService:
     """Service for generating beautiful AI-powered captions"""
     
@@ -172,7 +450,9 @@ class CaptionsService:
         Returns:
             Path to generated ASS file
         """
-        theme = CAPTION_THEMES.get(theme_id, CAPTION_THEMES[self.default_theme])
+        if theme_id not in CAPTION_THEMES:
+            theme_id = self.default_theme
+        theme = CAPTION_THEMES[theme_id]
         
         # Scale font size based on resolution
         scale_factor = height / 1920
@@ -182,48 +462,39 @@ class CaptionsService:
         shadow = max(1, int(theme.shadow_depth * scale_factor))
         
         if style == CaptionStyle.KARAOKE:
-            content = self._generate_karaoke_ass(
-                words, theme, font_size, margin_v, outline, shadow,
+            parts = self._iter_karaoke_ass(
+                words, theme_id, theme, font_size, margin_v, outline, shadow,
                 width, height, words_per_line, time_offset
             )
         elif style == CaptionStyle.GRADIENT:
-            content = self._generate_gradient_ass(
-                words, theme, font_size, margin_v, outline, shadow,
+            parts = self._iter_gradient_ass(
+                words, theme_id, theme, font_size, margin_v, outline, shadow,
                 width, height, words_per_line, time_offset
             )
         elif style == CaptionStyle.BOUNCE:
-            content = self._generate_bounce_ass(
-                words, theme, font_size, margin_v, outline, shadow,
+            parts = self._iter_bounce_ass(
+                words, theme_id, theme, font_size, margin_v, outline, shadow,
                 width, height, words_per_line, time_offset
             )
         else:
             # Default to viral style
-            content = self._generate_viral_ass(
-                words, theme, font_size, margin_v, outline, shadow,
+            parts = self._iter_viral_ass(
+                words, theme_id, theme, font_size, margin_v, outline, shadow,
                 width, height, words_per_line, time_offset
             )
         
         output_path = Path(output_path)
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write(content)
+        with open(output_path, "w", encoding="utf-8", buffering=1 << 20) as f:
+            f.writelines(parts)
         
         logger.info(f"Generated ASS captions: {output_path}")
         return output_path
     
-    def _format_ass_time(self, seconds: float) -> str:
-        """Format time for ASS format: H:MM:SS.cc"""
-        seconds = max(0, seconds)
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        secs = int(seconds % 60)
-        centiseconds = int((seconds % 1) * 100)
-        return f"{hours:d}:{minutes:02d}:{secs:02d}.{centiseconds:02d}"
-    
     def _get_ass_header(
         self,
-        theme: CaptionTheme,
+        theme_id: str,
         font_size: int,
         margin_v: int,
         outline: int,
@@ -233,26 +504,15 @@ class CaptionsService:
         extra_styles: str = ""
     ) -> str:
         """Generate ASS file header with styles"""
-        bold = -1 if theme.bold else 0
-        
-        header = f"""[Script Info]
-Title: ClipAI Captions
-ScriptType: v4.00+
-WrapStyle: 0
-ScaledBorderAndShadow: yes
-YCbCr Matrix: TV.709
-PlayResX: {width}
-PlayResY: {height}
-
-[V4+ Styles]
-Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
-Style: Default,{theme.font_name},{font_size},{theme.primary_color},{theme.secondary_color},{theme.outline_color},{theme.back_color},{bold},0,0,0,100,100,0,0,1,{outline},{shadow},{theme.alignment},20,20,{margin_v},1
-Style: Highlight,{theme.font_name},{font_size},{theme.secondary_color},{theme.primary_color},{theme.outline_color},{theme.back_color},{bold},0,0,0,100,100,0,0,1,{outline},{shadow},{theme.alignment},20,20,{margin_v},1
-{extra_styles}
-[Events]
-Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
-"""
-        return header
+        return _HEADER_TEMPLATES[theme_id].format_map({
+            "font_size": font_size,
+            "margin_v": margin_v,
+            "outline": outline,
+            "shadow": shadow,
+            "width": width,
+            "height": height,
+            "extra_styles": extra_styles,
+        })
     
     def _group_words_into_lines(
         self,
@@ -261,47 +521,44 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
         time_offset: float
     ) -> List[Dict[str, Any]]:
         """Group words into caption lines"""
-        lines = []
-        current_line_words = []
+        ws = _normalize_words(words, time_offset)
+        n = len(ws)
+        if n == 0:
+            return []
+        
+        texts = [w.text for w in ws]
+        is_sentence_end = np.fromiter(
+            (t[-1] in _SENTENCE_END for t in texts), dtype=bool, count=n
+        )
         
-        for word in words:
-            word_text = word.get("text", "").strip()
-            if not word_text:
-                continue
-                
-            current_line_words.append({
-                "text": word_text,
-                "start": word.get("start_time", 0) - time_offset,
-                "end": word.get("end_time", 0) - time_offset,
-            })
-            
-            # Create new line after words_per_line words or at sentence end
-            is_sentence_end = word_text.rstrip()[-1:] in ".!?" if word_text.rstrip() else False
-            
-            if len(current_line_words) >= words_per_line or is_sentence_end:
-                if current_line_words:
-                    lines.append({
-                        "words": current_line_words,
-                        "start": current_line_words[0]["start"],
-                        "end": current_line_words[-1]["end"],
-                        "text": " ".join(w["text"] for w in current_line_words)
-                    })
-                    current_line_words = []
-        
-        # Add remaining words
-        if current_line_words:
+        # Position of each word since the last line break forced by a sentence end
+        idx = np.arange(n)
+        run_starts = np.concatenate(([True], is_sentence_end[:-1]))
+        pos = idx - np.maximum.accumulate(np.where(run_starts, idx, 0))
+        
+        # Create new line after words_per_line words or at sentence end
+        words_per_line = max(1, words_per_line)
+        breaks = is_sentence_end | (pos % words_per_line == words_per_line - 1)
+        bounds = np.flatnonzero(breaks[:-1]) + 1
+        
+        uppers = [_prep_word(t) for t in texts]
+        lines = []
+        for a, b in zip(np.concatenate(([0], bounds)).tolist(), np.append(bounds, n).tolist()):
+            line_texts = texts[a:b]
             lines.append({
-                "words": current_line_words,
-                "start": current_line_words[0]["start"],
-                "end": current_line_words[-1]["end"],
-                "text": " ".join(w["text"] for w in current_line_words)
+                "words": ws[a:b],
+                "start": ws[a].start,
+                "end": ws[b - 1].end,
+                "text": " ".join(line_texts),
+                "uppers": uppers[a:b]
             })
         
         return lines
     
-    def _generate_karaoke_ass(
+    def _iter_karaoke_ass(
         self,
         words: List[Dict[str, Any]],
+        theme_id: str,
         theme: CaptionTheme,
         font_size: int,
         margin_v: int,
@@ -311,59 +568,20 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
         height: int,
         words_per_line: int,
         time_offset: float
-    ) -> str:
+    ) -> Iterator[str]:
         """Generate karaoke-style ASS with word-by-word highlighting"""
-        
-        # Create extra style for active word
-        extra_styles = f"""Style: Active,{theme.font_name},{int(font_size * 1.1)},{theme.secondary_color},{theme.primary_color},{theme.outline_color},{theme.back_color},{-1 if theme.bold else 0},0,0,0,105,105,0,0,1,{outline},{shadow},{theme.alignment},20,20,{margin_v},1
-"""
-        
-        content = self._get_ass_header(
-            theme, font_size, margin_v, outline, shadow, width, height, extra_styles
+        yield self._get_ass_header(
+            theme_id, font_size, margin_v, outline, shadow, width, height
         )
         
         lines = self._group_words_into_lines(words, words_per_line, time_offset)
-        
         for line in lines:
-            line_start = line["start"]
-            line_end = line["end"]
-            
-            if line_end <= 0:
-                continue
-            
-            line_words = line["words"]
-            
-            # For each word, create a dialogue line that shows the full phrase
-            # with that specific word highlighted
-            for i, word in enumerate(line_words):
-                word_start = max(0, word["start"])
-                word_end = word["end"]
-                
-                if word_end <= 0:
-                    continue
-                
-                # Build the text with current word highlighted
-                text_parts = []
-                for j, w in enumerate(line_words):
-                    word_upper = w["text"].upper()
-                    if j == i:
-                        # Highlight current word with color and slight scale
-                        text_parts.append(f"{{\\c{theme.secondary_color}\\fscx110\\fscy110}}{word_upper}{{\\c{theme.primary_color}\\fscx100\\fscy100}}")
-                    else:
-                        text_parts.append(word_upper)
-                
-                full_text = " ".join(text_parts)
-                
-                start_str = self._format_ass_time(word_start)
-                end_str = self._format_ass_time(word_end)
-                
-                content += f"Dialogue: 0,{start_str},{end_str},Default,,0,0,0,,{full_text}\n"
-        
-        return content
+            yield build_karaoke_dialogues([line])
     
-    def _generate_gradient_ass(
+    def _iter_gradient_ass(
         self,
         words: List[Dict[str, Any]],
+        theme_id: str,
         theme: CaptionTheme,
         font_size: int,
         margin_v: int,
@@ -373,20 +591,11 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
         height: int,
         words_per_line: int,
         time_offset: float
-    ) -> str:
+    ) -> Iterator[str]:
         """Generate gradient-style ASS with colorful transitions"""
         
-        # Define gradient colors for animation
-        colors = [
-            "&H00FF6B9D",  # Pink
-            "&H00C850C0",  # Purple
-            "&H00FFDE59",  # Yellow
-            "&H0059FFDE",  # Cyan
-            "&H006BFF9D",  # Green
-        ]
-        
-        content = self._get_ass_header(
-            theme, font_size, margin_v, outline, shadow, width, height
+        yield self._get_ass_header(
+            theme_id, font_size, margin_v, outline, shadow, width, height
         )
         
         lines = self._group_words_into_lines(words, words_per_line, time_offset)
@@ -399,33 +608,24 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
             if line_end <= 0:
                 continue
             
-            line_words = line["words"]
             duration = line_end - line_start
             
             # Create gradient effect by animating between colors
-            current_color = colors[color_index % len(colors)]
-            next_color = colors[(color_index + 1) % len(colors)]
-            
-            # Build text with gradient animation
-            text_upper = line["text"].upper()
-            
-            # Use transition animation
-            fade_effect = f"{{\\t(0,{int(duration * 500)},\\c{next_color})\\c{current_color}}}"
-            scale_effect = "{\\t(0,100,\\fscx105\\fscy105)\\t(100,200,\\fscx100\\fscy100)}"
-            
-            full_text = f"{fade_effect}{scale_effect}{text_upper}"
+            fade_template = _GRADIENT_FADE_TEMPLATES[color_index % len(_GRADIENT_FADE_TEMPLATES)]
+            full_text = fade_template.format(
+                fade_ms=int(duration * 500), text=" ".join(line["uppers"])
+            )
             
-            start_str = self._format_ass_time(line_start)
-            end_str = self._format_ass_time(line_end)
+            start_str = _format_ass_time(line_start)
+            end_str = _format_ass_time(line_end)
             
-            content += f"Dialogue: 0,{start_str},{end_str},Default,,0,0,0,,{full_text}\n"
+            yield f"Dialogue: 0,{start_str},{end_str},Default,,0,0,0,,{full_text}\n"
             color_index += 1
-        
-        return content
     
-    def _generate_bounce_ass(
+    def _iter_bounce_ass(
         self,
         words: List[Dict[str, Any]],
+        theme_id: str,
         theme: CaptionTheme,
         font_size: int,
         margin_v: int,
@@ -435,61 +635,61 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
         height: int,
         words_per_line: int,
         time_offset: float
-    ) -> str:
+    ) -> Iterator[str]:
         """Generate bounce-style ASS with bouncy word animations"""
         
-        content = self._get_ass_header(
-            theme, font_size, margin_v, outline, shadow, width, height
+        yield self._get_ass_header(
+            theme_id, font_size, margin_v, outline, shadow, width, height
         )
         
         lines = self._group_words_into_lines(words, words_per_line, time_offset)
+        if not lines:
+            return
+        
+        # Timing numbers for every word in one vectorized/JIT pass
+        all_words = [word for line in lines for word in line["words"]]
+        n = len(all_words)
+        start_cs, end_cs, bounce_ms = _compute_event_numbers(
+            np.fromiter((w.start for w in all_words), dtype=np.float64, count=n),
+            np.fromiter((w.end for w in all_words), dtype=np.float64, count=n),
+        )
+        start_cs = start_cs.tolist()
+        end_cs = end_cs.tolist()
+        bounce_ms = bounce_ms.tolist()
+        bounce_template = _BOUNCE_TEMPLATES[theme_id]
         
+        k = 0
         for line in lines:
-            line_start = max(0, line["start"])
-            line_end = line["end"]
+            line_words = line["words"]
+            first = k
+            k += len(line_words)
             
-            if line_end <= 0:
+            if line["end"] <= 0:
                 continue
             
-            line_words = line["words"]
+            uppers = line["uppers"]
             
             # Create bounce effect for each word
             for i, word in enumerate(line_words):
-                word_start = max(0, word["start"])
-                word_end = word["end"]
-                word_duration = (word_end - word_start) * 1000  # in ms
-                
-                if word_end <= 0:
+                if word.end <= 0:
                     continue
                 
-                # Build text with current word having bounce effect
-                text_parts = []
-                for j, w in enumerate(line_words):
-                    word_upper = w["text"].upper()
-                    if j == i:
-                        # Bounce animation: scale up then down
-                        bounce_ms = min(150, int(word_duration / 3))
-                        bounce_effect = (
-                            f"{{\\t(0,{bounce_ms},\\fscx120\\fscy120)"
-                            f"\\t({bounce_ms},{bounce_ms * 2},\\fscx100\\fscy100)"
-                            f"\\c{theme.secondary_color}}}"
-                        )
-                        text_parts.append(f"{bounce_effect}{word_upper}{{\\c{theme.primary_color}}}")
-                    else:
-                        text_parts.append(word_upper)
-                
+                # Build text with current word having bounce effect:
+                # scale up then down
+                bms = bounce_ms[first + i]
+                text_parts = uppers.copy()
+                text_parts[i] = bounce_template.format(bms=bms, bms2=bms * 2, word=uppers[i])
                 full_text = " ".join(text_parts)
                 
-                start_str = self._format_ass_time(word_start)
-                end_str = self._format_ass_time(word_end)
+                start_str = _format_centiseconds(start_cs[first + i])
+                end_str = _format_centiseconds(end_cs[first + i])
                 
-                content += f"Dialogue: 0,{start_str},{end_str},Default,,0,0,0,,{full_text}\n"
-        
-        return content
+                yield f"Dialogue: 0,{start_str},{end_str},Default,,0,0,0,,{full_text}\n"
     
-    def _generate_viral_ass(
+    def _iter_viral_ass(
         self,
         words: List[Dict[str, Any]],
+        theme_id: str,
         theme: CaptionTheme,
         font_size: int,
         margin_v: int,
@@ -499,11 +699,11 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
         height: int,
         words_per_line: int,
         time_offset: float
-    ) -> str:
+    ) -> Iterator[str]:
         """Generate classic viral-style ASS captions"""
         
-        content = self._get_ass_header(
-            theme, font_size, margin_v, outline, shadow, width, height
+        yield self._get_ass_header(
+            theme_id, font_size, margin_v, outline, shadow, width, height
         )
         
         lines = self._group_words_into_lines(words, words_per_line, time_offset)
@@ -515,18 +715,16 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
             if line_end <= 0:
                 continue
             
-            text_upper = line["text"].upper()
+            text_upper = " ".join(line["uppers"])
             
             # Add subtle pop-in animation
             pop_effect = "{\\fad(50,50)\\t(0,50,\\fscx100\\fscy100)\\fscx95\\fscy95}"
             full_text = f"{pop_effect}{text_upper}"
             
-            start_str = self._format_ass_time(line_start)
-            end_str = self._format_ass_time(line_end)
+            start_str = _format_ass_time(line_start)
+            end_str = _format_ass_time(line_end)
             
-            content += f"Dialogue: 0,{start_str},{end_str},Default,,0,0,0,,{full_text}\n"
-        
-        return content
+            yield f"Dialogue: 0,{start_str},{end_str},Default,,0,0,0,,{full_text}\n"
     
     def burn_captions_to_video(
         self,
@@ -537,6 +735,9 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
         style: CaptionStyle = CaptionStyle.KARAOKE,
         words_per_line: int = 3,
         time_offset: float = 0.0,
+        crf: int = 20,
+        preset: str = "veryfast",
+        threads: int = 0,
     ) -> Path:
         """
         Burn styled captions directly onto a video
@@ -549,6 +750,9 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
             style: Caption style (karaoke, gradient, etc.)
             words_per_line: Words per caption line
             time_offset: Time offset for subtitles
+            crf: Quality level (libx264 CRF, also used for hardware encoders)
+            preset: libx264 preset for the software encoder
+            threads: FFmpeg encoder threads (0 = automatic)
             
         Returns:
             Path to output video with burned captions
@@ -573,23 +777,32 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
             time_offset=time_offset,
         )
         
+        # Filter graph goes in a sidecar script rather than on the command line
+        filter_path = output_path.with_suffix(".filt")
+        
         try:
             # Burn captions using FFmpeg
-            ass_path_escaped = str(ass_path).replace("\\", "/").replace(":", "\\:")
-            
-            cmd = [
-                "ffmpeg", "-y",
-                "-i", str(video_path),
-                "-vf", f"ass='{ass_path_escaped}'",
-                "-c:v", "libx264",
-                "-preset", "medium",
-                "-crf", "18",
-                "-c:a", "copy",
-                str(output_path)
-            ]
+            hwaccel = _detect_hwaccel()
             
+            self._write_burn_filter(filter_path, ass_path, hwaccel)
+            cmd = self._build_burn_cmd(
+                video_path, output_path, filter_path, hwaccel, crf, preset, threads
+            )
             logger.info(f"Burning captions to video: {output_path}")
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            result = subprocess.run(
+                cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+            )
+            
+            if result.returncode != 0 and hwaccel is not None:
+                # Encoder can be listed without a usable device
+                logger.warning(f"{hwaccel} encode failed, retrying with libx264")
+                self._write_burn_filter(filter_path, ass_path, None)
+                cmd = self._build_burn_cmd(
+                    video_path, output_path, filter_path, None, crf, preset, threads
+                )
+                result = subprocess.run(
+                    cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+                )
             
             if result.returncode != 0:
                 logger.error(f"FFmpeg error: {result.stderr}")
@@ -599,23 +812,120 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
             return output_path
             
         finally:
-            # Cleanup ASS file
-            if ass_path.exists():
-                ass_path.unlink()
+            # Cleanup ASS and filter script files
+            for path in (ass_path, filter_path):
+                if path.exists():
+                    path.unlink()
+    
+    def burn_many(self, jobs: List[BurnJob], max_workers: Optional[int] = None) -> List[Path]:
+        """
+        Burn captions for several clips concurrently
+        
+        Each FFmpeg process is limited to 2 threads and about half the CPUs
+        run in parallel; threads suffice since the work happens in FFmpeg.
+        
+        Args:
+            jobs: Render jobs
+            max_workers: Parallel FFmpeg processes (default: cpu_count // 2)
+            
+        Returns:
+            Output paths in job order
+        """
+        if not jobs:
+            return []
+        
+        if max_workers is None:
+            max_workers = max(1, (os.cpu_count() or 2) // 2)
+        
+        results: List[Optional[Path]] = [None] * len(jobs)
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(jobs))) as executor:
+            futures = {
+                executor.submit(
+                    self.burn_captions_to_video,
+                    video_path=job.video_path,
+                    output_path=job.output_path,
+                    words=job.words,
+                    theme_id=job.theme_id,
+                    style=job.style,
+                    words_per_line=job.words_per_line,
+                    time_offset=job.time_offset,
+                    threads=2,
+                ): i
+                for i, job in enumerate(jobs)
+            }
+            
+            for done, future in enumerate(as_completed(futures), 1):
+                results[futures[future]] = future.result()
+                logger.info(f"Burned captions {done}/{len(jobs)}")
+        
+        return results
+    
+    def _write_burn_filter(
+        self,
+        filter_path: Path,
+        ass_path: Path,
+        hwaccel: Optional[str]
+    ) -> None:
+        """Write the video filter script that renders the ASS file"""
+        # Filter-graph escaping still applies inside the script, but no shell quoting
+        filter_spec = f"ass='{str(ass_path).translate(_ASS_PATH_TRANS)}'"
+        if hwaccel == "vaapi":
+            filter_spec += ",format=nv12,hwupload"
+        filter_path.write_text(filter_spec, encoding="utf-8")
+    
+    def _build_burn_cmd(
+        self,
+        video_path: Path,
+        output_path: Path,
+        filter_path: Path,
+        hwaccel: Optional[str],
+        crf: int = 20,
+        preset: str = "veryfast",
+        threads: int = 0
+    ) -> List[str]:
+        """Build the FFmpeg command that burns an ASS file onto a video"""
+        if hwaccel == "vaapi":
+            return [
+                "ffmpeg", "-y",
+                "-loglevel", "error", "-nostats",
+                "-vaapi_device", _VAAPI_DEVICE,
+                "-i", str(video_path),
+                "-filter_script:v", str(filter_path),
+                "-c:v", "h264_vaapi",
+                "-qp", str(crf),
+                "-movflags", "+faststart",
+                "-c:a", "copy",
+                str(output_path)
+            ]
+        
+        cmd = [
+            "ffmpeg", "-y",
+            "-loglevel", "error", "-nostats",
+            "-i", str(video_path),
+            "-filter_script:v", str(filter_path),
+            "-threads", str(threads),
+        ]
+        if hwaccel == "nvenc":
+            cmd += ["-c:v", "h264_nvenc", "-preset", "p4", "-cq", str(crf), "-rc", "vbr"]
+        elif hwaccel == "qsv":
+            cmd += ["-c:v", "h264_qsv", "-global_quality", str(crf)]
+        elif hwaccel == "videotoolbox":
+            cmd += ["-c:v", "h264_videotoolbox", "-q:v", "65"]
+        else:
+            cmd += ["-c:v", "libx264", "-preset", preset, "-crf", str(crf)]
+        cmd += [
+            "-pix_fmt", "yuv420p",
+            "-movflags", "+faststart",
+            "-c:a", "copy",
+            str(output_path)
+        ]
+        return cmd
     
     def _get_video_dimensions(self, video_path: Path) -> tuple[int, int]:
         """Get video width and height using ffprobe"""
         try:
-            cmd = [
-                "ffprobe", "-v", "error",
-                "-select_streams", "v:0",
-                "-show_entries", "stream=width,height",
-                "-of", "csv=p=0:s=x",
-                str(video_path)
-            ]
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            width, height = map(int, result.stdout.strip().split("x"))
-            return width, height
+            st = os.stat(video_path)
+            return _probe_dims(str(video_path), st.st_mtime_ns, st.st_size)
         except Exception as e:
             logger.warning(f"Could not get video dimensions: {e}, using default 1080x1920")
             return 1080, 1920
@@ -647,22 +957,16 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
         Returns:
             Path to generated ASS file
         """
-        words = transcription.get("words", [])
+        words = transcription.get("_words_normalized")
+        if words is None:
+            words = transcription.get("words", [])
         
-        # Filter words by time range if specified
+        # Filter words by time range if specified (words are time-sorted)
         if start_time > 0 or end_time is not None:
-            filtered_words = []
-            for word in words:
-                word_start = word.get("start_time", 0)
-                word_end = word.get("end_time", 0)
-                
-                if end_time is not None and word_start >= end_time:
-                    break
-                if word_end <= start_time:
-                    continue
-                    
-                filtered_words.append(word)
-            words = filtered_words
+            starts, ends = self._get_word_time_index(transcription, words)
+            lo = bisect.bisect_right(ends, start_time)
+            hi = len(words) if end_time is None else bisect.bisect_left(starts, end_time, lo)
+            words = words[lo:hi]
         
         return self.generate_captions_ass(
             words=words,
@@ -675,6 +979,26 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
             time_offset=start_time,
         )
 
+    
+    def _get_word_time_index(
+        self,
+        transcription: Dict[str, Any],
+        words: List[Dict[str, Any]]
+    ) -> tuple[List[float], List[float]]:
+        """Word start/end lists, cached on the transcription for repeated clips"""
+        cached = transcription.get("_time_index")
+        if cached is not None and cached[0] is words and len(cached[1]) == len(words):
+            return cached[1], cached[2]
+        
+        if words and isinstance(words[0], _W):
+            starts = [w.start for w in words]
+            ends = [w.end for w in words]
+        else:
+            starts = [w.get("start_time", 0) for w in words]
+            ends = [w.get("end_time", 0) for w in words]
+        transcription["_time_index"] = (words, starts, ends)
+        return starts, ends
+
 
 # Singleton instance
 captions_service = CaptionsService()
@@ -2,81 +2,312 @@
 Clip Finding Service
 Finds optimal clips using sentence-based segmentation and heuristic virality scoring.
 """
+import asyncio
+import functools
+import heapq
 import logging
+import operator
+import os
+import shutil
+import tempfile
 import uuid
-from typing import List, Dict, Any
+from pathlib import Path
+from typing import List, Dict, Any, Tuple, Optional
 import numpy as np
 try:
-    from sentence_transformers import SentenceTransformer, util
+    import torch
+    from sentence_transformers import SentenceTransformer
     HAS_TRANSFORMERS = True
 except ImportError:
     HAS_TRANSFORMERS = False
 
+try:
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    import onnxruntime
+    from transformers import AutoTokenizer
+    HAS_OPTIMUM = True
+except ImportError:
+    HAS_OPTIMUM = False
+
+from ._scoring import (
+    HeuristicScorer,
+    remove_overlaps,
+    sentence_columns,
+    word_time_index,
+    words_between,
+)
+
 logger = logging.getLogger(__name__)
 
+_SEMANTIC_MODEL_ID = "sentence-transformers/all-MiniLM-L6-v2"
+# Exported once, then reused: int8 ONNX copy of the semantic model for CPU hosts
+_QUANTIZED_MODEL_DIR = Path(__file__).resolve().parents[2] / "model_cache" / "minilm-int8"
+_QUANTIZED_MODEL_FILE = "model_quantized.onnx"
+
+# The best-scored candidates are pruned for overlaps first; all of them only
+# when overlaps leave fewer than the ten clips returned
+_MAX_CLIPS = 10
+_OVERLAP_CANDIDATES = 50
+
+# Heuristic keywords for virality: (keyword, multiplier)
+_VIRAL_KEYWORDS: Tuple[Tuple[str, float], ...] = (
+    # English
+    ("amazing", 1.5), ("incredible", 1.5), ("wow", 2.0), ("secret", 1.8),
+    ("hack", 1.5), ("money", 1.2), ("viral", 1.5), ("crazy", 1.4),
+    ("best", 1.2), ("worst", 1.2), ("never", 1.2), ("always", 1.2),
+    ("life hack", 2.0), ("tutorial", 1.3), ("how to", 1.3),
+    ("omg", 2.0), ("lol", 1.5), ("funny", 1.2), ("scary", 1.3),
+    ("love", 1.2), ("hate", 1.2), ("stop", 1.3), ("wait", 1.4),
+    ("cool", 1.2),
+
+    # Portuguese
+    ("incrível", 1.5), ("uau", 2.0), ("segredo", 1.8),
+    ("dinheiro", 1.2), ("loucura", 1.4),
+    ("melhor", 1.2), ("pior", 1.2), ("nunca", 1.2), ("sempre", 1.2),
+    ("como fazer", 1.3),
+    ("nossa", 1.5), ("engraçado", 1.2), ("assustador", 1.3),
+    ("amor", 1.2), ("ódio", 1.2), ("pare", 1.3), ("espera", 1.4),
+    ("legal", 1.2), ("top", 1.3),
+)
+
+# Emotional words for sentiment analysis
+_POSITIVE_WORDS = frozenset({
+    "good", "great", "awesome", "excellent", "happy", "joy", "success", "win", "beautiful",
+    "bom", "ótimo", "maravilhoso", "excelente", "feliz", "alegria", "sucesso", "ganhar", "lindo",
+})
+_NEGATIVE_WORDS = frozenset({
+    "bad", "terrible", "awful", "sad", "fail", "loss", "ugly", "pain", "death", "danger",
+    "ruim", "terrível", "triste", "falha", "perda", "feio", "dor", "morte", "perigo",
+})
+
+# Keyword matcher and emotion masks, built once at import time
+_HEURISTIC_SCORER = HeuristicScorer(_VIRAL_KEYWORDS, _POSITIVE_WORDS, _NEGATIVE_WORDS)
+
+
+class _EncodeBatcher:
+    """
+    Micro-batches model.encode across concurrent callers.
+
+    Requests arriving within `window` seconds of each other are encoded in one
+    call (run in the default executor) and each caller gets its own rows back.
+    """
+
+    def __init__(
+        self,
+        model,
+        window: float = 0.01,
+        batch_size: int = 256,
+        convert_to_tensor: bool = True,
+    ):
+        self.model = model
+        self.window = window
+        self.batch_size = batch_size
+        self.convert_to_tensor = convert_to_tensor
+        self._pending: List[Tuple[List[str], asyncio.Future]] = []
+        self._drain_task = None
+
+    async def encode(self, texts: List[str]) -> "torch.Tensor":
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((texts, future))
+        if self._drain_task is None or self._drain_task.done():
+            self._drain_task = loop.create_task(self._drain())
+        return await future
+
+    async def _drain(self):
+        loop = asyncio.get_running_loop()
+        # Keep draining until no caller is left waiting, including ones that
+        # queued while the previous batch was encoding
+        while self._pending:
+            await asyncio.sleep(self.window)
+            pending, self._pending = self._pending, []
+            texts = [text for batch, _ in pending for text in batch]
+            try:
+                embeddings = await loop.run_in_executor(
+                    None,
+                    functools.partial(
+                        self.model.encode,
+                        texts,
+                        convert_to_tensor=self.convert_to_tensor,
+                        normalize_embeddings=True,
+                        batch_size=self.batch_size,
+                    ),
+                )
+            except Exception as e:
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            offset = 0
+            for batch, future in pending:
+                if not future.done():
+                    future.set_result(embeddings[offset:offset + len(batch)])
+                offset += len(batch)
+
+
+def export_quantized_model(model_dir: Path = _QUANTIZED_MODEL_DIR) -> bool:
+    """
+    Export the int8 ONNX semantic model, once (run at install/image build time)
+
+    The export is written to a temp dir next to model_dir and renamed into
+    place, so concurrent workers never load a half-written model. Returns
+    False when optimum is not installed.
+    """
+    if not HAS_OPTIMUM:
+        return False
+    if (model_dir / _QUANTIZED_MODEL_FILE).exists():
+        return True
+
+    model_dir.parent.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(prefix=f".{model_dir.name}-", dir=model_dir.parent))
+    try:
+        logger.info(f"Exporting int8 ONNX semantic model to {model_dir}...")
+        model = ORTModelForFeatureExtraction.from_pretrained(_SEMANTIC_MODEL_ID, export=True)
+        quantizer = ORTQuantizer.from_pretrained(model)
+        qconfig = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+        quantizer.quantize(save_dir=tmp_dir, quantization_config=qconfig)
+        AutoTokenizer.from_pretrained(_SEMANTIC_MODEL_ID).save_pretrained(tmp_dir)
+
+        try:
+            os.replace(tmp_dir, model_dir)
+        except OSError:
+            # Another process got there first, or a partial export was left behind
+            if not (model_dir / _QUANTIZED_MODEL_FILE).exists():
+                shutil.rmtree(model_dir, ignore_errors=True)
+                os.replace(tmp_dir, model_dir)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return True
+
+
+class _QuantizedEncoder:
+    """
+    Dynamic-int8 ONNX export of all-MiniLM-L6-v2 for CPU inference.
+
+    Exposes the subset of SentenceTransformer.encode used here (mean pooling
+    over the attention mask, optional L2 normalization), returning tensors.
+    """
+
+    max_seq_length = 256
+
+    def __init__(self, model_dir: Path):
+        if not (model_dir / _QUANTIZED_MODEL_FILE).exists():
+            # Normally done at build time; this only covers installs that skipped it
+            export_quantized_model(model_dir)
+
+        sess_options = onnxruntime.SessionOptions()
+        sess_options.intra_op_num_threads = os.cpu_count() or 1
+        self.model = ORTModelForFeatureExtraction.from_pretrained(
+            model_dir, file_name=_QUANTIZED_MODEL_FILE, session_options=sess_options
+        )
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.device = torch.device("cpu")
+
+    def encode(
+        self,
+        sentences: List[str],
+        batch_size: int = 64,
+        convert_to_tensor: bool = True,
+        normalize_embeddings: bool = False,
+        **kwargs,
+    ):
+        batches = []
+        with torch.inference_mode():
+            for start in range(0, len(sentences), batch_size):
+                inputs = self.tokenizer(
+                    sentences[start:start + batch_size],
+                    padding=True,
+                    truncation=True,
+                    max_length=self.max_seq_length,
+                    return_tensors="pt",
+                )
+                hidden = self.model(**inputs).last_hidden_state
+                mask = inputs["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+                batches.append((hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9))
+
+        embeddings = torch.cat(batches) if batches else torch.zeros((0, 384))
+        if normalize_embeddings:
+            embeddings = torch.nn.functional.normalize(embeddings, dim=1)
+        return embeddings if convert_to_tensor else embeddings.numpy()
+
+
 class ClipFinderService:
     """Service for finding clips in transcribed content"""
     
     def __init__(self):
-        # Heuristic keywords for virality
-        self.viral_keywords = {
-            # English
-            "amazing": 1.5, "incredible": 1.5, "wow": 2.0, "secret": 1.8,
-            "hack": 1.5, "money": 1.2, "viral": 1.5, "crazy": 1.4,
-            "best": 1.2, "worst": 1.2, "never": 1.2, "always": 1.2,
-            "life hack": 2.0, "tutorial": 1.3, "how to": 1.3,
-            "omg": 2.0, "lol": 1.5, "funny": 1.2, "scary": 1.3,
-            "love": 1.2, "hate": 1.2, "stop": 1.3, "wait": 1.4,
-            "cool": 1.2,
-            
-            # Portuguese
-            "incrível": 1.5, "uau": 2.0, "segredo": 1.8,
-            "hack": 1.5, "dinheiro": 1.2, "viral": 1.5, "loucura": 1.4,
-            "melhor": 1.2, "pior": 1.2, "nunca": 1.2, "sempre": 1.2,
-            "tutorial": 1.3, "como fazer": 1.3,
-            "nossa": 1.5, "engraçado": 1.2, "assustador": 1.3,
-            "amor": 1.2, "ódio": 1.2, "pare": 1.3, "espera": 1.4,
-            "legal": 1.2, "top": 1.3
-        }
-        
-        # Emotional words for sentiment analysis
-        self.positive_words = {
-            "good", "great", "awesome", "excellent", "happy", "joy", "success", "win", "beautiful",
-            "bom", "ótimo", "maravilhoso", "excelente", "feliz", "alegria", "sucesso", "ganhar", "lindo"
-        }
-        self.negative_words = {
-            "bad", "terrible", "awful", "sad", "fail", "loss", "ugly", "pain", "death", "danger",
-            "ruim", "terrível", "triste", "falha", "perda", "feio", "dor", "morte", "perigo"
-        }
-
-        # Semantic Search Initialization
-        self.model = None
-        self.viral_embeddings = None
+        # Features of the last sentence list scored (reused across repeated calls)
+        self._features_cache = None
+        # Coalesces sentence encoding across concurrent find_clips_async calls
+        self._encode_batcher = None
+
+        # Semantic search: the model and concept embeddings load on first use
         self.use_semantic = HAS_TRANSFORMERS
-        
-        if self.use_semantic:
-            try:
-                logger.info("Loading SentenceTransformer model...")
-                self.model = SentenceTransformer('all-MiniLM-L6-v2')
-                
-                # Define viral concepts for semantic matching
-                self.viral_concepts = [
-                    "This is amazing and incredible",
-                    "A secret life hack that changes everything",
-                    "Shocking truth revealed",
-                    "Hilarious funny moment",
-                    "Deep emotional story",
-                    "Motivational success advice",
-                    "Unexpected plot twist",
-                    "Very dangerous situation",
-                    "Unbelievable fact",
-                    "How to make money fast"
-                ]
-                self.viral_embeddings = self.model.encode(self.viral_concepts, convert_to_tensor=True)
-                logger.info("SentenceTransformer model loaded.")
-            except Exception as e:
-                logger.error(f"Failed to load SentenceTransformer: {e}")
-                self.use_semantic = False
+        self.device = "cpu"
+
+        # Define viral concepts for semantic matching
+        self.viral_concepts = [
+            "This is amazing and incredible",
+            "A secret life hack that changes everything",
+            "Shocking truth revealed",
+            "Hilarious funny moment",
+            "Deep emotional story",
+            "Motivational success advice",
+            "Unexpected plot twist",
+            "Very dangerous situation",
+            "Unbelievable fact",
+            "How to make money fast"
+        ]
+
+    @functools.cached_property
+    def model(self):
+        """Sentence encoder, loaded on first access (None when unavailable)"""
+        if not self.use_semantic:
+            return None
+        try:
+            self.device = "cuda" if torch.cuda.is_available() else "cpu"
+            if self.device == "cpu" and HAS_OPTIMUM:
+                # int8 ONNX runs the encoder several times faster on CPU
+                try:
+                    logger.info("Loading quantized ONNX semantic model...")
+                    model = _QuantizedEncoder(_QUANTIZED_MODEL_DIR)
+                    logger.info("Quantized semantic model loaded.")
+                    return model
+                except Exception as e:
+                    logger.warning(f"Quantized model unavailable, using SentenceTransformer: {e}")
+
+            logger.info("Loading SentenceTransformer model...")
+            model = SentenceTransformer('all-MiniLM-L6-v2', device=self.device)
+            if self.device == "cuda":
+                # fp16 halves memory traffic for encoding and the concept matmul
+                model.half()
+            logger.info("SentenceTransformer model loaded.")
+            return model
+        except Exception as e:
+            logger.error(f"Failed to load SentenceTransformer: {e}")
+            self.use_semantic = False
+            return None
+
+    @functools.cached_property
+    def viral_embeddings(self):
+        """Unit-length concept embeddings (fp16 on CUDA, NumPy on CPU), so similarity is a plain matmul"""
+        return self._encode_viral_concepts()
+
+    def _encode_viral_concepts(self):
+        model = self.model
+        if model is None:
+            return None
+        try:
+            return model.encode(
+                self.viral_concepts,
+                convert_to_tensor=self.device != "cpu",
+                normalize_embeddings=True,
+            )
+        except Exception as e:
+            logger.error(f"Failed to encode viral concepts: {e}")
+            self.use_semantic = False
+            return None
 
     @property
     def is_available(self) -> bool:
@@ -87,11 +318,14 @@ class ClipFinderService:
         transcription_obj: Dict[str, Any],
         min_duration: float = 30.0,
         max_duration: float = 60.0,
+        sentence_embeddings: Optional["torch.Tensor"] = None,
     ) -> List[dict]:
         """
         Find clips from a transcription dictionary.
         Uses a sliding window over sentences to find segments that fit duration constraints
         and maximize 'virality' score (Heuristic + Semantic).
+        Normalized sentence embeddings may be passed in when already encoded
+        (see find_clips_async); otherwise they are encoded here.
         """
         logger.info("Finding clips using Hybrid (Heuristic + Semantic) engine...")
         
@@ -100,72 +334,60 @@ class ClipFinderService:
             logger.warning("No sentences found in transcription. Returning empty list.")
             return []
             
-        # Pre-calculate semantic scores for all sentences if model is available
-        sentence_semantic_scores = []
-        if self.use_semantic and self.model:
-            try:
-                sentence_texts = [s["text"] for s in sentences]
-                embeddings = self.model.encode(sentence_texts, convert_to_tensor=True)
-                # Calculate max similarity to any viral concept for each sentence
-                cosine_scores = util.cos_sim(embeddings, self.viral_embeddings)
-                # cosine_scores shape: [num_sentences, num_viral_concepts]
-                # We take the max score for each sentence across all viral concepts
-                max_scores = cosine_scores.max(dim=1).values.cpu().numpy()
-                sentence_semantic_scores = max_scores.tolist()
-            except Exception as e:
-                logger.error(f"Error calculating semantic scores: {e}")
-                sentence_semantic_scores = [0.0] * len(sentences)
-        else:
-             sentence_semantic_scores = [0.0] * len(sentences)
+        # Semantic score prefix sums, so each window mean is two lookups
+        semantic_cum = self._semantic_prefix_sums(sentences, sentence_embeddings)
+
+        # Heuristic features per sentence, shared by all overlapping windows
+        features = self._get_sentence_features(sentences)
+
+        # Word timestamps, so each clip's words are sliced by binary search
+        words = transcription_obj.get("words", [])
+        word_index = word_time_index(words)
 
         clips = []
         
-        # Sliding window approach
+        # Sentence fields as parallel columns, so the window loop indexes
+        # flat lists instead of looking keys up in each sentence dict
+        texts, starts, ends, start_chars, end_chars = sentence_columns(sentences)
+
+        # Sliding window approach: end_time is monotonic, so the end cursor
+        # only moves forward as the window start advances
+        n = len(sentences)
+        hi = 0
+        prev_start = float("-inf")
         i = 0
-        while i < len(sentences):
-            current_duration = 0.0
-            start_time = sentences[i]["start_time"]
-            start_char = sentences[i].get("start_char", 0)
+        while i < n:
+            start_time = starts[i]
             
-            # Look ahead to build a clip
-            j = i
-            best_clip_end_idx = -1
+            # First sentence past max_duration from this start
+            if start_time < prev_start:
+                hi = i
+            hi = max(hi, i)
+            while hi < n and ends[hi] - start_time <= max_duration:
+                hi += 1
+            prev_start = start_time
             
-            while j < len(sentences):
-                sent = sentences[j]
-                current_duration = sent["end_time"] - start_time
-                
-                if current_duration < min_duration:
-                    j += 1
-                    continue
-                
-                if current_duration > max_duration:
-                    break
-                
-                # Valid duration window
-                best_clip_end_idx = j
-                j += 1
+            # Longest window within max_duration, if it reaches min_duration
+            best_clip_end_idx = -1
+            if hi > i and ends[hi - 1] - start_time >= min_duration:
+                best_clip_end_idx = hi - 1
             
             if best_clip_end_idx != -1:
                 # Construct clip
-                end_sentence = sentences[best_clip_end_idx]
-                end_time = end_sentence["end_time"]
+                end_time = ends[best_clip_end_idx]
                 duration = end_time - start_time
                 
-                # Extract text
-                clip_sentences = sentences[i : best_clip_end_idx + 1]
-                transcript = " ".join([s["text"] for s in clip_sentences])
-                
                 # Semantic Score: Average of max semantic scores of sentences in clip
                 # (Or maybe max? Average seems safer for consistency)
                 if self.use_semantic:
-                    segment_scores = sentence_semantic_scores[i : best_clip_end_idx + 1]
-                    semantic_score = float(np.mean(segment_scores)) * 100.0 # Scale 0-1 to 0-100
+                    end = best_clip_end_idx + 1
+                    segment_mean = float(semantic_cum[end] - semantic_cum[i]) / (end - i)
+                    semantic_score = segment_mean * 100.0 # Scale 0-1 to 0-100
                 else:
                     semantic_score = 0.0
 
                 # Calculate Heuristic Score
-                heuristic_score = self._calculate_heuristic_score(transcript, duration)
+                heuristic_score = self._score_window(features, i, best_clip_end_idx + 1, duration)
                 
                 # Weighted Total Score
                 # 60% Semantic (Real AI), 40% Heuristic
@@ -175,20 +397,18 @@ class ClipFinderService:
                     total_score = heuristic_score
                 
                 clips.append({
-                    "id": str(uuid.uuid4()),
+                    "id": None,  # Assigned to returned clips only
                     "start_time": start_time,
                     "end_time": end_time,
                     "duration": duration,
-                    "start_char": start_char,
-                    "end_char": end_sentence.get("end_char", 0),
-                    "transcript": transcript,
+                    "start_char": start_chars[i],
+                    "end_char": end_chars[best_clip_end_idx],
+                    "transcript": None,  # Filled in for returned clips only
                     "score": min(99.9, total_score),
                     "semantic_score": semantic_score if self.use_semantic else 0,
                     "heuristic_score": heuristic_score,
-                    "words": [
-                        word for word in (transcription_obj.get("words", []))
-                        if word["start_time"] >= start_time and word["end_time"] <= end_time
-                    ]
+                    "words": None,
+                    "_span": (i, best_clip_end_idx + 1),
                 })
                 
                 # Move window
@@ -197,87 +417,117 @@ class ClipFinderService:
             else:
                 i += 1
         
-        # Sort by score descending
-        clips.sort(key=lambda x: x["score"], reverse=True)
+        # Keep the best candidates, sorted by score descending
+        candidates = heapq.nlargest(_OVERLAP_CANDIDATES, clips, key=operator.itemgetter("score"))
+        
+        final_clips = self._remove_overlaps(candidates)[:_MAX_CLIPS]
+        if len(final_clips) < _MAX_CLIPS and len(clips) > len(candidates):
+            # High scores clustered in overlapping windows: prune every candidate in score order
+            final_clips = self._remove_overlaps(
+                sorted(clips, key=operator.itemgetter("score"), reverse=True)
+            )[:_MAX_CLIPS]
         
-        final_clips = self._remove_overlaps(clips)
+        # Ids, transcripts and words only for the clips that are returned
+        for clip in final_clips:
+            clip["id"] = str(uuid.uuid4())
+            start, end = clip.pop("_span")
+            clip["transcript"] = " ".join(texts[start:end])
+            clip["words"] = words_between(words, word_index, clip["start_time"], clip["end_time"])
         
         logger.info(f"Found {len(final_clips)} clips.")
-        return final_clips[:10]
+        return final_clips
+
+    async def find_clips_async(
+        self,
+        transcription_obj: Dict[str, Any],
+        min_duration: float = 30.0,
+        max_duration: float = 60.0,
+    ) -> List[dict]:
+        """
+        Async find_clips for request handlers.
+        Sentence encoding is coalesced with other in-flight calls into one
+        model.encode, and the scoring runs off the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        sentence_embeddings = None
+        sentences = transcription_obj.get("sentences", [])
+        if sentences and self.use_semantic:
+            try:
+                if self._encode_batcher is None:
+                    # The first access loads the model, so keep it off the event loop
+                    model = await loop.run_in_executor(None, operator.attrgetter("model"), self)
+                    if model is None:
+                        raise RuntimeError("SentenceTransformer unavailable")
+                    self._encode_batcher = _EncodeBatcher(model, convert_to_tensor=self.device != "cpu")
+                sentence_embeddings = await self._encode_batcher.encode([s["text"] for s in sentences])
+            except Exception as e:
+                logger.error(f"Batched encoding failed, encoding per call: {e}")
+
+        return await loop.run_in_executor(
+            None,
+            functools.partial(
+                self.find_clips, transcription_obj, min_duration, max_duration, sentence_embeddings
+            ),
+        )
+
+    def _semantic_prefix_sums(
+        self,
+        sentences: List[Dict[str, Any]],
+        embeddings: Optional["torch.Tensor"] = None,
+    ) -> np.ndarray:
+        """
+        Cumulative per-sentence semantic scores, with a leading zero
+
+        A sentence scores its max cosine similarity to any viral concept.
+        On GPU, encoding, similarity and the cumulative sum stay on the
+        device and only the final N+1 sums are copied back. On CPU the
+        embeddings come back as NumPy arrays and the matmul goes to BLAS,
+        skipping the tensor round-trip.
+        """
+        if self.use_semantic and self.model:
+            try:
+                if embeddings is None:
+                    embeddings = self.model.encode(
+                        [s["text"] for s in sentences],
+                        convert_to_tensor=self.device != "cpu",
+                        normalize_embeddings=True,
+                        batch_size=64,
+                    )
+                similarity = embeddings @ self.viral_embeddings.T
+                if isinstance(similarity, np.ndarray):
+                    max_scores = similarity.max(axis=1).astype(np.float64)
+                    return np.concatenate(([0.0], np.cumsum(max_scores)))
+
+                max_scores = similarity.max(dim=1).values.float()
+                cum = torch.cat([max_scores.new_zeros(1), max_scores.cumsum(0)])
+                return cum.cpu().numpy().astype(np.float64)
+            except Exception as e:
+                logger.error(f"Error calculating semantic scores: {e}")
+
+        return np.zeros(len(sentences) + 1)
+
+    def _get_sentence_features(self, sentences: List[Dict[str, Any]]):
+        """Per-sentence features, cached for the most recent sentence list"""
+        cached = self._features_cache
+        if cached is not None and cached[0] is sentences and cached[1] == len(sentences):
+            return cached[2]
+
+        features = _HEURISTIC_SCORER.sentence_features([s["text"] for s in sentences])
+        self._features_cache = (sentences, len(sentences), features)
+        return features
+
+    def _score_window(self, features, start: int, end: int, duration: float) -> float:
+        """Heuristic score of sentences[start:end] from precomputed features"""
+        return _HEURISTIC_SCORER.score_window(features, start, end, duration)
 
     def _calculate_heuristic_score(self, text: str, duration: float) -> float:
         """Calculate virality score (0-100)"""
-        base_score = 70.0
-        text_lower = text.lower()
-        
-        # Keyword bonus
-        keyword_score = 0.0
-        for word, multiplier in self.viral_keywords.items():
-            if word in text_lower:
-                keyword_score += 5.0 * multiplier
-        
-        # Cap keyword score
-        keyword_score = min(25.0, keyword_score)
-        
-        # Pace bonus (words per second) - faster is usually more energetic
-        word_count = len(text.split())
-        wps = word_count / duration if duration > 0 else 0
-        pace_score = 0.0
-        if wps > 2.5: # Fast talker
-            pace_score = 5.0
-            
-        # Sentiment/Emotion Bonus (Robust Heuristic)
-        sentiment_score = 0.0
-        
-        # 1. Check for emotional words
-        words = set(text_lower.split())
-        pos_hits = len(words.intersection(self.positive_words))
-        neg_hits = len(words.intersection(self.negative_words))
-        
-        if pos_hits > 0 or neg_hits > 0:
-            # Emotion is good for virality, whether positive or negative
-            sentiment_score += min(5.0, (pos_hits + neg_hits) * 2.0)
-            
-        # 2. Check for intensity (CAPS and Exclamations)
-        # Count exclamation marks
-        exc_count = text.count("!")
-        if exc_count > 0:
-            sentiment_score += min(3.0, exc_count * 1.0)
-            
-        # Count uppercase words (longer than 2 chars to avoid 'I', 'A')
-        caps_words = [w for w in text.split() if w.isupper() and len(w) > 2]
-        if len(caps_words) > 0:
-             sentiment_score += min(3.0, len(caps_words) * 1.0)
-        
-        total_score = base_score + keyword_score + pace_score + sentiment_score
-        return min(99.9, total_score)
+        return _HEURISTIC_SCORER.calculate_heuristic_score(text, duration)
 
     def _remove_overlaps(self, clips: List[dict]) -> List[dict]:
         """Remove clips that overlap significantly, keeping higher scored ones"""
-        if not clips:
-            return []
-            
-        kept_clips = []
         # Clips are already sorted by score desc
-        
-        for clip in clips:
-            is_overlap = False
-            for kept in kept_clips:
-                # Check intersection
-                start = max(clip["start_time"], kept["start_time"])
-                end = min(clip["end_time"], kept["end_time"])
-                overlap = max(0, end - start)
-                
-                # If overlap is > 30% of the smaller clip's duration, reject it
-                min_dur = min(clip["duration"], kept["duration"])
-                if overlap > (0.3 * min_dur):
-                    is_overlap = True
-                    break
-            
-            if not is_overlap:
-                kept_clips.append(clip)
-                
-        return kept_clips
+        return remove_overlaps(clips)
 
 # Singleton instance
 clip_finder_service = ClipFinderService()
@@ -2,14 +2,194 @@
 LLM Description Generator Service
 Generates social media descriptions for clips using Gemini, OpenAI or Anthropic
 """
+import asyncio
+import functools
+import hashlib
 import logging
-from typing import Optional, List
+import random
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, List, Dict
 import os
 import json
 import re
+import time
+
+try:
+    import diskcache
+    HAS_DISKCACHE = True
+except ImportError:
+    HAS_DISKCACHE = False
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
 
 logger = logging.getLogger(__name__)
 
+# Provider batch jobs finish within 24h; poll with exponential backoff up to this interval
+_BATCH_POLL_INITIAL = 5.0
+_BATCH_POLL_MAX = 300.0
+_OPENAI_BATCH_DONE = frozenset({"completed", "failed", "expired", "cancelled"})
+
+# Provider calls are retried on rate limits and transient server errors
+_RETRY_STATUS = frozenset({408, 429, 500, 502, 503, 504, 529})
+_RETRY_ERRORS = frozenset({"APIConnectionError", "APITimeoutError", "DeadlineExceeded", "ServiceUnavailable"})
+_RETRY_AFTER_MAX = 60.0
+
+_GEMINI_MODEL = "gemini-2.0-flash"
+_OPENAI_MODEL = "gpt-4o-mini"
+_ANTHROPIC_MODEL = "claude-3-haiku-20240307"
+
+# Generated descriptions are cached per (provider, params, transcript hash):
+# in memory (LRU) and, when diskcache is installed, on disk for a week
+_CACHE_DIR = Path.home() / ".cache" / "clipai" / "descriptions"
+_CACHE_TTL = 7 * 86400
+_MEMORY_CACHE_SIZE = 1024
+
+
+# LLM response cleanup: optional markdown code fence, then the outermost JSON object
+_CODE_FENCE_START = re.compile(r'^```(?:json)?\n?')
+_CODE_FENCE_END = re.compile(r'\n?```$')
+_JSON_OBJ = re.compile(r'\{.*\}', re.DOTALL)
+
+# Static instructions, sent as the system message so every request starts with
+# the same bytes (what provider prompt caching matches on); only the
+# per-clip parameters and transcript go in the user message
+_SYSTEM_PROMPT = """You are a social media expert. Based on the video transcript you are given, generate a social media description.
+
+Respond ONLY with valid JSON in this exact format (no markdown, no code blocks):
+{"description": "your description here", "hashtags": ["hashtag1", "hashtag2", "hashtag3"]}"""
+
+# Several clips described in one request: the same instructions, answered as
+# one JSON array (providers whose replies can be constrained to JSON only)
+_MULTI_SYSTEM_PROMPT = """You are a social media expert. You are given several numbered video transcripts; for each one, generate a social media description.
+
+Respond ONLY with valid JSON in this exact format (no markdown, no code blocks), with one entry per transcript, in order:
+{"results": [{"description": "your description here", "hashtags": ["hashtag1", "hashtag2", "hashtag3"]}]}"""
+_MULTIPLEX_PROVIDERS = frozenset({"Gemini", "OpenAI"})
+_MULTIPLEX_SIZE = 8
+
+# Description template and hashtags per language when no LLM is available
+_FALLBACK_TEMPLATES = {
+    "pt": ("Confira este momento incrivel! {}...", ("viral", "brasil", "fyp", "trending")),
+    "en": ("Check out this amazing moment! {}...", ("viral", "fyp", "trending", "mustwatch")),
+}
+
+_STYLE_INSTRUCTIONS = {
+    "social_media": "engaging, with emojis and a hook. Make it viral-worthy.",
+    "professional": "professional and informative. Focus on value and insights.",
+    "casual": "friendly and conversational. Keep it light and relatable.",
+}
+
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers catch either
+_json_loads = orjson.loads if HAS_ORJSON else json.loads
+
+
+def _json_dumps_bytes(obj) -> bytes:
+    """Serialize to compact UTF-8 JSON"""
+    if HAS_ORJSON:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _retry_delay(error: Exception, attempt: int, base: float) -> Optional[float]:
+    """Seconds to wait before retrying a failed provider call, or None if it shouldn't be retried"""
+    # openai/anthropic expose status_code, google.api_core exceptions code
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    if status not in _RETRY_STATUS and type(error).__name__ not in _RETRY_ERRORS:
+        return None
+
+    response = getattr(error, "response", None)
+    retry_after = getattr(response, "headers", {}).get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), _RETRY_AFTER_MAX)
+        except ValueError:
+            pass  # HTTP-date form
+    return base * 2 ** attempt + random.random()
+
+
+def _with_retries(max_tries: int = 4, base: float = 0.5):
+    """Retry a (sync or async) provider call with exponential backoff and jitter"""
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                for attempt in range(max_tries):
+                    try:
+                        return await func(*args, **kwargs)
+                    except Exception as e:
+                        delay = _retry_delay(e, attempt, base)
+                        if delay is None or attempt == max_tries - 1:
+                            raise
+                        logger.warning(f"{func.__name__} failed ({e}), retrying in {delay:.1f}s")
+                        await asyncio.sleep(delay)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            for attempt in range(max_tries):
+                try:
+                    return func(*args, **kwargs)
+                except Exception as e:
+                    delay = _retry_delay(e, attempt, base)
+                    if delay is None or attempt == max_tries - 1:
+                        raise
+                    logger.warning(f"{func.__name__} failed ({e}), retrying in {delay:.1f}s")
+                    time.sleep(delay)
+        return wrapper
+    return decorator
+
+
+def _parse_json_response(text: str, fallback_length: Optional[int] = None) -> dict:
+    """Parse a description/hashtags JSON reply, tolerating code fences and extra text"""
+    # Clean up response (remove markdown code blocks if present)
+    if text.startswith("```"):
+        text = _CODE_FENCE_END.sub("", _CODE_FENCE_START.sub("", text))
+
+    try:
+        result = _json_loads(text)
+    except json.JSONDecodeError:
+        # Try to find JSON in the response
+        match = _JSON_OBJ.search(text)
+        if match:
+            result = _json_loads(match.group())
+        else:
+            result = {"description": text[:fallback_length], "hashtags": []}
+
+    return {
+        "description": result.get("description", ""),
+        "hashtags": result.get("hashtags", []),
+    }
+
+
+def _parse_multi_response(text: str, count: int) -> Optional[List[Optional[dict]]]:
+    """
+    Parse a multiplexed reply into one description dict per clip
+
+    Returns None unless the reply holds exactly count entries; entries
+    without a description are None.
+    """
+    if text.startswith("```"):
+        text = _CODE_FENCE_END.sub("", _CODE_FENCE_START.sub("", text))
+    try:
+        data = _json_loads(text)
+    except json.JSONDecodeError:
+        return None
+
+    entries = data.get("results") if isinstance(data, dict) else data
+    if not isinstance(entries, list) or len(entries) != count:
+        return None
+    return [
+        {"description": entry["description"], "hashtags": entry.get("hashtags", [])}
+        if isinstance(entry, dict) and entry.get("description") else None
+        for entry in entries
+    ]
+
 
 class DescriptionGeneratorService:
     """Service for generating video descriptions using LLMs"""
@@ -24,8 +204,33 @@ class DescriptionGeneratorService:
         self.openai_api_key = openai_api_key or os.getenv("OPENAI_API_KEY")
         self.anthropic_api_key = anthropic_api_key or os.getenv("ANTHROPIC_API_KEY")
         self._gemini_model = None
+        self._gemini_multi_model = None
         self._openai_client = None
         self._anthropic_client = None
+        self._async_openai_client = None
+        self._async_anthropic_client = None
+        self._memory_cache: "OrderedDict[str, dict]" = OrderedDict()
+        self._disk_cache = None
+        self._providers = self._select_providers()
+        # Primary provider (None = fallback only); names the cache entries
+        self._provider = self._providers[0] if self._providers else None
+    
+    def _select_providers(self):
+        """
+        Resolve the providers once: Gemini -> OpenAI -> Anthropic, by configured key
+
+        Returns (name, model, generate, agenerate) tuples in priority order;
+        later ones are tried when earlier ones fail. Only the keys are checked
+        here; the SDKs are still imported on first use.
+        """
+        providers = []
+        if self.google_api_key:
+            providers.append(("Gemini", _GEMINI_MODEL, self._generate_with_gemini, self._agenerate_with_gemini))
+        if self.openai_api_key:
+            providers.append(("OpenAI", _OPENAI_MODEL, self._generate_with_openai, self._agenerate_with_openai))
+        if self.anthropic_api_key:
+            providers.append(("Anthropic", _ANTHROPIC_MODEL, self._generate_with_anthropic, self._agenerate_with_anthropic))
+        return tuple(providers)
     
     @property
     def gemini_model(self):
@@ -33,9 +238,20 @@ class DescriptionGeneratorService:
         if self._gemini_model is None and self.google_api_key:
             import google.generativeai as genai
             genai.configure(api_key=self.google_api_key)
-            self._gemini_model = genai.GenerativeModel('gemini-2.0-flash')
+            self._gemini_model = genai.GenerativeModel(_GEMINI_MODEL, system_instruction=_SYSTEM_PROMPT)
         return self._gemini_model
     
+    @property
+    def gemini_multi_model(self):
+        """Lazy load the Gemini model used for multi-clip requests"""
+        if self._gemini_multi_model is None and self.google_api_key:
+            import google.generativeai as genai
+            genai.configure(api_key=self.google_api_key)
+            self._gemini_multi_model = genai.GenerativeModel(
+                _GEMINI_MODEL, system_instruction=_MULTI_SYSTEM_PROMPT
+            )
+        return self._gemini_multi_model
+    
     @property
     def openai_client(self):
         if self._openai_client is None and self.openai_api_key:
@@ -50,6 +266,20 @@ class DescriptionGeneratorService:
             self._anthropic_client = Anthropic(api_key=self.anthropic_api_key)
         return self._anthropic_client
     
+    @property
+    def async_openai_client(self):
+        if self._async_openai_client is None and self.openai_api_key:
+            from openai import AsyncOpenAI
+            self._async_openai_client = AsyncOpenAI(api_key=self.openai_api_key)
+        return self._async_openai_client
+    
+    @property
+    def async_anthropic_client(self):
+        if self._async_anthropic_client is None and self.anthropic_api_key:
+            from anthropic import AsyncAnthropic
+            self._async_anthropic_client = AsyncAnthropic(api_key=self.anthropic_api_key)
+        return self._async_anthropic_client
+    
     def generate_description(
         self,
         transcript: str,
@@ -71,130 +301,477 @@ class DescriptionGeneratorService:
         Returns:
             dict with description and hashtags
         """
+        prompt = self._build_prompt(transcript, language, style, max_length, include_hashtags)
+        cache_key = self._cache_key(transcript, language, style, max_length, include_hashtags)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+
+        if not self._providers:
+            logger.warning("No LLM API key configured, using fallback")
+            return self._generate_fallback(transcript, language)
+
+        for name, _, generate, _ in self._providers:
+            try:
+                logger.info(f"Using {name} for description generation")
+                result = generate(prompt)
+                break
+            except Exception as e:
+                logger.error(f"Error generating description with {name}: {e}")
+        else:
+            return self._generate_fallback(transcript, language)
+
+        self._cache_set(cache_key, result)
+        return result
+    
+    def _cache_key(
+        self,
+        transcript: str,
+        language: str,
+        style: str,
+        max_length: int,
+        include_hashtags: bool,
+    ) -> Optional[str]:
+        """Cache key for a description request, or None when no provider is configured"""
+        if self._provider is None:
+            return None
+        name, model = self._provider[:2]
+        provider = f"{name.lower()}:{model}"
+
+        digest = hashlib.sha256(transcript[:2000].encode("utf-8")).hexdigest()
+        return f"{provider}|{language}|{style}|{max_length}|{include_hashtags}|{digest}"
+    
+    @property
+    def disk_cache(self):
+        """Lazy open the on-disk description cache (None without diskcache)"""
+        if self._disk_cache is None and HAS_DISKCACHE:
+            try:
+                self._disk_cache = diskcache.Cache(str(_CACHE_DIR))
+            except Exception as e:
+                logger.warning(f"Description disk cache unavailable: {e}")
+        return self._disk_cache
+    
+    def _cache_get(self, key: Optional[str]) -> Optional[dict]:
+        if key is None:
+            return None
+
+        result = self._memory_cache.get(key)
+        if result is not None:
+            self._memory_cache.move_to_end(key)
+        elif self.disk_cache is not None:
+            result = self.disk_cache.get(key)
+            if result is not None:
+                self._memory_put(key, result)
+
+        if result is None:
+            return None
+        logger.info("Using cached description")
+        return {"description": result["description"], "hashtags": list(result["hashtags"])}
+    
+    def _cache_set(self, key: Optional[str], result: dict):
+        if key is None:
+            return
+        # Store a copy so callers can't mutate the cached entry
+        result = {"description": result["description"], "hashtags": list(result["hashtags"])}
+        self._memory_put(key, result)
+        if self.disk_cache is not None:
+            try:
+                self.disk_cache.set(key, result, expire=_CACHE_TTL)
+            except Exception as e:
+                logger.warning(f"Failed to cache description: {e}")
+    
+    def _memory_put(self, key: str, result: dict):
+        self._memory_cache[key] = result
+        self._memory_cache.move_to_end(key)
+        if len(self._memory_cache) > _MEMORY_CACHE_SIZE:
+            self._memory_cache.popitem(last=False)
+    
+    def _build_prompt(
+        self,
+        transcript: str,
+        language: str,
+        style: str,
+        max_length: int,
+        include_hashtags: bool,
+    ) -> str:
+        """Build the per-clip user prompt shared by every provider (instructions are in _SYSTEM_PROMPT)"""
         language_name = "English" if language == "en" else "Portuguese"
         
-        style_instructions = {
-            "social_media": "engaging, with emojis and a hook. Make it viral-worthy.",
-            "professional": "professional and informative. Focus on value and insights.",
-            "casual": "friendly and conversational. Keep it light and relatable.",
-        }
-        
-        prompt = f"""Based on this video transcript, generate a social media description.
-
-Language: {language_name}
-Style: {style_instructions.get(style, style_instructions['social_media'])}
+        return f"""Language: {language_name}
+Style: {_STYLE_INSTRUCTIONS.get(style, _STYLE_INSTRUCTIONS['social_media'])}
 Max length: {max_length} characters
 Include hashtags: {include_hashtags}
 
 Transcript:
-{transcript[:2000]}
+{transcript[:2000]}"""
+    
+    def _build_multi_prompt(
+        self,
+        transcripts: List[str],
+        language: str,
+        style: str,
+        max_length: int,
+        include_hashtags: bool,
+    ) -> str:
+        """Build one user prompt for several clips (instructions are in _MULTI_SYSTEM_PROMPT)"""
+        language_name = "English" if language == "en" else "Portuguese"
+        numbered = "\n\n".join(f"{i}) {t[:2000]}" for i, t in enumerate(transcripts, 1))
+        
+        return f"""Language: {language_name}
+Style: {_STYLE_INSTRUCTIONS.get(style, _STYLE_INSTRUCTIONS['social_media'])}
+Max length: {max_length} characters per description
+Include hashtags: {include_hashtags}
 
-Respond ONLY with valid JSON in this exact format (no markdown, no code blocks):
-{{"description": "your description here", "hashtags": ["hashtag1", "hashtag2", "hashtag3"]}}"""
+Transcripts ({len(transcripts)}):
+{numbered}"""
+    
+    async def agenerate_description(
+        self,
+        transcript: str,
+        language: str = "en",
+        style: str = "social_media",
+        max_length: int = 200,
+        include_hashtags: bool = True,
+    ) -> dict:
+        """
+        Async generate_description using the providers' native async clients
+        
+        Same arguments, provider priority and fallback as generate_description.
+        """
+        prompt = self._build_prompt(transcript, language, style, max_length, include_hashtags)
+        cache_key = self._cache_key(transcript, language, style, max_length, include_hashtags)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
 
-        try:
-            # Priority: Gemini -> OpenAI -> Anthropic -> Fallback
-            if self.gemini_model:
-                logger.info("Using Gemini 2.0 Flash for description generation")
-                return self._generate_with_gemini(prompt)
-            elif self.openai_client:
-                logger.info("Using OpenAI for description generation")
-                return self._generate_with_openai(prompt)
-            elif self.anthropic_client:
-                logger.info("Using Anthropic for description generation")
-                return self._generate_with_anthropic(prompt)
-            else:
-                logger.warning("No LLM API key configured, using fallback")
-                return self._generate_fallback(transcript, language)
-        except Exception as e:
-            logger.error(f"Error generating description: {e}")
+        if not self._providers:
+            logger.warning("No LLM API key configured, using fallback")
             return self._generate_fallback(transcript, language)
+
+        for name, _, _, agenerate in self._providers:
+            try:
+                result = await agenerate(prompt)
+                break
+            except Exception as e:
+                logger.error(f"Error generating description with {name}: {e}")
+        else:
+            return self._generate_fallback(transcript, language)
+
+        self._cache_set(cache_key, result)
+        return result
     
-    def _generate_with_gemini(self, prompt: str) -> dict:
-        """Generate description using Google Gemini"""
-        response = self.gemini_model.generate_content(prompt)
-        text = response.text.strip()
+    async def agenerate_many(
+        self,
+        transcripts: List[str],
+        max_concurrency: int = 20,
+        multiplex: bool = True,
+        **kwargs,
+    ) -> List[dict]:
+        """
+        Generate descriptions for many clips concurrently
+        
+        With Gemini or OpenAI, up to _MULTIPLEX_SIZE uncached clips share one
+        request; clips a multiplexed reply doesn't cover get their own request.
         
-        # Clean up response (remove markdown code blocks if present)
-        if text.startswith("```"):
-            text = re.sub(r'^```(?:json)?\n?', '', text)
-            text = re.sub(r'\n?```$', '', text)
+        Args:
+            transcripts: One transcript per clip
+            max_concurrency: Maximum provider requests in flight
+            multiplex: Describe several clips per request when the provider allows
+            **kwargs: Passed to agenerate_description (language, style, ...)
         
+        Returns:
+            One description dict per transcript, in order
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def _bounded(transcript: str) -> dict:
+            async with semaphore:
+                return await self.agenerate_description(transcript, **kwargs)
+
+        if not multiplex or self._provider is None or self._provider[0] not in _MULTIPLEX_PROVIDERS:
+            return await asyncio.gather(*(_bounded(t) for t in transcripts))
+
+        params = dict(language="en", style="social_media", max_length=200, include_hashtags=True)
+        params.update(kwargs)
+        keys = [self._cache_key(t, **params) for t in transcripts]
+        results: List[Optional[dict]] = [self._cache_get(key) for key in keys]
+        pending = [idx for idx, result in enumerate(results) if result is None]
+
+        async def _bounded_group(indices: List[int]) -> List[Optional[dict]]:
+            async with semaphore:
+                return await self._agenerate_group([transcripts[idx] for idx in indices], **params)
+
+        groups = [pending[i:i + _MULTIPLEX_SIZE] for i in range(0, len(pending), _MULTIPLEX_SIZE)]
+        for indices, group_results in zip(groups, await asyncio.gather(*map(_bounded_group, groups))):
+            for idx, result in zip(indices, group_results):
+                if result is not None:
+                    self._cache_set(keys[idx], result)
+                    results[idx] = result
+
+        missing = [idx for idx, result in enumerate(results) if result is None]
+        for idx, result in zip(missing, await asyncio.gather(*(_bounded(transcripts[idx]) for idx in missing))):
+            results[idx] = result
+        return results
+    
+    async def _agenerate_group(
+        self,
+        transcripts: List[str],
+        language: str,
+        style: str,
+        max_length: int,
+        include_hashtags: bool,
+    ) -> List[Optional[dict]]:
+        """Describe several clips in one request; None for clips the reply doesn't cover"""
+        prompt = self._build_multi_prompt(transcripts, language, style, max_length, include_hashtags)
         try:
-            result = json.loads(text)
-        except json.JSONDecodeError:
-            # Try to find JSON in the response
-            match = re.search(r'\{[^}]+\}', text, re.DOTALL)
-            if match:
-                result = json.loads(match.group())
+            if self._provider[0] == "OpenAI":
+                response = await self.async_openai_client.chat.completions.create(
+                    **self._openai_request(prompt, _MULTI_SYSTEM_PROMPT, 300 * len(transcripts))
+                )
+                text = response.choices[0].message.content
             else:
-                result = {"description": text[:200], "hashtags": []}
+                response = await self.gemini_multi_model.generate_content_async(prompt)
+                text = response.text.strip()
+        except Exception as e:
+            logger.error(f"Error generating {len(transcripts)} descriptions in one request: {e}")
+            return [None] * len(transcripts)
+
+        results = _parse_multi_response(text, len(transcripts))
+        if results is None:
+            logger.warning(f"Multi-clip reply did not match {len(transcripts)} clips, describing them one by one")
+            return [None] * len(transcripts)
+        return results
+    
+    def generate_descriptions_batch(
+        self,
+        transcripts: List[str],
+        use_batch_api: bool = True,
+        language: str = "en",
+        style: str = "social_media",
+        max_length: int = 200,
+        include_hashtags: bool = True,
+        timeout: float = 24 * 3600,
+    ) -> List[dict]:
+        """
+        Generate descriptions for many clips through a provider Batch API
         
-        return {
-            "description": result.get("description", ""),
-            "hashtags": result.get("hashtags", []),
-        }
+        Batch jobs cost about half of regular requests and are not subject to
+        per-request rate limits, but can take minutes to hours. Use this for
+        non-interactive jobs only. Cached descriptions are reused and only
+        the other clips are submitted; batch results are cached.
+        
+        Args:
+            transcripts: One transcript per clip
+            use_batch_api: If False, describe clips one by one with regular requests
+            language, style, max_length, include_hashtags: As in generate_description
+            timeout: Maximum seconds to wait for the batch to finish
+        
+        Returns:
+            One description dict per transcript, in order
+        """
+        if not transcripts:
+            return []
+
+        prompt_kwargs = dict(
+            language=language, style=style, max_length=max_length, include_hashtags=include_hashtags
+        )
+        keys = [self._cache_key(t, **prompt_kwargs) for t in transcripts]
+        results: Dict[int, dict] = {}
+        for idx, key in enumerate(keys):
+            cached = self._cache_get(key)
+            if cached is not None:
+                results[idx] = cached
+
+        # Only clips without a cached description are submitted
+        pending = [idx for idx in range(len(transcripts)) if idx not in results]
+        if use_batch_api and pending:
+            prompts = [self._build_prompt(transcripts[idx], **prompt_kwargs) for idx in pending]
+            batch_results: Dict[int, dict] = {}
+            try:
+                # Gemini has no batch mode in google-generativeai; OpenAI -> Anthropic
+                if self.openai_client:
+                    logger.info(f"Submitting {len(prompts)} descriptions to the OpenAI Batch API")
+                    batch_results = self._submit_openai_batch(prompts, timeout)
+                elif self.anthropic_client:
+                    logger.info(f"Submitting {len(prompts)} descriptions to Anthropic Message Batches")
+                    batch_results = self._submit_anthropic_batch(prompts, timeout)
+            except Exception as e:
+                logger.error(f"Batch description generation failed: {e}")
+
+            for prompt_idx, result in batch_results.items():
+                idx = pending[prompt_idx]
+                self._cache_set(keys[idx], result)
+                results[idx] = result
+
+        # Clips the batch did not cover are described with regular requests (which cache them)
+        return [
+            results.get(idx) or self.generate_description(transcript, **prompt_kwargs)
+            for idx, transcript in enumerate(transcripts)
+        ]
+    
+    def _wait_for_batch(self, retrieve, is_done, timeout: float):
+        """Poll a provider batch with exponential backoff until it is done"""
+        deadline = time.monotonic() + timeout
+        delay = _BATCH_POLL_INITIAL
+        batch = retrieve()
+        while not is_done(batch):
+            if time.monotonic() + delay > deadline:
+                raise TimeoutError("Description batch did not finish in time")
+            time.sleep(delay)
+            delay = min(delay * 2, _BATCH_POLL_MAX)
+            batch = retrieve()
+        return batch
+    
+    def _submit_openai_batch(self, prompts: List[str], timeout: float) -> Dict[int, dict]:
+        """Run prompts through the OpenAI Batch API, keyed by prompt index"""
+        client = self.openai_client
+        lines = [
+            _json_dumps_bytes({
+                "custom_id": str(idx),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": self._openai_request(prompt),
+            })
+            for idx, prompt in enumerate(prompts)
+        ]
+        batch_file = client.files.create(
+            file=("descriptions.jsonl", b"\n".join(lines)),
+            purpose="batch",
+        )
+        batch = client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        batch = self._wait_for_batch(
+            lambda: client.batches.retrieve(batch.id),
+            lambda b: b.status in _OPENAI_BATCH_DONE,
+            timeout,
+        )
+        if batch.status != "completed" or not batch.output_file_id:
+            raise RuntimeError(f"OpenAI batch {batch.id} ended as {batch.status}")
+
+        results = {}
+        for line in client.files.content(batch.output_file_id).text.splitlines():
+            if not line.strip():
+                continue
+            entry = _json_loads(line)
+            response = entry.get("response") or {}
+            if entry.get("error") or response.get("status_code") != 200:
+                continue
+            try:
+                content = response["body"]["choices"][0]["message"]["content"]
+                results[int(entry["custom_id"])] = self._parse_openai_response(content)
+            except (KeyError, IndexError, ValueError) as e:
+                logger.warning(f"Unreadable batch result {entry.get('custom_id')}: {e}")
+        return results
     
+    def _submit_anthropic_batch(self, prompts: List[str], timeout: float) -> Dict[int, dict]:
+        """Run prompts through Anthropic Message Batches, keyed by prompt index"""
+        client = self.anthropic_client
+        batch = client.messages.batches.create(
+            requests=[
+                {"custom_id": str(idx), "params": self._anthropic_request(prompt)}
+                for idx, prompt in enumerate(prompts)
+            ]
+        )
+        batch = self._wait_for_batch(
+            lambda: client.messages.batches.retrieve(batch.id),
+            lambda b: b.processing_status == "ended",
+            timeout,
+        )
+
+        results = {}
+        for entry in client.messages.batches.results(batch.id):
+            if entry.result.type != "succeeded":
+                continue
+            try:
+                text = entry.result.message.content[0].text
+                results[int(entry.custom_id)] = _parse_json_response(text)
+            except (IndexError, ValueError) as e:
+                logger.warning(f"Unreadable batch result {entry.custom_id}: {e}")
+        return results
+    
+    @_with_retries()
+    def _generate_with_gemini(self, prompt: str) -> dict:
+        """Generate description using Google Gemini"""
+        response = self.gemini_model.generate_content(prompt)
+        return _parse_json_response(response.text.strip(), fallback_length=200)
+    
+    @_with_retries()
+    async def _agenerate_with_gemini(self, prompt: str) -> dict:
+        response = await self.gemini_model.generate_content_async(prompt)
+        return _parse_json_response(response.text.strip(), fallback_length=200)
+    
+    @_with_retries()
     def _generate_with_openai(self, prompt: str) -> dict:
         """Generate description using OpenAI"""
-        response = self.openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a social media expert. Generate engaging video descriptions. Respond only with valid JSON."},
+        response = self.openai_client.chat.completions.create(**self._openai_request(prompt))
+        return self._parse_openai_response(response.choices[0].message.content)
+    
+    def _openai_request(
+        self,
+        prompt: str,
+        system_prompt: str = _SYSTEM_PROMPT,
+        max_tokens: int = 300,
+    ) -> dict:
+        return {
+            "model": _OPENAI_MODEL,
+            "messages": [
+                {"role": "system", "content": system_prompt},
                 {"role": "user", "content": prompt}
             ],
-            response_format={"type": "json_object"},
-            max_tokens=300,
-        )
-        
-        result = json.loads(response.choices[0].message.content)
+            "response_format": {"type": "json_object"},
+            "max_tokens": max_tokens,
+        }
+    
+    @_with_retries()
+    async def _agenerate_with_openai(self, prompt: str) -> dict:
+        response = await self.async_openai_client.chat.completions.create(**self._openai_request(prompt))
+        return self._parse_openai_response(response.choices[0].message.content)
+    
+    def _parse_openai_response(self, content: str) -> dict:
+        result = _json_loads(content)
         return {
             "description": result.get("description", ""),
             "hashtags": result.get("hashtags", []),
         }
     
+    @_with_retries()
     def _generate_with_anthropic(self, prompt: str) -> dict:
         """Generate description using Anthropic Claude"""
-        response = self.anthropic_client.messages.create(
-            model="claude-3-haiku-20240307",
-            max_tokens=300,
-            messages=[
+        # Streamed: text accumulates as tokens arrive, the reply is parsed once complete
+        with self.anthropic_client.messages.stream(**self._anthropic_request(prompt)) as stream:
+            text = "".join(stream.text_stream)
+        return _parse_json_response(text)
+    
+    @_with_retries()
+    async def _agenerate_with_anthropic(self, prompt: str) -> dict:
+        async with self.async_anthropic_client.messages.stream(**self._anthropic_request(prompt)) as stream:
+            text = "".join([chunk async for chunk in stream.text_stream])
+        return _parse_json_response(text)
+    
+    def _anthropic_request(self, prompt: str) -> dict:
+        return {
+            "model": _ANTHROPIC_MODEL,
+            "max_tokens": 300,
+            "system": [
+                {"type": "text", "text": _SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}
+            ],
+            "messages": [
                 {"role": "user", "content": prompt}
             ],
-        )
-        
-        # Parse JSON from response
-        text = response.content[0].text
-        try:
-            result = json.loads(text)
-        except json.JSONDecodeError:
-            # Try to find JSON in the response
-            match = re.search(r'\{[^}]+\}', text, re.DOTALL)
-            if match:
-                result = json.loads(match.group())
-            else:
-                result = {"description": text, "hashtags": []}
-        
-        return {
-            "description": result.get("description", ""),
-            "hashtags": result.get("hashtags", []),
         }
     
     def _generate_fallback(self, transcript: str, language: str) -> dict:
         """Fallback description generator (no LLM)"""
         # Take first sentence as description
-        first_sentence = transcript.split(".")[0][:150] if transcript else ""
-        
-        if language == "pt":
-            description = f"Confira este momento incrivel! {first_sentence}..."
-            hashtags = ["viral", "brasil", "fyp", "trending"]
-        else:
-            description = f"Check out this amazing moment! {first_sentence}..."
-            hashtags = ["viral", "fyp", "trending", "mustwatch"]
+        first_sentence = transcript.partition(".")[0][:150]
+        template, hashtags = _FALLBACK_TEMPLATES.get(language, _FALLBACK_TEMPLATES["en"])
         
         return {
-            "description": description,
-            "hashtags": hashtags,
+            "description": template.format(first_sentence),
+            "hashtags": list(hashtags),
         }
 
 
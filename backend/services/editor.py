@@ -1,25 +1,577 @@
 """
 Video Editor Service
-Handles trimming, resizing, and exporting clips using MoviePy and FFmpeg
+Handles trimming, resizing, and exporting clips using FFmpeg
 """
+import functools
+import json
 import logging
 import uuid
 from pathlib import Path
-from typing import Optional, List, Dict, Any, Literal
+from typing import Optional, List, Dict, Any, Literal, Tuple
 import subprocess
 import os
+import itertools
+import threading
+import multiprocessing as mp
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
 
 logger = logging.getLogger(__name__)
 
 # Import CaptionStyle for type hints
 try:
-    from backend.services.captions import CaptionStyle, captions_service
+    from backend.services.captions import (
+        CaptionStyle, captions_service, _detect_hwaccel, _format_ass_time, _VAAPI_DEVICE, MAX_NVENC_SESSIONS,
+        _ASS_PATH_TRANS,
+    )
 except ImportError:
-    from services.captions import CaptionStyle, captions_service
+    from services.captions import (
+        CaptionStyle, captions_service, _detect_hwaccel, _format_ass_time, _VAAPI_DEVICE, MAX_NVENC_SESSIONS,
+        _ASS_PATH_TRANS,
+    )
+# Relative, so the -threads cap set in workers is the one the encoders read
+from .export_worker import _init_export_worker, _thread_args, _export_one, _viral_one
+
+# Stream copy only when the cut is this close to a keyframe; starting any
+# earlier would shift the clip against subtitle and crop timings
+_KEYFRAME_SNAP = 0.05
+# Seconds after the cut searched for keyframes
+_KEYFRAME_PROBE_WINDOW = 5.0
+
+
+def _probe_keyframes(input_path: Path, start_time: float, window: float) -> List[float]:
+    """
+    Video keyframe timestamps from the one before start_time up to start_time + window
+
+    ffprobe reads raw stream timestamps while ffmpeg -ss counts from the
+    container start, so times are shifted by the format start_time (nonzero
+    for MPEG-TS and many MKV/MOV files) on the way in and out.
+    """
+    offset = float(_probe(input_path)["format"].get("start_time", 0))
+    cmd = [
+        "ffprobe", "-v", "error",
+        "-select_streams", "v:0",
+        "-skip_frame", "nokey",
+        "-read_intervals", f"{start_time + offset}%+{window}",
+        "-show_entries", "frame=best_effort_timestamp_time",
+        "-of", "csv=p=0",
+        str(input_path)
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    keyframes = []
+    for line in result.stdout.split():
+        try:
+            keyframes.append(float(line.strip(",")) - offset)
+        except ValueError:
+            continue  # N/A timestamps
+    return sorted(keyframes)
+
+
+@functools.lru_cache(maxsize=256)
+def _probe_cached(path_str: str, mtime_ns: int, size: int) -> Dict[str, Any]:
+    """ffprobe streams and format as JSON (mtime/size key the cache to the file contents)"""
+    cmd = [
+        "ffprobe", "-v", "error",
+        "-print_format", "json",
+        "-show_streams", "-show_format",
+        path_str
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+def _probe(input_path: Path) -> Dict[str, Any]:
+    """Stream and format metadata, probed once per file version"""
+    st = os.stat(input_path)
+    return _probe_cached(str(input_path), st.st_mtime_ns, st.st_size)
+
+
+def _probe_codecs(input_path: Path) -> Dict[str, str]:
+    """Codec name of the first stream of each type (video, audio, ...)"""
+    codecs = {}
+    for stream in _probe(input_path).get("streams", []):
+        if "codec_type" in stream and "codec_name" in stream:
+            codecs.setdefault(stream["codec_type"], stream["codec_name"])
+    return codecs
+
+
+def _probe_dims(input_path: Path) -> Tuple[int, int]:
+    """Width and height of the first video stream"""
+    for stream in _probe(input_path).get("streams", []):
+        if stream.get("codec_type") == "video":
+            return int(stream["width"]), int(stream["height"])
+    raise ValueError(f"No video stream in {input_path}")
+
+
+def _probe_duration(input_path: Path) -> float:
+    """Container duration in seconds"""
+    return float(_probe(input_path)["format"]["duration"])
+
+
+# libx264 presets: intermediates are re-encoded downstream, so they favour
+# speed; the output-facing encode keeps the better compression of medium
+INTERMEDIATE_PRESET = "veryfast"
+OUTPUT_PRESET = "medium"
+
+# libx264 preset -> NVENC preset of similar speed/quality trade-off
+_NVENC_PRESETS = {"ultrafast": "p1", "veryfast": "p1", "fast": "p2", "medium": "p4", "slow": "p6"}
+
+
+def _decoder_args(hwaccel: Optional[str], gpu_frames: bool = False) -> List[str]:
+    """
+    Input options for the hardware encoder
+
+    gpu_frames keeps decoded NVENC frames in CUDA memory, which only works
+    when no software filter runs between decode and encode.
+    """
+    if hwaccel == "nvenc":
+        args = ["-hwaccel", "cuda"]
+        if gpu_frames:
+            args += ["-hwaccel_output_format", "cuda"]
+        return args
+    if hwaccel == "vaapi":
+        return ["-vaapi_device", _VAAPI_DEVICE]
+    return []
+
+
+def _encoder_args(hwaccel: Optional[str], crf: int, preset: str, bitrate: Optional[str] = None) -> List[str]:
+    """
+    Video encoder options for the detected hardware encoder, libx264 otherwise
+
+    Constant quality at crf (or the encoder's equivalent), or a target
+    bitrate when one is given.
+    """
+    if hwaccel == "nvenc":
+        args = ["-c:v", "h264_nvenc", "-preset", _NVENC_PRESETS.get(preset, "p4"), "-rc", "vbr"]
+        # -b:v 0 lifts NVENC's default 2 Mb/s cap so -cq alone sets the quality
+        return args + (["-b:v", bitrate] if bitrate else ["-cq", str(crf), "-b:v", "0"])
+    if bitrate:
+        codec = {"qsv": "h264_qsv", "videotoolbox": "h264_videotoolbox", "vaapi": "h264_vaapi"}
+        if hwaccel in codec:
+            return ["-c:v", codec[hwaccel], "-b:v", bitrate]
+        return ["-c:v", "libx264", "-preset", preset, "-b:v", bitrate]
+    if hwaccel == "qsv":
+        return ["-c:v", "h264_qsv", "-global_quality", str(crf)]
+    if hwaccel == "videotoolbox":
+        return ["-c:v", "h264_videotoolbox", "-q:v", "65"]
+    if hwaccel == "vaapi":
+        return ["-c:v", "h264_vaapi", "-qp", str(crf)]
+    return ["-c:v", "libx264", "-preset", preset, "-crf", str(crf)]
+
+
+def _with_hw_upload(vf: Optional[str], hwaccel: Optional[str]) -> Optional[str]:
+    """Append the upload step VAAPI needs after software filters"""
+    if hwaccel != "vaapi":
+        return vf
+    return f"{vf},format=nv12,hwupload" if vf else "format=nv12,hwupload"
+
+
+def _pix_fmt_args(hwaccel: Optional[str]) -> List[str]:
+    """
+    -pix_fmt yuv420p for broad player support
+
+    Left out for VAAPI, whose graph already ends in nv12 hardware surfaces
+    that a software output format can't be negotiated against.
+    """
+    return [] if hwaccel == "vaapi" else ["-pix_fmt", "yuv420p"]
+
+
+# Containers whose index (moov atom) -movflags +faststart can move to the front
+_FASTSTART_SUFFIXES = {".mp4", ".m4v", ".mov"}
+
+
+def _faststart_args(output_path: Path) -> List[str]:
+    """Muxer options that put the MP4 index first, so playback starts before the download ends"""
+    if Path(output_path).suffix.lower() in _FASTSTART_SUFFIXES:
+        return ["-movflags", "+faststart"]
+    return []
+
+
+# Bytes of FFmpeg stderr kept for error reports
+_STDERR_TAIL = 64 * 1024
+
+
+def _temp_sidecar(output_path: Path, suffix: str) -> Path:
+    """Unique temp file next to output_path, so retries and parallel jobs never share one"""
+    return output_path.with_name(f"{output_path.stem}_{uuid.uuid4().hex[:8]}{suffix}")
+
+
+def _run_ffmpeg(cmd: List[str]) -> None:
+    """
+    Run FFmpeg, raising CalledProcessError with its stderr on failure
+
+    Commands pass -loglevel error -nostats, so only errors are collected
+    rather than a progress line per frame. stderr is drained as it comes and
+    only its last _STDERR_TAIL bytes are kept; stdin is closed so FFmpeg
+    never waits on keyboard input from a daemon's terminal.
+    """
+    tail = b""
+    with subprocess.Popen(
+        cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    ) as proc:
+        for chunk in iter(lambda: proc.stderr.read1(_STDERR_TAIL), b""):
+            tail = (tail + chunk)[-_STDERR_TAIL:]
+        returncode = proc.wait()
+    if returncode:
+        raise subprocess.CalledProcessError(
+            returncode, cmd, stderr=tail.decode("utf-8", errors="replace")
+        )
+
+
+def _run_encode(build_cmd) -> None:
+    """
+    Run an FFmpeg encode with the hardware encoder, retrying with libx264
+
+    build_cmd(hwaccel) returns the command for that encoder (None = libx264).
+    """
+    hwaccel = _detect_hwaccel()
+    try:
+        _run_ffmpeg(build_cmd(hwaccel))
+    except subprocess.CalledProcessError as e:
+        if hwaccel is None:
+            raise
+        # Encoder can be listed without a usable device
+        logger.warning(f"{hwaccel} encode failed, retrying with libx264: {e.stderr}")
+        _run_ffmpeg(build_cmd(None))
+
+
+def _encode_graph(
+    input_path: Path,
+    output_path: Path,
+    graph: List[str],
+    video_pad: str,
+    audio_pad: Optional[str],
+    codecs: Dict[str, str],
+    fps: int,
+    bitrate: str = "8000k",
+    preset: str = INTERMEDIATE_PRESET,
+) -> None:
+    """Encode a filter graph's output at a fixed bitrate and fps, on the hardware encoder if any"""
+    def build_cmd(hwaccel: Optional[str]) -> List[str]:
+        chains = list(graph)
+        pad = video_pad
+        upload = _with_hw_upload(None, hwaccel)
+        if upload:
+            chains.append(f"{pad}{upload}[hwv]")
+            pad = "[hwv]"
+        return [
+            "ffmpeg", "-y",
+            "-hide_banner", "-loglevel", "error", "-nostats",
+            *_decoder_args(hwaccel),
+            "-i", str(input_path),
+            "-filter_complex", ";".join(chains),
+            "-map", pad,
+            *(["-map", audio_pad] if audio_pad else []),
+            "-r", str(fps),
+            *_encoder_args(hwaccel, 20, preset, bitrate),
+            *_thread_args(),
+            *_pix_fmt_args(hwaccel),
+            *_audio_args(codecs, audio_pad),
+            *_faststart_args(output_path),
+            str(output_path)
+        ]
+    
+    _run_encode(build_cmd)
+
+
+def _audio_args(codecs: Dict[str, str], audio_pad: Optional[str], bitrate: Optional[str] = None) -> List[str]:
+    """Audio codec options: unfiltered AAC is copied as is, anything else encoded to AAC"""
+    if audio_pad is None:
+        return []
+    if audio_pad == "0:a" and codecs.get("audio") == "aac":
+        return ["-c:a", "copy"]
+    return ["-c:a", "aac"] + (["-b:a", bitrate] if bitrate else [])
+
+
+# Crop segments closer than this (seconds) count as back to back
+_SEGMENT_JOIN_TOLERANCE = 0.05
+
+
+def _crop_graph(
+    crops_data: dict,
+    duration: float,
+    has_audio: bool,
+    source: str = "[0:v]",
+) -> Tuple[List[str], str, Optional[str]]:
+    """
+    Filter chains that apply the crop segments
+
+    Back-to-back segments (what face tracking produces) become one crop
+    whose x/y step at each segment boundary, so the video is decoded and
+    filtered in a single chain and audio passes through. Segments with gaps
+    are trimmed, cropped and concatenated instead, dropping the gaps.
+
+    Segment times are relative to the first input frame; duration clamps
+    open-ended segments. source is the video pad to crop. Returns the chains
+    plus the video and audio output pads to map (audio None when the input
+    has none).
+    """
+    segments = crops_data.get("segments", [])
+    cw = crops_data.get("crop_width", "iw")
+    ch = crops_data.get("crop_height", "ih")
+    
+    spans = []
+    for seg in segments:
+        start = seg["start_time"]
+        end = seg["end_time"] if seg.get("end_time") is not None else duration
+        
+        # Ensure we don't go out of bounds
+        end = min(end, duration)
+        if start >= end:
+            continue
+        
+        # x, y are top-left coordinates
+        spans.append((start, end, int(seg.get("x", 0)), int(seg.get("y", 0))))
+    
+    if not spans:
+        logger.warning("No segments for resizing, doing center crop")
+        return [f"{source}scale=-2:{ch},crop={cw}:{ch}[cropv]"], "[cropv]", "0:a" if has_audio else None
+    
+    contiguous = spans[0][0] <= _SEGMENT_JOIN_TOLERANCE and all(
+        abs(nxt[0] - prev[1]) <= _SEGMENT_JOIN_TOLERANCE for prev, nxt in zip(spans, spans[1:])
+    )
+    if contiguous:
+        # Step functions of t: first offset plus each change from its boundary on
+        x_expr = str(spans[0][2])
+        y_expr = str(spans[0][3])
+        for prev, nxt in zip(spans, spans[1:]):
+            if nxt[2] != prev[2]:
+                x_expr += f"+({nxt[2] - prev[2]})*gte(t,{nxt[0]})"
+            if nxt[3] != prev[3]:
+                y_expr += f"+({nxt[3] - prev[3]})*gte(t,{nxt[0]})"
+        return [f"{source}crop={cw}:{ch}:x='{x_expr}':y='{y_expr}'[cropv]"], "[cropv]", "0:a" if has_audio else None
+    
+    # One decoded stream each, split explicitly across the segment branches
+    graph = [source + f"split={len(spans)}" + "".join(f"[s{n}]" for n in range(len(spans)))]
+    if has_audio:
+        graph.append(f"[0:a]asplit={len(spans)}" + "".join(f"[as{n}]" for n in range(len(spans))))
+    pads = []
+    for n, (start, end, x1, y1) in enumerate(spans):
+        graph.append(
+            f"[s{n}]trim=start={start}:end={end},setpts=PTS-STARTPTS,"
+            f"crop={cw}:{ch}:{x1}:{y1}[v{n}]"
+        )
+        pads.append(f"[v{n}]")
+        if has_audio:
+            graph.append(f"[as{n}]atrim=start={start}:end={end},asetpts=PTS-STARTPTS[a{n}]")
+            pads.append(f"[a{n}]")
+    
+    graph.append(
+        "".join(pads)
+        + f"concat=n={len(spans)}:v=1:a={int(has_audio)}[cropv]"
+        + ("[cropa]" if has_audio else "")
+    )
+    return graph, "[cropv]", "[cropa]" if has_audio else None
+
+
+# 9:16 output canvas of the stacked and vertical layouts
+_VERTICAL_SIZE = (1080, 1920)
+
+
+def _stacked_graph(crops_data: dict, duration: float) -> Tuple[List[str], str]:
+    """
+    Filter chains for the stacked 9:16 layout
+
+    Top = the whole frame scaled to 1080 wide, bottom = the face crop (see
+    _crop_graph) scaled to 1080 wide, overlaid on a black 1080x1920 canvas.
+    Returns the chains plus the video output pad; audio is the input's own.
+    """
+    target_w, target_h = _VERTICAL_SIZE
+    face_graph, face_pad, _ = _crop_graph(crops_data, duration, has_audio=False, source="[facesrc]")
+    # Both parts branch off one decoded stream
+    graph = ["[0:v]split=2[full][facesrc]", *face_graph]
+    graph += [
+        f"[full]scale={target_w}:-2,crop={target_w}:'min(ih,{target_h})':0:0,"
+        f"pad={target_w}:{target_h}:0:0:black[top]",
+        f"{face_pad}scale={target_w}:-2[face]",
+        # The face is drawn over the top part where they meet, as before
+        "[top][face]overlay=x=0:y=H-h:eof_action=pass[stackv]",
+    ]
+    return graph, "[stackv]"
+
+
+def _vertical_graph(source: str = "[0:v]") -> Tuple[List[str], str]:
+    """Filter chain that scales the source pad to cover 1080x1920 and center-crops it"""
+    target_w, target_h = _VERTICAL_SIZE
+    return [
+        f"{source}scale={target_w}:{target_h}:force_original_aspect_ratio=increase,"
+        f"crop={target_w}:{target_h}[vertv]"
+    ], "[vertv]"
+
+
+# Gap between the PiP facecam and the frame edges
+_PIP_MARGIN = 40
+
+
+def _pip_graph(
+    dims: Tuple[int, int],
+    facecam_region: dict,
+    pip_position: str,
+    pip_scale: float,
+) -> Tuple[List[str], str]:
+    """
+    Filter chains for the picture-in-picture layout
+
+    The frame fills 1080x1920 (see _vertical_graph) and the facecam region,
+    clamped to the input's dims, is overlaid pip_scale of the width wide in
+    the pip_position corner.
+    """
+    width, height = dims
+    target_w, _ = _VERTICAL_SIZE
+    
+    # Ensure bounds are within frame
+    fc_w = facecam_region.get("width", width // 4)
+    fc_h = facecam_region.get("height", height // 4)
+    fc_x = max(0, min(facecam_region.get("x", 0), width - fc_w))
+    fc_y = max(0, min(facecam_region.get("y", 0), height - fc_h))
+    fc_w = min(fc_w, width - fc_x)
+    fc_h = min(fc_h, height - fc_y)
+    
+    pip_w = int(target_w * pip_scale)
+    # overlay's W/H are the main frame, w/h the PiP
+    x = f"{_PIP_MARGIN}" if pip_position in ("top-left", "bottom-left") else f"W-w-{_PIP_MARGIN}"
+    y = f"{_PIP_MARGIN}" if pip_position in ("top-left", "top-right") else f"H-h-{_PIP_MARGIN}"
+    
+    # Main frame and facecam branch off one decoded stream
+    graph, main_pad = _vertical_graph("[main]")
+    graph = ["[0:v]split=2[main][cam]", *graph]
+    graph += [
+        f"[cam]crop={int(fc_w)}:{int(fc_h)}:{int(fc_x)}:{int(fc_y)},scale={pip_w}:-2[pip]",
+        f"{main_pad}[pip]overlay=x={x}:y={y}[pipv]",
+    ]
+    return graph, "[pipv]"
+
 
 class VideoEditorService:
     """Service for editing and exporting video clips"""
     
+    def __init__(self):
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_workers = 0
+        self._executor_lock = threading.Lock()
+    
+    def export_clips_parallel(
+        self,
+        jobs: List[Dict[str, Any]],
+        max_workers: Optional[int] = None,
+        progress_callback: Optional[callable] = None,
+    ) -> List[str]:
+        """
+        Run several clips' export pipelines (see export_worker._export_one) in parallel
+
+        Each worker process runs its own FFmpeg encodes, with -threads capped
+        so that workers together use about one thread per core. The worker
+        pool is kept for the lifetime of the service.
+
+        Args:
+            jobs: Export jobs, one per clip
+            max_workers: Clips exported at once (default and maximum: the
+                pool size, cpu_count // 2 and at most the NVENC session
+                limit when NVENC is used)
+            progress_callback: Called with (done, total) as clips finish
+
+        Returns:
+            Output paths in job order
+        """
+        return self._run_parallel(_export_one, jobs, max_workers, progress_callback)
+    
+    def process_viral_clips_batch(
+        self,
+        jobs: List[Dict[str, Any]],
+        max_workers: Optional[int] = None,
+        progress_callback: Optional[callable] = None,
+    ) -> List[Path]:
+        """
+        Run process_viral_clip for several clips in parallel
+
+        Args:
+            jobs: process_viral_clip keyword arguments, one dict per clip
+            max_workers: Worker processes (as for export_clips_parallel)
+            progress_callback: Called with (done, total) as clips finish
+
+        Returns:
+            Output paths in job order
+        """
+        return [Path(path) for path in self._run_parallel(_viral_one, jobs, max_workers, progress_callback)]
+    
+    def _run_parallel(
+        self,
+        worker,
+        jobs: List[Dict[str, Any]],
+        max_workers: Optional[int],
+        progress_callback: Optional[callable],
+    ) -> List[str]:
+        """
+        Map a worker from services.export_worker over the jobs
+
+        A single job (or max_workers=1) runs here, without a worker process;
+        otherwise the jobs go to the shared pool, at most max_workers at a
+        time.
+        """
+        if not jobs:
+            return []
+        
+        results: List[Optional[str]] = [None] * len(jobs)
+        if len(jobs) == 1 or max_workers == 1:
+            for done, job in enumerate(jobs, 1):
+                results[done - 1] = worker(job)
+                logger.info(f"Exported clip {done}/{len(jobs)}")
+                if progress_callback:
+                    progress_callback(done, len(jobs))
+            return results
+        
+        executor, pool_workers = self._get_executor()
+        limit = min(max_workers or pool_workers, pool_workers)
+        pending = iter(enumerate(jobs))
+        running = {}
+        done = 0
+        try:
+            while True:
+                for i, job in itertools.islice(pending, limit - len(running)):
+                    running[executor.submit(worker, job)] = i
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    results[running.pop(future)] = future.result()
+                    done += 1
+                    logger.info(f"Exported clip {done}/{len(jobs)}")
+                    if progress_callback:
+                        progress_callback(done, len(jobs))
+        except BrokenProcessPool:
+            # A worker died; the next call starts a fresh pool
+            with self._executor_lock:
+                if self._executor is executor:
+                    self._executor = None
+            raise
+        
+        return results
+    
+    def _get_executor(self) -> Tuple[ProcessPoolExecutor, int]:
+        """
+        Lazily create the export worker pool, shared for the lifetime of the service
+
+        cpu_count // 2 workers (at most the NVENC session limit when NVENC is
+        used), each capping FFmpeg -threads at its share of the cores.
+        Workers are spawned and only import services.export_worker and the
+        editor, not the rest of the services package. Returns the pool and
+        its size.
+        """
+        with self._executor_lock:
+            if self._executor is None:
+                cpu_count = os.cpu_count() or 2
+                workers = max(1, cpu_count // 2)
+                if _detect_hwaccel() == "nvenc":
+                    workers = min(workers, MAX_NVENC_SESSIONS)
+                self._executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=mp.get_context("spawn"),
+                    initializer=_init_export_worker,
+                    initargs=(max(1, cpu_count // workers),),
+                )
+                self._executor_workers = workers
+            return self._executor, self._executor_workers
+    
     def generate_preview(
         self,
         input_path: str | Path,
@@ -28,21 +580,26 @@ class VideoEditorService:
         end_time: float,
         aspect_ratio: tuple[int, int] = (9, 16),
         subtitles: Optional[List[dict]] = None,
+        draft: bool = False,
     ) -> Path:
         """
         Generate a fast preview clip with optional viral-style subtitles
+
+        draft=True trades quality for speed (480p, fastest encoder settings)
+        for in-app previews.
         """
         input_path = Path(input_path)
         output_path = Path(output_path)
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
-        # Calculate dimensions (720p for reasonable preview quality)
+        # Calculate dimensions (720p for reasonable preview quality, 480p for drafts)
+        long_side = 854 if draft else 1280
         target_w, target_h = aspect_ratio
         if target_h > target_w:
-            h = 1280  # 720p height for vertical
+            h = long_side
             w = int(h * (target_w / target_h))
         else:
-            w = 1280
+            w = long_side
             h = int(w * (target_h / target_w))
             
         w = w if w % 2 == 0 else w + 1
@@ -57,32 +614,48 @@ class VideoEditorService:
         # Add subtitles if provided
         ass_path = None
         if subtitles and len(subtitles) > 0:
-            ass_path = output_path.with_suffix(".ass")
+            ass_path = _temp_sidecar(output_path, ".ass")
             self._create_viral_ass(subtitles, ass_path, start_time, w, h)
             # Escape path for FFmpeg filter
-            ass_path_escaped = str(ass_path).replace("\\", "/").replace(":", "\\:")
+            ass_path_escaped = str(ass_path).translate(_ASS_PATH_TRANS)
             vf_parts.append(f"ass='{ass_path_escaped}'")
         
         vf = ",".join(vf_parts)
         
-        cmd = [
-            "ffmpeg", "-y",
-            "-ss", str(start_time),
-            "-i", str(input_path),
-            "-t", str(duration),
-            "-vf", vf,
-            "-c:v", "libx264",
-            "-preset", "fast",
-            "-crf", "23",
-            "-c:a", "aac",
-            str(output_path)
-        ]
+        def build_cmd(hwaccel: Optional[str]) -> List[str]:
+            cmd = [
+                "ffmpeg", "-y",
+                "-hide_banner", "-loglevel", "error", "-nostats",
+                *_decoder_args(hwaccel),
+            ]
+            if draft and ass_path is None:
+                # Start at the keyframe before start_time instead of decoding up to it;
+                # skipped when burning subtitles, which are timed from start_time
+                cmd += ["-noaccurate_seek", "-fflags", "+genpts"]
+            cmd += [
+                "-ss", str(start_time),
+                "-i", str(input_path),
+                "-t", str(duration),
+                "-vf", _with_hw_upload(vf, hwaccel),
+            ]
+            if draft:
+                cmd += [*_encoder_args(hwaccel, 35, "ultrafast"), "-avoid_negative_ts", "make_zero"]
+            else:
+                cmd += _encoder_args(hwaccel, 23, "fast")
+            cmd += [
+                *_thread_args(),
+                "-c:a", "aac",
+                *_faststart_args(output_path),
+                str(output_path)
+            ]
+            return cmd
         
         logger.info(f"Generating preview with subtitles: {output_path}")
         try:
-            result = subprocess.run(cmd, check=True, capture_output=True)
+            # Low quality target, so the hardware encoder is always preferred
+            _run_encode(build_cmd)
         except subprocess.CalledProcessError as e:
-            logger.error(f"FFmpeg error: {e.stderr.decode()}")
+            logger.error(f"FFmpeg error: {e.stderr}")
             raise
         finally:
             # Cleanup ASS file
@@ -93,13 +666,6 @@ class VideoEditorService:
     
     def _create_viral_ass(self, subtitles: List[dict], output_path: Path, offset: float, width: int, height: int):
         """Create viral-style ASS subtitles with word-by-word highlighting"""
-        def format_time(seconds: float) -> str:
-            hours = int(seconds // 3600)
-            minutes = int((seconds % 3600) // 60)
-            secs = int(seconds % 60)
-            cs = int((seconds % 1) * 100)
-            return f"{hours:1d}:{minutes:02d}:{secs:02d}.{cs:02d}"
-        
         # Scale font size based on resolution
         font_size = max(40, int(height / 20))
         margin_v = int(height * 0.12)  # 12% from bottom
@@ -121,21 +687,22 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
         # OutlineColour &H00000000 = black  
         # BackColour &H80000000 = semi-transparent black shadow
         
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write(header)
-            for sub in subtitles:
-                # Adjust time relative to clip start
-                start = max(0, sub['start_time'] - offset)
-                end = max(0, sub['end_time'] - offset)
-                
-                if end <= 0 or start >= end:
-                    continue
-                
-                start_str = format_time(start)
-                end_str = format_time(end)
-                text = sub['text'].upper()  # Viral style is usually uppercase
-                
-                f.write(f"Dialogue: 0,{start_str},{end_str},Viral,,0,0,0,,{text}\n")
+        lines = [header]
+        for sub in subtitles:
+            # Adjust time relative to clip start
+            start = max(0, sub['start_time'] - offset)
+            end = max(0, sub['end_time'] - offset)
+            
+            if end <= 0 or start >= end:
+                continue
+            
+            text = sub['text'].upper()  # Viral style is usually uppercase
+            lines.append(
+                f"Dialogue: 0,{_format_ass_time(start)},{_format_ass_time(end)},Viral,,0,0,0,,{text}\n"
+            )
+        
+        # One write for the whole file
+        output_path.write_text("".join(lines), encoding="utf-8")
 
     def trim_clip(
         self,
@@ -143,32 +710,294 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
         output_path: str | Path,
         start_time: float,
         end_time: float,
+        accurate: bool = False,
+        smart_cut: bool = False,
+        crf: int = 20,
+        preset: str = INTERMEDIATE_PRESET,
     ) -> Path:
         """
-        Trim a video to create a clip using FFmpeg (re-encode for accuracy and high quality)
+        Trim a video to create a clip using FFmpeg
+
+        Stream-copies when start_time falls on a keyframe, otherwise
+        re-encodes the clip. smart_cut=True instead re-encodes only up to the
+        first keyframe and copies the rest; the result switches SPS/PPS
+        mid-stream, which hardware decoders can choke on, so it is only for
+        intermediates that FFmpeg reads again. accurate=True always
+        re-encodes the whole clip (high quality). crf and preset apply when
+        re-encoding; the defaults suit intermediates, deliverables should
+        pass OUTPUT_PRESET.
         """
         input_path = Path(input_path)
         output_path = Path(output_path)
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
+        logger.info(f"Trimming clip: {start_time:.2f}s - {end_time:.2f}s")
+        
+        if not accurate:
+            try:
+                if self._trim_stream_copy(input_path, output_path, start_time, end_time, smart_cut):
+                    return output_path
+            except (subprocess.CalledProcessError, OSError, ValueError) as e:
+                logger.warning(f"Stream-copy trim failed, re-encoding: {e}")
+        
         duration = end_time - start_time
+        codecs = _probe_codecs(input_path)
+        
+        def build_cmd(hwaccel: Optional[str]) -> List[str]:
+            cmd = [
+                "ffmpeg", "-y",
+                "-hide_banner", "-loglevel", "error", "-nostats",
+                # No filters, so NVENC frames can stay on the GPU end to end
+                *_decoder_args(hwaccel, gpu_frames=True),
+                # Input seek is exact when re-encoding (see export_clip)
+                "-ss", str(start_time),
+                "-i", str(input_path),
+                "-t", str(duration),
+            ]
+            vf = _with_hw_upload(None, hwaccel)
+            if vf:
+                cmd += ["-vf", vf]
+            cmd += [
+                *_encoder_args(hwaccel, crf, preset),
+                *_thread_args(),
+                # AAC is copied rather than encoded a second time downstream
+                *_audio_args(codecs, "0:a", "192k"),
+                "-avoid_negative_ts", "make_zero",
+                *_faststart_args(output_path),
+                str(output_path)
+            ]
+            return cmd
+        
+        _run_encode(build_cmd)
+        return output_path
+    
+    def _trim_stream_copy(
+        self,
+        input_path: Path,
+        output_path: Path,
+        start_time: float,
+        end_time: float,
+        smart_cut: bool,
+    ) -> bool:
+        """
+        Trim without re-encoding the whole clip
+
+        Returns False when neither a plain copy nor an allowed smart cut
+        applies (no keyframe near the cut, or codecs the head can't be
+        matched to).
+        """
+        keyframes = _probe_keyframes(input_path, start_time, _KEYFRAME_PROBE_WINDOW)
+        
+        # Cut lands on a keyframe: one stream copy, no encoder at all
+        on_key = [t for t in keyframes if abs(t - start_time) <= _KEYFRAME_SNAP]
+        if on_key:
+            keyframe = on_key[0]
+            cmd = [
+                "ffmpeg", "-y",
+                "-hide_banner", "-loglevel", "error", "-nostats",
+                "-ss", str(keyframe),
+                "-i", str(input_path),
+                "-t", str(end_time - keyframe),
+                "-c", "copy",
+                "-avoid_negative_ts", "make_zero",
+                *_faststart_args(output_path),
+                str(output_path)
+            ]
+            _run_ffmpeg(cmd)
+            logger.info(f"Stream-copied clip from keyframe at {keyframe:.3f}s")
+            return True
+        
+        later = [t for t in keyframes if start_time < t < end_time]
+        if not smart_cut or not later:
+            return False
+        
+        # The re-encoded head is spliced onto copied packets, so it must use the same codecs
+        codecs = _probe_codecs(input_path)
+        if codecs.get("video") != "h264" or codecs.get("audio", "aac") != "aac":
+            return False
+        
+        split = later[0]
+        head_path = output_path.with_name(f"temp_head_{uuid.uuid4()}.ts")
+        tail_path = output_path.with_name(f"temp_tail_{uuid.uuid4()}.ts")
+        list_path = output_path.with_name(f"temp_concat_{uuid.uuid4()}.txt")
         
-        logger.info(f"Trimming clip: {start_time:.2f}s - {end_time:.2f}s")
+        try:
+            # Head: start_time up to the first keyframe, re-encoded frame-accurately
+            _run_ffmpeg([
+                "ffmpeg", "-y",
+                "-hide_banner", "-loglevel", "error", "-nostats",
+                # Input seek decodes from the keyframe before start_time and
+                # drops frames up to it, so the head starts on the exact frame
+                "-ss", str(start_time),
+                "-i", str(input_path),
+                "-t", str(split - start_time),
+                "-c:v", "libx264",
+                "-preset", INTERMEDIATE_PRESET,
+                "-crf", "18",
+                *_thread_args(),
+                # Audio is AAC (checked above), copied like the tail's
+                "-c:a", "copy",
+                "-avoid_negative_ts", "make_zero",
+                "-bsf:v", "h264_mp4toannexb",
+                str(head_path)
+            ])
+            
+            # Tail: copied from the keyframe (nudged past it so the seek can't land one GOP early)
+            _run_ffmpeg([
+                "ffmpeg", "-y",
+                "-hide_banner", "-loglevel", "error", "-nostats",
+                "-ss", str(split + 0.001),
+                "-i", str(input_path),
+                "-t", str(end_time - split),
+                "-c", "copy",
+                "-avoid_negative_ts", "make_zero",
+                "-bsf:v", "h264_mp4toannexb",
+                str(tail_path)
+            ])
+            
+            # MPEG-TS segments carry SPS/PPS in-band, so differing encoder settings concat cleanly
+            list_path.write_text(
+                f"file '{head_path.resolve().as_posix()}'\n"
+                f"file '{tail_path.resolve().as_posix()}'\n",
+                encoding="utf-8"
+            )
+            _run_ffmpeg([
+                "ffmpeg", "-y",
+                "-hide_banner", "-loglevel", "error", "-nostats",
+                "-f", "concat",
+                "-safe", "0",
+                "-i", str(list_path),
+                "-c", "copy",
+                "-bsf:a", "aac_adtstoasc",
+                *_faststart_args(output_path),
+                str(output_path)
+            ])
+        finally:
+            for path in (head_path, tail_path, list_path):
+                path.unlink(missing_ok=True)
         
-        cmd = [
-            "ffmpeg", "-y",
-            "-ss", str(start_time),
-            "-i", str(input_path),
-            "-t", str(duration),
-            "-c:v", "libx264",
-            "-preset", "slow",     # Better compression efficiency
-            "-crf", "18",          # Visually lossless
-            "-c:a", "aac",
-            "-b:a", "192k",        # High audio quality
-            str(output_path)
-        ]
+        logger.info(f"Smart-cut clip: re-encoded {split - start_time:.2f}s head, copied the rest")
+        return True
+    
+    def export_clip(
+        self,
+        input_path: str | Path,
+        output_path: str | Path,
+        start_time: float,
+        end_time: float,
+        crops_data: Optional[dict] = None,
+        subtitles: Optional[List[dict]] = None,
+        fps: Optional[int] = None,
+        layout: Literal["fill", "stacked", "vertical", "pip"] = "fill",
+        captions_ass: Optional[Path] = None,
+        pip: Optional[Dict[str, Any]] = None,
+        smart_cut: bool = False,
+    ) -> Path:
+        """
+        Trim, crop and burn subtitles in a single FFmpeg pass
+
+        One decode and one encode instead of one per step. crops_data and
+        subtitle times are relative to start_time, as for the granular
+        methods. layout="stacked" composes the frame and the face crop as
+        apply_stacked_layout does, layout="vertical" scales to cover 9:16
+        and center-crops, and layout="pip" overlays the facecam as
+        apply_pip_layout does (pip = its facecam_region, pip_position and
+        pip_scale arguments). captions_ass is an already rendered ASS
+        file (e.g. styled captions) burned in place of subtitles. Without
+        crops, layout or subtitles this is just trim_clip (smart_cut is
+        passed on, for intermediates only).
+        """
+        if layout == "pip" and not (pip and pip.get("facecam_region")):
+            raise ValueError("layout='pip' needs pip with a facecam_region")
+        if layout == "stacked":
+            crops_data = crops_data or {}
+        elif layout == "fill" and not crops_data and not subtitles and not captions_ass:
+            # The trim is the deliverable unless smart_cut marks it as an intermediate
+            if smart_cut:
+                return self.trim_clip(input_path, output_path, start_time, end_time, smart_cut=True)
+            return self.trim_clip(
+                input_path, output_path, start_time, end_time, crf=18, preset=OUTPUT_PRESET
+            )
+        
+        input_path = Path(input_path)
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        duration = end_time - start_time
+        codecs = _probe_codecs(input_path)
+        has_audio = "audio" in codecs
+        
+        if layout == "stacked":
+            graph, video_pad = _stacked_graph(crops_data, duration)
+            audio_pad = "0:a" if has_audio else None
+        elif layout == "vertical":
+            graph, video_pad = _vertical_graph()
+            audio_pad = "0:a" if has_audio else None
+        elif layout == "pip":
+            graph, video_pad = _pip_graph(
+                _probe_dims(input_path),
+                pip["facecam_region"],
+                pip.get("pip_position", "bottom-right"),
+                pip.get("pip_scale", 0.25),
+            )
+            audio_pad = "0:a" if has_audio else None
+        elif crops_data:
+            graph, video_pad, audio_pad = _crop_graph(crops_data, duration, has_audio)
+        else:
+            graph, video_pad, audio_pad = [], "[0:v]", "0:a" if has_audio else None
+        
+        ass_path = None
+        if subtitles and not captions_ass:
+            ass_path = _temp_sidecar(output_path, ".ass")
+            self._create_ass(subtitles, ass_path)
+        if ass_path or captions_ass:
+            ass_path_str = str(ass_path or captions_ass).translate(_ASS_PATH_TRANS)
+            graph.append(f"{video_pad}ass='{ass_path_str}'[subv]")
+            video_pad = "[subv]"
+        
+        def build_cmd(hwaccel: Optional[str]) -> List[str]:
+            chains = list(graph)
+            upload = _with_hw_upload(None, hwaccel)
+            pad = video_pad
+            if upload:
+                chains.append(f"{pad}{upload}[hwv]")
+                pad = "[hwv]"
+            cmd = [
+                "ffmpeg", "-y",
+                "-hide_banner", "-loglevel", "error", "-nostats",
+                *_decoder_args(hwaccel),
+                # Input seek: decoding starts at the keyframe before start_time
+                # and frames up to start_time are dropped, so the cut is exact
+                "-ss", str(start_time),
+                "-i", str(input_path),
+                "-t", str(duration),
+                "-filter_complex", ";".join(chains),
+                "-map", pad,
+            ]
+            if audio_pad:
+                cmd += ["-map", audio_pad]
+            if fps:
+                cmd += ["-r", str(fps)]
+            cmd += [
+                *_encoder_args(hwaccel, 18, OUTPUT_PRESET),
+                *_thread_args(),
+                *_pix_fmt_args(hwaccel),
+                *_audio_args(codecs, audio_pad, "192k"),
+                *_faststart_args(output_path),
+                str(output_path)
+            ]
+            return cmd
+        
+        logger.info(f"Exporting clip {start_time:.2f}s - {end_time:.2f}s in one pass: {output_path}")
+        try:
+            _run_encode(build_cmd)
+        except subprocess.CalledProcessError as e:
+            logger.error(f"FFmpeg export failed: {e.stderr}")
+            raise
+        finally:
+            if ass_path:
+                ass_path.unlink(missing_ok=True)
         
-        subprocess.run(cmd, check=True, capture_output=True)
         return output_path
     
     def resize_video(
@@ -180,66 +1009,24 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
     ) -> Path:
         """
         Resize a video using crop data (dynamic cropping)
-        Using MoviePy for easier segment handling
+        One FFmpeg filter graph trims, crops and concatenates every segment
         """
-        from moviepy import VideoFileClip, concatenate_videoclips
-        
         input_path = Path(input_path)
         output_path = Path(output_path)
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
         logger.info(f"Resizing video to {crops_data['crop_width']}x{crops_data['crop_height']} at {fps} fps")
         
-        clip = VideoFileClip(str(input_path))
-        subclips = []
-        
-        segments = crops_data.get("segments", [])
-        cw = crops_data.get("crop_width", clip.w)
-        ch = crops_data.get("crop_height", clip.h)
+        codecs = _probe_codecs(input_path)
+        has_audio = "audio" in codecs
+        duration = _probe_duration(input_path) if crops_data.get("segments") else 0.0
+        graph, video_pad, audio_pad = _crop_graph(crops_data, duration, has_audio)
         
-        if not segments:
-             logger.warning("No segments for resizing, doing center crop")
-             subclips.append(clip.resized(height=ch).cropped(width=cw, height=ch, x_center=clip.w/2, y_center=clip.h/2))
-        else:
-            for seg in segments:
-                # Segment times are relative to the start of the trimmed clip (0-based)
-                start = seg["start_time"]
-                end = seg["end_time"] if seg.get("end_time") is not None else clip.duration
-                
-                # Ensure we don't go out of bounds
-                end = min(end, clip.duration)
-                if start >= end:
-                    continue
-                    
-                # Crop
-                # x, y are top-left coordinates
-                x1 = int(seg.get("x", 0))
-                y1 = int(seg.get("y", 0))
-                
-                # Crop using moviepy
-                sub = clip.subclipped(start, end).cropped(x1=x1, y1=y1, width=cw, height=ch)
-                subclips.append(sub)
-            
-        if subclips:
-            final_clip = concatenate_videoclips(subclips)
-        else:
-            final_clip = clip.resized(height=ch).cropped(width=cw, height=ch, x_center=clip.w/2, y_center=clip.h/2)
-        
-        # Write output
-        final_clip.write_videofile(
-            str(output_path),
-            fps=fps,
-            codec="libx264",
-            audio_codec="aac",
-            temp_audiofile=str(output_path.with_suffix(".m4a")),
-            remove_temp=True,
-            logger=None, # Silence logger
-            preset="medium",
-            bitrate="8000k"
-        )
-        
-        clip.close()
-        final_clip.close()
+        try:
+            _encode_graph(input_path, output_path, graph, video_pad, audio_pad, codecs, fps)
+        except subprocess.CalledProcessError as e:
+            logger.error(f"FFmpeg resize failed: {e.stderr}")
+            raise
         
         logger.info(f"Resized video saved to: {output_path}")
         return output_path
@@ -260,32 +1047,35 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
         output_path = Path(output_path)
         
         # Create ASS file
-        ass_path = output_path.with_suffix(".ass")
+        ass_path = _temp_sidecar(output_path, ".ass")
         self._create_ass(subtitles, ass_path)
         
         # Burn subtitles using FFmpeg
         # Escape path for filter
-        ass_path_str = str(ass_path).replace("\\", "/").replace(":", "\\:")
-        
-        cmd = [
-            "ffmpeg", "-y",
-            "-i", str(video_path),
-            "-vf", f"ass='{ass_path_str}'",
-            "-c:v", "libx264",
-            "-preset", "medium",
-            "-crf", "20",  # High quality
-            "-c:a", "copy",
-            str(output_path)
-        ]
+        ass_path_str = str(ass_path).translate(_ASS_PATH_TRANS)
+        
+        def build_cmd(hwaccel: Optional[str]) -> List[str]:
+            return [
+                "ffmpeg", "-y",
+                "-hide_banner", "-loglevel", "error", "-nostats",
+                *_decoder_args(hwaccel),
+                "-i", str(video_path),
+                "-vf", _with_hw_upload(f"ass='{ass_path_str}'", hwaccel),
+                *_encoder_args(hwaccel, 20, INTERMEDIATE_PRESET),
+                *_thread_args(),
+                "-c:a", "copy",
+                *_faststart_args(output_path),
+                str(output_path)
+            ]
         
         try:
-            subprocess.run(cmd, check=True, capture_output=True)
+            _run_encode(build_cmd)
         except subprocess.CalledProcessError as e:
-            logger.error(f"FFmpeg subtitle burning failed: {e.stderr.decode()}")
+            logger.error(f"FFmpeg subtitle burning failed: {e.stderr}")
             raise e
-        
-        # Clean up ASS file
-        ass_path.unlink(missing_ok=True)
+        finally:
+            # Clean up ASS file
+            ass_path.unlink(missing_ok=True)
         
         logger.info(f"Added subtitles to: {output_path}")
         return output_path
@@ -336,15 +1126,6 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
 
     def _create_ass(self, subtitles: List[dict], output_path: Path):
         """Create an ASS subtitle file for viral word-by-word style"""
-        def format_time(seconds: float) -> str:
-            # H:MM:SS.cc
-            hours = int(seconds // 3600)
-            minutes = int((seconds % 3600) // 60)
-            secs = int(seconds % 60)
-            # centiseconds
-            cs = int((seconds % 1) * 100)
-            return f"{hours:1d}:{minutes:02d}:{secs:02d}.{cs:02d}"
-        
         header = """[Script Info]
 ScriptType: v4.00+
 PlayResX: 1080
@@ -365,15 +1146,17 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
         # Alignment: 2 (Bottom Center)
         # MarginV: 250 (Raised from bottom)
 
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write(header)
-            for sub in subtitles:
-                start = format_time(sub['start_time'])
-                end = format_time(sub['end_time'])
-                text = sub['text']
-                # Highlight in Yellow (Default)
-                # We could add animation or karaoke here, but simple word flash is good for now.
-                f.write(f"Dialogue: 0,{start},{end},Default,,0,0,0,,{text}\n")
+        # Highlight in Yellow (Default)
+        # We could add animation or karaoke here, but simple word flash is good for now.
+        # One write for the whole file
+        output_path.write_text(
+            header + "".join(
+                f"Dialogue: 0,{_format_ass_time(sub['start_time'])},{_format_ass_time(sub['end_time'])},"
+                f"Default,,0,0,0,,{sub['text']}\n"
+                for sub in subtitles
+            ),
+            encoding="utf-8"
+        )
 
     
     def apply_stacked_layout(
@@ -387,82 +1170,23 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
         Apply a stacked layout: Top = Gameplay (centered), Bottom = Face (cropped)
         Exports at specified FPS (default 60) and FHD (1080x1920)
         """
-        from moviepy import VideoFileClip, concatenate_videoclips, CompositeVideoClip, ColorClip
-        
         input_path = Path(input_path)
         output_path = Path(output_path)
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
         logger.info(f"Applying stacked layout to: {input_path} at {fps} fps")
         
-        # Load clip
-        clip = VideoFileClip(str(input_path))
-        
-        # Target Dimensions for 9:16
-        target_w = 1080
-        target_h = 1920
-        
-        # 1. Top Part: Gameplay
-        # Scale original to width 1080
-        gameplay = clip.resized(width=target_w)
-        
-        # 2. Bottom Part: Face Crop
-        # Generate the face clip using crops_data
-        subclips = []
-        segments = crops_data.get("segments", [])
-        cw = crops_data.get("crop_width", clip.w)
-        ch = crops_data.get("crop_height", clip.h)
-        
-        # If no segments provided, just use the whole clip centered
-        if not segments:
-             logger.warning("No segments for resizing, using center crop for bottom")
-             subclips.append(clip.resized(height=ch).cropped(width=cw, height=ch, x_center=clip.w/2, y_center=clip.h/2))
-        else:
-            for seg in segments:
-                start = seg["start_time"]
-                end = seg["end_time"] if seg.get("end_time") is not None else clip.duration
-                end = min(end, clip.duration)
-                if start >= end: continue
-                
-                x1 = int(seg.get("x", 0))
-                y1 = int(seg.get("y", 0))
-                
-                # Crop using moviepy
-                sub = clip.subclipped(start, end).cropped(x1=x1, y1=y1, width=cw, height=ch)
-                subclips.append(sub)
-
-        if subclips:
-            face_clip = concatenate_videoclips(subclips)
-        else:
-             # Fallback
-             face_clip = clip.resized(height=ch).cropped(width=cw, height=ch, x_center=clip.w/2, y_center=clip.h/2)
-        
-        # Resize face_clip to width 1080
-        face_clip = face_clip.resized(width=target_w)
-        
-        # Position face_clip at bottom
-        face_clip = face_clip.with_position(("center", "bottom"))
-        gameplay = gameplay.with_position(("center", "top"))
+        codecs = _probe_codecs(input_path)
+        has_audio = "audio" in codecs
+        duration = _probe_duration(input_path) if crops_data.get("segments") else 0.0
+        graph, video_pad = _stacked_graph(crops_data, duration)
+        audio_pad = "0:a" if has_audio else None
         
-        # Create final composite
-        final = CompositeVideoClip([gameplay, face_clip], size=(target_w, target_h))
-        
-        final.write_videofile(
-            str(output_path),
-            fps=fps,
-            codec="libx264",
-            audio_codec="aac",
-            temp_audiofile=str(output_path.with_suffix(".m4a")),
-            remove_temp=True,
-            logger=None,
-            preset="medium",  # Better quality
-            bitrate="8000k"   # High bitrate for FHD
-        )
-        
-        clip.close()
-        gameplay.close()
-        face_clip.close()
-        final.close()
+        try:
+            _encode_graph(input_path, output_path, graph, video_pad, audio_pad, codecs, fps)
+        except subprocess.CalledProcessError as e:
+            logger.error(f"FFmpeg stacked layout failed: {e.stderr}")
+            raise
         
         return output_path
 
@@ -478,20 +1202,13 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
     ) -> Path:
         """
         Full pipeline: Trim -> Stacked Layout (9:16, 60fps) -> Burn Subtitles
+        All three steps run in one FFmpeg pass (see export_clip)
         """
         input_path = Path(input_path)
         output_path = Path(output_path)
         
-        # Temporary files
-        temp_trim = output_path.with_name(f"temp_trim_{uuid.uuid4()}{input_path.suffix}")
-        temp_layout = output_path.with_name(f"temp_layout_{uuid.uuid4()}{input_path.suffix}")
-        
         try:
-            # 1. Trim (Fast cut)
-            # using ffmpeg to trim first saves processing time in moviepy
-            self.trim_clip(input_path, temp_trim, start_time, end_time)
-            
-            # 2. Adjust Data for Trimmed Clip
+            # 1. Adjust Data for Trimmed Clip
             # Crops segments: shift by -start_time
             adjusted_crops = crops_data.copy()
             adjusted_segments = []
@@ -532,33 +1249,22 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
                 new_sub["end_time"] = new_end
                 adjusted_subtitles.append(new_sub)
 
-            # 3. Apply Layout
-            # result is saved to temp_layout
-            self.apply_stacked_layout(
-                input_path=temp_trim,
-                output_path=temp_layout,
+            # 2. Trim, apply layout and burn subtitles
+            self.export_clip(
+                input_path,
+                output_path,
+                start_time,
+                end_time,
                 crops_data=adjusted_crops,
-                fps=fps
-            )
-            
-            # 4. Burn Subtitles
-            # result is saved to output_path
-            self.add_subtitles(
-                video_path=temp_layout,
-                output_path=output_path,
-                subtitles=adjusted_subtitles
+                subtitles=adjusted_subtitles,
+                fps=fps,
+                layout="stacked",
             )
             
         except Exception as e:
             logger.error(f"Error processing viral clip: {e}")
             raise e
-        finally:
-            # Cleanup
-            if temp_trim.exists():
-                temp_trim.unlink()
-            if temp_layout.exists():
-                temp_layout.unlink()
-                
+        
         return output_path
 
     def apply_pip_layout(
@@ -581,86 +1287,21 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
             pip_scale: Scale of PiP relative to output width (0.25 = 25%)
             fps: Output framerate
         """
-        from moviepy import VideoFileClip, CompositeVideoClip
-        
         input_path = Path(input_path)
         output_path = Path(output_path)
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
         logger.info(f"Applying PiP layout to: {input_path}")
         
-        clip = VideoFileClip(str(input_path))
-        
-        # Target dimensions for 9:16
-        target_w = 1080
-        target_h = 1920
-        
-        # Extract facecam region
-        fc_x = facecam_region.get("x", 0)
-        fc_y = facecam_region.get("y", 0)
-        fc_w = facecam_region.get("width", clip.w // 4)
-        fc_h = facecam_region.get("height", clip.h // 4)
-        
-        # Ensure bounds are within frame
-        fc_x = max(0, min(fc_x, clip.w - fc_w))
-        fc_y = max(0, min(fc_y, clip.h - fc_h))
-        fc_w = min(fc_w, clip.w - fc_x)
-        fc_h = min(fc_h, clip.h - fc_y)
-        
-        # Crop facecam from original
-        facecam_clip = clip.cropped(x1=fc_x, y1=fc_y, width=fc_w, height=fc_h)
-        
-        # Scale facecam for PiP
-        pip_width = int(target_w * pip_scale)
-        facecam_clip = facecam_clip.resized(width=pip_width)
-        
-        # Create main content (resize to fill 9:16, center crop if needed)
-        # Calculate scale to cover the target
-        scale_w = target_w / clip.w
-        scale_h = target_h / clip.h
-        scale = max(scale_w, scale_h)
-        
-        main_clip = clip.resized(scale)
-        # Center crop
-        main_clip = main_clip.cropped(
-            x_center=main_clip.w / 2,
-            y_center=main_clip.h / 2,
-            width=target_w,
-            height=target_h
-        )
-        
-        # Position PiP
-        margin = 40
-        if pip_position == "top-left":
-            pip_pos = (margin, margin)
-        elif pip_position == "top-right":
-            pip_pos = (target_w - pip_width - margin, margin)
-        elif pip_position == "bottom-left":
-            pip_pos = (margin, target_h - facecam_clip.h - margin)
-        else:  # bottom-right
-            pip_pos = (target_w - pip_width - margin, target_h - facecam_clip.h - margin)
-        
-        facecam_clip = facecam_clip.with_position(pip_pos)
-        
-        # Composite
-        final = CompositeVideoClip([main_clip, facecam_clip], size=(target_w, target_h))
+        codecs = _probe_codecs(input_path)
+        graph, video_pad = _pip_graph(_probe_dims(input_path), facecam_region, pip_position, pip_scale)
+        audio_pad = "0:a" if "audio" in codecs else None
         
-        final.write_videofile(
-            str(output_path),
-            fps=fps,
-            codec="libx264",
-            audio_codec="aac",
-            temp_audiofile=str(output_path.with_suffix(".m4a")),
-            remove_temp=True,
-            logger=None,
-            preset="medium",
-            bitrate="8000k"
-        )
-        
-        clip.close()
-        facecam_clip.close()
-        main_clip.close()
-        final.close()
+        try:
+            _encode_graph(input_path, output_path, graph, video_pad, audio_pad, codecs, fps)
+        except subprocess.CalledProcessError as e:
+            logger.error(f"FFmpeg PiP layout failed: {e.stderr}")
+            raise
         
         logger.info(f"PiP layout saved to: {output_path}")
         return output_path
@@ -679,127 +1320,60 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
     ) -> Path:
         """
         Full pipeline with PiP: Trim -> PiP Layout -> Burn Subtitles
+        All three steps run in one FFmpeg pass (see export_clip)
         """
         input_path = Path(input_path)
         output_path = Path(output_path)
         
-        temp_trim = output_path.with_name(f"temp_trim_{uuid.uuid4()}{input_path.suffix}")
-        temp_pip = output_path.with_name(f"temp_pip_{uuid.uuid4()}{input_path.suffix}")
-        
-        try:
-            # 1. Trim
-            self.trim_clip(input_path, temp_trim, start_time, end_time)
+        # Adjust subtitles timing
+        adjusted_subtitles = []
+        for sub in subtitles:
+            sub_start = sub.get("start_time", 0)
+            sub_end = sub.get("end_time", 0)
             
-            # 2. Apply PiP layout if facecam detected
-            if facecam_region:
-                self.apply_pip_layout(
-                    input_path=temp_trim,
-                    output_path=temp_pip,
-                    facecam_region=facecam_region,
-                    pip_position=pip_position,
-                    pip_scale=pip_scale,
-                    fps=fps
-                )
-            else:
-                # No facecam, just resize to 9:16
-                self._resize_to_vertical(temp_trim, temp_pip, fps)
+            if sub_end <= start_time or sub_start >= end_time:
+                continue
             
-            # 3. Adjust subtitles timing
-            adjusted_subtitles = []
-            for sub in subtitles:
-                sub_start = sub.get("start_time", 0)
-                sub_end = sub.get("end_time", 0)
-                
-                if sub_end <= start_time or sub_start >= end_time:
-                    continue
-                
-                new_start = max(0.0, sub_start - start_time)
-                new_end = min(end_time - start_time, sub_end - start_time)
-                
-                adjusted_subtitles.append({
-                    "text": sub.get("text", ""),
-                    "start_time": new_start,
-                    "end_time": new_end
-                })
-            
-            # 4. Burn subtitles
-            if adjusted_subtitles:
-                self.add_subtitles(
-                    video_path=temp_pip,
-                    output_path=output_path,
-                    subtitles=adjusted_subtitles
-                )
-            else:
-                # No subtitles, just copy
-                import shutil
-                shutil.copy(temp_pip, output_path)
-            
-            logger.info(f"Viral clip with PiP saved to: {output_path}")
-            return output_path
+            new_start = max(0.0, sub_start - start_time)
+            new_end = min(end_time - start_time, sub_end - start_time)
             
-        finally:
-            if temp_trim.exists():
-                temp_trim.unlink()
-            if temp_pip.exists():
-                temp_pip.unlink()
-    
-    def _resize_to_vertical(
-        self,
-        input_path: Path,
-        output_path: Path,
-        fps: int = 60
-    ) -> Path:
-        """Resize video to 9:16 vertical format with center crop"""
-        from moviepy import VideoFileClip
-        
-        clip = VideoFileClip(str(input_path))
-        
-        target_w = 1080
-        target_h = 1920
-        
-        # Scale to cover
-        scale_w = target_w / clip.w
-        scale_h = target_h / clip.h
-        scale = max(scale_w, scale_h)
-        
-        resized = clip.resized(scale)
-        cropped = resized.cropped(
-            x_center=resized.w / 2,
-            y_center=resized.h / 2,
-            width=target_w,
-            height=target_h
-        )
-        
-        cropped.write_videofile(
-            str(output_path),
+            adjusted_subtitles.append({
+                "text": sub.get("text", ""),
+                "start_time": new_start,
+                "end_time": new_end
+            })
+        
+        # PiP layout if facecam detected, otherwise just resize to 9:16
+        self.export_clip(
+            input_path,
+            output_path,
+            start_time,
+            end_time,
+            subtitles=adjusted_subtitles,
             fps=fps,
-            codec="libx264",
-            audio_codec="aac",
-            temp_audiofile=str(output_path.with_suffix(".m4a")),
-            remove_temp=True,
-            logger=None,
-            preset="medium",
-            bitrate="8000k"
+            layout="pip" if facecam_region else "vertical",
+            pip=dict(facecam_region=facecam_region, pip_position=pip_position, pip_scale=pip_scale),
         )
         
-        clip.close()
-        cropped.close()
+        logger.info(f"Viral clip with PiP saved to: {output_path}")
         return output_path
-
+    
     def _create_srt(self, subtitles: List[dict], output_path: Path):
         """Create an SRT subtitle file"""
         def format_time(seconds: float) -> str:
-            hours = int(seconds // 3600)
-            minutes = int((seconds % 3600) // 60)
-            secs = int(seconds % 60)
-            millis = int((seconds % 1) * 1000)
+            hours, rest = divmod(int(seconds * 1000), 3600000)
+            minutes, rest = divmod(rest, 60000)
+            secs, millis = divmod(rest, 1000)
             return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
         
-        with open(output_path, "w", encoding="utf-8") as f:
-            for i, sub in enumerate(subtitles, 1):
-                f.write(f"{i}\n")
-                f.write(f"{format_time(sub['start_time'])} --> {format_time(sub['end_time'])}\n")
-                f.write(f"{sub['text']}\n\n")
+        # One write for the whole file
+        output_path.write_text(
+            "".join(
+                f"{i}\n{format_time(sub['start_time'])} --> {format_time(sub['end_time'])}\n{sub['text']}\n\n"
+                for i, sub in enumerate(subtitles, 1)
+            ),
+            encoding="utf-8"
+        )
 
     def process_viral_clip_with_styled_captions(
         self,
@@ -842,70 +1416,59 @@ Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
         input_path = Path(input_path)
         output_path = Path(output_path)
         
-        temp_trim = output_path.with_name(f"temp_trim_{uuid.uuid4()}{input_path.suffix}")
-        temp_layout = output_path.with_name(f"temp_layout_{uuid.uuid4()}{input_path.suffix}")
-        
-        try:
-            # 1. Trim the clip
-            self.trim_clip(input_path, temp_trim, start_time, end_time)
+        # Filter and adjust words for the clip timeframe
+        adjusted_words = []
+        for word in words:
+            word_start = word.get("start_time", 0)
+            word_end = word.get("end_time", 0)
             
-            # 2. Apply layout (PiP or vertical resize)
-            if facecam_region:
-                self.apply_pip_layout(
-                    input_path=temp_trim,
-                    output_path=temp_layout,
-                    facecam_region=facecam_region,
-                    pip_position=pip_position,
-                    pip_scale=pip_scale,
-                    fps=fps
-                )
-            else:
-                self._resize_to_vertical(temp_trim, temp_layout, fps)
+            # Skip words outside the clip range
+            if word_end <= start_time or word_start >= end_time:
+                continue
             
-            # 3. Filter and adjust words for the clip timeframe
-            adjusted_words = []
-            for word in words:
-                word_start = word.get("start_time", 0)
-                word_end = word.get("end_time", 0)
-                
-                # Skip words outside the clip range
-                if word_end <= start_time or word_start >= end_time:
-                    continue
-                
-                # Adjust timing relative to clip start
-                new_start = max(0.0, word_start - start_time)
-                new_end = min(end_time - start_time, word_end - start_time)
-                
-                adjusted_words.append({
-                    "text": word.get("text", ""),
-                    "start_time": new_start,
-                    "end_time": new_end
-                })
+            # Adjust timing relative to clip start
+            new_start = max(0.0, word_start - start_time)
+            new_end = min(end_time - start_time, word_end - start_time)
             
-            # 4. Burn styled captions
+            adjusted_words.append({
+                "text": word.get("text", ""),
+                "start_time": new_start,
+                "end_time": new_end
+            })
+        
+        # Trim, layout (PiP or vertical resize) and captions in one FFmpeg pass
+        ass_path = output_path.with_name(f"temp_captions_{uuid.uuid4()}.ass")
+        try:
             if adjusted_words:
-                self.add_styled_captions(
-                    video_path=temp_layout,
-                    output_path=output_path,
+                try:
+                    style = CaptionStyle(caption_style.lower())
+                except ValueError:
+                    style = CaptionStyle.KARAOKE
+                target_w, target_h = _VERTICAL_SIZE
+                captions_service.generate_captions_ass(
                     words=adjusted_words,
+                    output_path=ass_path,
                     theme_id=caption_theme,
-                    style=caption_style,
+                    style=style,
+                    width=target_w,
+                    height=target_h,
                     words_per_line=words_per_line,
                 )
-            else:
-                # No words, just copy
-                import shutil
-                shutil.copy(temp_layout, output_path)
-            
-            logger.info(f"Viral clip with styled captions saved to: {output_path}")
-            return output_path
-            
+            self.export_clip(
+                input_path,
+                output_path,
+                start_time,
+                end_time,
+                fps=fps,
+                layout="pip" if facecam_region else "vertical",
+                captions_ass=ass_path if adjusted_words else None,
+                pip=dict(facecam_region=facecam_region, pip_position=pip_position, pip_scale=pip_scale),
+            )
         finally:
-            # Cleanup temp files
-            if temp_trim.exists():
-                temp_trim.unlink()
-            if temp_layout.exists():
-                temp_layout.unlink()
+            ass_path.unlink(missing_ok=True)
+        
+        logger.info(f"Viral clip with styled captions saved to: {output_path}")
+        return output_path
 
 
 # Singleton instance
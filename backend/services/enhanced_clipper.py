@@ -2,15 +2,18 @@
 Enhanced Clip Finding Service with Multi-Modal Analysis
 Finds optimal clips using semantic analysis, audio energy, visual changes, and heuristic virality scoring.
 """
+import functools
+import heapq
 import logging
+import operator
 import uuid
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import numpy as np
 import cv2
 from pathlib import Path
 
 try:
-    from sentence_transformers import SentenceTransformer, util
+    from sentence_transformers import SentenceTransformer
     HAS_TRANSFORMERS = True
 except ImportError:
     HAS_TRANSFORMERS = False
@@ -22,89 +25,134 @@ try:
 except ImportError:
     HAS_LIBROSA = False
 
+from ._scoring import (
+    HeuristicScorer,
+    remove_overlaps,
+    sentence_columns,
+    word_time_index,
+    words_between,
+)
+
 logger = logging.getLogger(__name__)
 
+# The best-scored candidates are pruned for overlaps first; all of them only
+# when overlaps leave fewer than the ten clips returned
+_MAX_CLIPS = 10
+_OVERLAP_CANDIDATES = 50
+
+
+# Enhanced viral keywords with multi-language support: (keyword, multiplier)
+_VIRAL_KEYWORDS: Tuple[Tuple[str, float], ...] = (
+    # English
+    ("amazing", 1.5), ("incredible", 1.5), ("wow", 2.0), ("secret", 1.8),
+    ("hack", 1.5), ("money", 1.2), ("viral", 1.5), ("crazy", 1.4),
+    ("best", 1.2), ("worst", 1.2), ("never", 1.2), ("always", 1.2),
+    ("life hack", 2.0), ("tutorial", 1.3), ("how to", 1.3),
+    ("omg", 2.0), ("lol", 1.5), ("funny", 1.2), ("scary", 1.3),
+    ("love", 1.2), ("hate", 1.2), ("stop", 1.3), ("wait", 1.4),
+    ("cool", 1.2), ("insane", 1.4), ("unbelievable", 1.5),
+    ("mind-blowing", 2.0), ("game-changer", 1.8), ("must-watch", 1.6),
+
+    # Portuguese
+    ("incrível", 1.5), ("uau", 2.0), ("segredo", 1.8),
+    ("dinheiro", 1.2), ("loucura", 1.4),
+    ("melhor", 1.2), ("pior", 1.2), ("nunca", 1.2), ("sempre", 1.2),
+    ("como fazer", 1.3),
+    ("nossa", 1.5), ("engraçado", 1.2), ("assustador", 1.3),
+    ("amor", 1.2), ("ódio", 1.2), ("pare", 1.3), ("espera", 1.4),
+    ("legal", 1.2), ("top", 1.3), ("incrivel", 1.5), ("louco", 1.4),
+
+    # Spanish
+    ("increíble", 1.5), ("guau", 2.0), ("secreto", 1.8),
+    ("mejor", 1.2), ("peor", 1.2), ("siempre", 1.2),
+    ("asombroso", 1.5), ("gracioso", 1.2),
+)
+
+# Emotional words for sentiment analysis
+_POSITIVE_WORDS = frozenset({
+    "good", "great", "awesome", "excellent", "happy", "joy", "success", "win", "beautiful",
+    "bom", "ótimo", "maravilhoso", "excelente", "feliz", "alegria", "sucesso", "ganhar", "lindo",
+    "bueno", "genial", "increíble", "hermoso", "éxito",
+})
+_NEGATIVE_WORDS = frozenset({
+    "bad", "terrible", "awful", "sad", "fail", "loss", "ugly", "pain", "death", "danger",
+    "ruim", "terrível", "triste", "falha", "perda", "feio", "dor", "morte", "perigo",
+    "malo", "pérdida", "muerte", "peligro",
+})
+
+# Keyword matcher and emotion masks, built once at import time
+_HEURISTIC_SCORER = HeuristicScorer(
+    _VIRAL_KEYWORDS, _POSITIVE_WORDS, _NEGATIVE_WORDS, pace_scores=((2.5, 5.0), (2.0, 3.0))
+)
+
 
 class EnhancedClipFinderService:
     """Service for finding clips using multi-modal analysis"""
 
     def __init__(self):
-        # Enhanced viral keywords with multi-language support
-        self.viral_keywords = {
-            # English
-            "amazing": 1.5, "incredible": 1.5, "wow": 2.0, "secret": 1.8,
-            "hack": 1.5, "money": 1.2, "viral": 1.5, "crazy": 1.4,
-            "best": 1.2, "worst": 1.2, "never": 1.2, "always": 1.2,
-            "life hack": 2.0, "tutorial": 1.3, "how to": 1.3,
-            "omg": 2.0, "lol": 1.5, "funny": 1.2, "scary": 1.3,
-            "love": 1.2, "hate": 1.2, "stop": 1.3, "wait": 1.4,
-            "cool": 1.2, "insane": 1.4, "unbelievable": 1.5,
-            "mind-blowing": 2.0, "game-changer": 1.8, "must-watch": 1.6,
-
-            # Portuguese
-            "incrível": 1.5, "uau": 2.0, "segredo": 1.8,
-            "hack": 1.5, "dinheiro": 1.2, "viral": 1.5, "loucura": 1.4,
-            "melhor": 1.2, "pior": 1.2, "nunca": 1.2, "sempre": 1.2,
-            "tutorial": 1.3, "como fazer": 1.3,
-            "nossa": 1.5, "engraçado": 1.2, "assustador": 1.3,
-            "amor": 1.2, "ódio": 1.2, "pare": 1.3, "espera": 1.4,
-            "legal": 1.2, "top": 1.3, "incrivel": 1.5, "louco": 1.4,
-
-            # Spanish
-            "increíble": 1.5, "guau": 2.0, "secreto": 1.8,
-            "mejor": 1.2, "peor": 1.2, "nunca": 1.2, "siempre": 1.2,
-            "asombroso": 1.5, "gracioso": 1.2, "amor": 1.2, "espera": 1.4,
-        }
-
-        # Emotional words for sentiment analysis
-        self.positive_words = {
-            "good", "great", "awesome", "excellent", "happy", "joy", "success", "win", "beautiful",
-            "bom", "ótimo", "maravilhoso", "excelente", "feliz", "alegria", "sucesso", "ganhar", "lindo",
-            "bueno", "genial", "increíble", "hermoso", "éxito",
-        }
-        self.negative_words = {
-            "bad", "terrible", "awful", "sad", "fail", "loss", "ugly", "pain", "death", "danger",
-            "ruim", "terrível", "triste", "falha", "perda", "feio", "dor", "morte", "perigo",
-            "malo", "terrible", "triste", "pérdida", "muerte", "peligro",
-        }
-
-        # Semantic Search Initialization
-        self.model = None
-        self.viral_embeddings = None
+        # Features of the last sentence list scored (reused across repeated calls)
+        self._features_cache = None
+
+        # Semantic search: the model and concept embeddings load on first use
         self.use_semantic = HAS_TRANSFORMERS
 
-        if self.use_semantic:
-            try:
-                logger.info("Loading SentenceTransformer model...")
-                self.model = SentenceTransformer('all-MiniLM-L6-v2')
-
-                # Expanded viral concepts for semantic matching
-                self.viral_concepts = [
-                    "This is amazing and incredible",
-                    "A secret life hack that changes everything",
-                    "Shocking truth revealed",
-                    "Hilarious funny moment",
-                    "Deep emotional story",
-                    "Motivational success advice",
-                    "Unexpected plot twist",
-                    "Very dangerous situation",
-                    "Unbelievable fact",
-                    "How to make money fast",
-                    "Mind-blowing discovery",
-                    "Game-changing technology",
-                    "Must-watch viral content",
-                    "Insane trick that works",
-                    "Never seen before",
-                    "This will change your life",
-                    "Stop what you're doing",
-                    "Wait for it...",
-                    "Best moment ever",
-                ]
-                self.viral_embeddings = self.model.encode(self.viral_concepts, convert_to_tensor=True)
-                logger.info("SentenceTransformer model loaded.")
-            except Exception as e:
-                logger.error(f"Failed to load SentenceTransformer: {e}")
-                self.use_semantic = False
+        # Expanded viral concepts for semantic matching
+        self.viral_concepts = [
+            "This is amazing and incredible",
+            "A secret life hack that changes everything",
+            "Shocking truth revealed",
+            "Hilarious funny moment",
+            "Deep emotional story",
+            "Motivational success advice",
+            "Unexpected plot twist",
+            "Very dangerous situation",
+            "Unbelievable fact",
+            "How to make money fast",
+            "Mind-blowing discovery",
+            "Game-changing technology",
+            "Must-watch viral content",
+            "Insane trick that works",
+            "Never seen before",
+            "This will change your life",
+            "Stop what you're doing",
+            "Wait for it...",
+            "Best moment ever",
+        ]
+
+    @functools.cached_property
+    def model(self):
+        """SentenceTransformer, loaded on first access (None when unavailable)"""
+        if not self.use_semantic:
+            return None
+        try:
+            logger.info("Loading SentenceTransformer model...")
+            model = SentenceTransformer('all-MiniLM-L6-v2')
+            logger.info("SentenceTransformer model loaded.")
+            return model
+        except Exception as e:
+            logger.error(f"Failed to load SentenceTransformer: {e}")
+            self.use_semantic = False
+            return None
+
+    @functools.cached_property
+    def viral_embeddings(self):
+        """Unit-length concept embeddings (NumPy on CPU), so similarity is a plain matmul"""
+        return self._encode_viral_concepts()
+
+    def _encode_viral_concepts(self):
+        model = self.model
+        if model is None:
+            return None
+        try:
+            return model.encode(
+                self.viral_concepts,
+                convert_to_tensor=model.device.type != "cpu",
+                normalize_embeddings=True,
+            )
+        except Exception as e:
+            logger.error(f"Failed to encode viral concepts: {e}")
+            self.use_semantic = False
+            return None
 
     @property
     def is_available(self) -> bool:
@@ -145,9 +193,16 @@ class EnhancedClipFinderService:
         if self.use_semantic and self.model:
             try:
                 sentence_texts = [s["text"] for s in sentences]
-                embeddings = self.model.encode(sentence_texts, convert_to_tensor=True)
-                cosine_scores = util.cos_sim(embeddings, self.viral_embeddings)
-                max_scores = cosine_scores.max(dim=1).values.cpu().numpy()
+                # On CPU, NumPy embeddings and a BLAS matmul skip the tensor round-trip
+                on_gpu = self.model.device.type != "cpu"
+                embeddings = self.model.encode(
+                    sentence_texts, convert_to_tensor=on_gpu, normalize_embeddings=True
+                )
+                cosine_scores = embeddings @ self.viral_embeddings.T
+                if on_gpu:
+                    max_scores = cosine_scores.max(dim=1).values.cpu().numpy()
+                else:
+                    max_scores = cosine_scores.max(axis=1)
                 sentence_semantic_scores = max_scores.tolist()
             except Exception as e:
                 logger.error(f"Error calculating semantic scores: {e}")
@@ -169,46 +224,49 @@ class EnhancedClipFinderService:
         else:
             visual_change_scores = [0.0] * len(sentences)
 
-        clips = []
-
-        # Sliding window approach
-        i = 0
-        while i < len(sentences):
-            current_duration = 0.0
-            start_time = sentences[i]["start_time"]
-            start_char = sentences[i].get("start_char", 0)
-
-            # Look ahead to build a clip
-            j = i
-            best_clip_end_idx = -1
+        # Heuristic features per sentence, shared by all overlapping windows
+        features = self._get_sentence_features(sentences)
 
-            while j < len(sentences):
-                sent = sentences[j]
-                current_duration = sent["end_time"] - start_time
+        # Word timestamps, so each clip's words are sliced by binary search
+        words = transcription_obj.get("words", [])
+        word_index = word_time_index(words)
 
-                if current_duration < min_duration:
-                    j += 1
-                    continue
+        clips = []
 
-                if current_duration > max_duration:
-                    break
+        # Sentence fields as parallel columns, so the window loop indexes
+        # flat lists instead of looking keys up in each sentence dict
+        texts, starts, ends, start_chars, end_chars = sentence_columns(sentences)
 
-                best_clip_end_idx = j
-                j += 1
+        # Sliding window approach: end_time is monotonic, so the end cursor
+        # only moves forward as the window start advances
+        n = len(sentences)
+        hi = 0
+        prev_start = float("-inf")
+        i = 0
+        while i < n:
+            start_time = starts[i]
+
+            # First sentence past max_duration from this start
+            if start_time < prev_start:
+                hi = i
+            hi = max(hi, i)
+            while hi < n and ends[hi] - start_time <= max_duration:
+                hi += 1
+            prev_start = start_time
+
+            # Longest window within max_duration, if it reaches min_duration
+            best_clip_end_idx = -1
+            if hi > i and ends[hi - 1] - start_time >= min_duration:
+                best_clip_end_idx = hi - 1
 
             if best_clip_end_idx != -1:
                 # Construct clip
-                end_sentence = sentences[best_clip_end_idx]
-                end_time = end_sentence["end_time"]
+                end_time = ends[best_clip_end_idx]
                 duration = end_time - start_time
 
-                # Extract text
-                clip_sentences = sentences[i:best_clip_end_idx + 1]
-                transcript = " ".join([s["text"] for s in clip_sentences])
-
                 # Calculate scores
                 semantic_score = float(np.mean(sentence_semantic_scores[i:best_clip_end_idx + 1])) * 100.0 if self.use_semantic else 0.0
-                heuristic_score = self._calculate_heuristic_score(transcript, duration)
+                heuristic_score = self._score_window(features, i, best_clip_end_idx + 1, duration)
 
                 # Audio score (average energy in clip)
                 audio_score = float(np.mean(audio_energy_scores[i:best_clip_end_idx + 1])) * 100.0 if audio_energy_scores else 0.0
@@ -226,22 +284,20 @@ class EnhancedClipFinderService:
                 )
 
                 clips.append({
-                    "id": str(uuid.uuid4()),
+                    "id": None,  # Assigned to returned clips only
                     "start_time": start_time,
                     "end_time": end_time,
                     "duration": duration,
-                    "start_char": start_char,
-                    "end_char": end_sentence.get("end_char", 0),
-                    "transcript": transcript,
+                    "start_char": start_chars[i],
+                    "end_char": end_chars[best_clip_end_idx],
+                    "transcript": None,  # Filled in for returned clips only
                     "score": min(99.9, total_score),
                     "semantic_score": semantic_score,
                     "heuristic_score": heuristic_score,
                     "audio_score": audio_score,
                     "visual_score": visual_score,
-                    "words": [
-                        word for word in (transcription_obj.get("words", []))
-                        if word["start_time"] >= start_time and word["end_time"] <= end_time
-                    ]
+                    "words": None,
+                    "_span": (i, best_clip_end_idx + 1),
                 })
 
                 # Move window
@@ -250,56 +306,43 @@ class EnhancedClipFinderService:
             else:
                 i += 1
 
-        # Sort by score descending
-        clips.sort(key=lambda x: x["score"], reverse=True)
+        # Keep the best candidates, sorted by score descending
+        candidates = heapq.nlargest(_OVERLAP_CANDIDATES, clips, key=operator.itemgetter("score"))
+
+        final_clips = self._remove_overlaps(candidates)[:_MAX_CLIPS]
+        if len(final_clips) < _MAX_CLIPS and len(clips) > len(candidates):
+            # High scores clustered in overlapping windows: prune every candidate in score order
+            final_clips = self._remove_overlaps(
+                sorted(clips, key=operator.itemgetter("score"), reverse=True)
+            )[:_MAX_CLIPS]
 
-        final_clips = self._remove_overlaps(clips)
+        # Ids, transcripts and words only for the clips that are returned
+        for clip in final_clips:
+            clip["id"] = str(uuid.uuid4())
+            start, end = clip.pop("_span")
+            clip["transcript"] = " ".join(texts[start:end])
+            clip["words"] = words_between(words, word_index, clip["start_time"], clip["end_time"])
 
         logger.info(f"Found {len(final_clips)} clips with multi-modal analysis.")
-        return final_clips[:10]
+        return final_clips
+
+    def _get_sentence_features(self, sentences: List[Dict[str, Any]]):
+        """Per-sentence features, cached for the most recent sentence list"""
+        cached = self._features_cache
+        if cached is not None and cached[0] is sentences and cached[1] == len(sentences):
+            return cached[2]
+
+        features = _HEURISTIC_SCORER.sentence_features([s["text"] for s in sentences])
+        self._features_cache = (sentences, len(sentences), features)
+        return features
+
+    def _score_window(self, features, start: int, end: int, duration: float) -> float:
+        """Heuristic score of sentences[start:end] from precomputed features"""
+        return _HEURISTIC_SCORER.score_window(features, start, end, duration)
 
     def _calculate_heuristic_score(self, text: str, duration: float) -> float:
         """Calculate virality score (0-100)"""
-        base_score = 70.0
-        text_lower = text.lower()
-
-        # Keyword bonus
-        keyword_score = 0.0
-        for word, multiplier in self.viral_keywords.items():
-            if word in text_lower:
-                keyword_score += 5.0 * multiplier
-
-        keyword_score = min(25.0, keyword_score)
-
-        # Pace bonus (words per second)
-        word_count = len(text.split())
-        wps = word_count / duration if duration > 0 else 0
-        pace_score = 0.0
-        if wps > 2.5:  # Fast talker
-            pace_score = 5.0
-        elif wps > 2.0:
-            pace_score = 3.0
-
-        # Sentiment/Emotion Bonus
-        sentiment_score = 0.0
-        words = set(text_lower.split())
-        pos_hits = len(words.intersection(self.positive_words))
-        neg_hits = len(words.intersection(self.negative_words))
-
-        if pos_hits > 0 or neg_hits > 0:
-            sentiment_score += min(5.0, (pos_hits + neg_hits) * 2.0)
-
-        # Intensity (CAPS and Exclamations)
-        exc_count = text.count("!")
-        if exc_count > 0:
-            sentiment_score += min(3.0, exc_count * 1.0)
-
-        caps_words = [w for w in text.split() if w.isupper() and len(w) > 2]
-        if len(caps_words) > 0:
-            sentiment_score += min(3.0, len(caps_words) * 1.0)
-
-        total_score = base_score + keyword_score + pace_score + sentiment_score
-        return min(99.9, total_score)
+        return _HEURISTIC_SCORER.calculate_heuristic_score(text, duration)
 
     def _analyze_audio_energy(self, video_path: Path, num_segments: int) -> List[float]:
         """Analyze audio energy for exciting moments"""
@@ -419,28 +462,7 @@ class EnhancedClipFinderService:
 
     def _remove_overlaps(self, clips: List[dict]) -> List[dict]:
         """Remove clips that overlap significantly, keeping higher scored ones"""
-        if not clips:
-            return []
-
-        kept_clips = []
-        clips = sorted(clips, key=lambda x: x["score"], reverse=True)
-
-        for clip in clips:
-            is_overlap = False
-            for kept in kept_clips:
-                start = max(clip["start_time"], kept["start_time"])
-                end = min(clip["end_time"], kept["end_time"])
-                overlap = max(0, end - start)
-
-                min_dur = min(clip["duration"], kept["duration"])
-                if overlap > (0.3 * min_dur):
-                    is_overlap = True
-                    break
-
-            if not is_overlap:
-                kept_clips.append(clip)
-
-        return kept_clips
+        return remove_overlaps(sorted(clips, key=operator.itemgetter("score"), reverse=True))
 
 
 # Singleton instance
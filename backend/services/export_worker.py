@@ -0,0 +1,56 @@
+"""
+Export Worker
+Process pool entry points for VideoEditorService's parallel exports.
+
+Kept free of service imports at module level: a spawned worker unpickles
+these functions by importing this module, and only loads the editor (and
+its FFmpeg helpers) when the first job arrives.
+"""
+from typing import Optional, List, Dict, Any
+
+# FFmpeg -threads per encode; set in export worker processes by _init_export_worker
+_ffmpeg_threads: Optional[int] = None
+
+
+def _init_export_worker(threads: int) -> None:
+    """Process pool initializer: cap FFmpeg threads so parallel exports don't oversubscribe"""
+    global _ffmpeg_threads
+    _ffmpeg_threads = threads
+
+
+def _thread_args() -> List[str]:
+    """-threads option for FFmpeg commands (none outside export workers)"""
+    return ["-threads", str(_ffmpeg_threads)] if _ffmpeg_threads else []
+
+
+def _export_one(job: Dict[str, Any]) -> str:
+    """
+    Export one clip in a worker process
+
+    Module-level (and taking only a picklable dict) so it can be
+    dispatched to the process pool.
+
+    Args:
+        job: input_path, output_path, start_time, end_time and optional
+            crops_data, subtitles, fps, layout, captions_ass, pip and
+            smart_cut for the fused export_clip pass
+
+    Returns:
+        Path of the file written
+    """
+    from .editor import video_editor_service
+
+    return str(video_editor_service.export_clip(
+        job["input_path"], job["output_path"], job["start_time"], job["end_time"],
+        crops_data=job.get("crops_data"), subtitles=job.get("subtitles"),
+        fps=job.get("fps"), layout=job.get("layout", "fill"),
+        captions_ass=job.get("captions_ass"), pip=job.get("pip"),
+        smart_cut=job.get("smart_cut", False),
+    ))
+
+
+def _viral_one(job: Dict[str, Any]) -> str:
+    """Run process_viral_clip in a worker process (job = its keyword arguments)"""
+    from .editor import video_editor_service
+
+    return str(video_editor_service.process_viral_clip(**job))
@@ -9,6 +9,11 @@ from typing import Optional, Dict, List, Tuple
 import platform
 import re
 
+try:
+    from backend.services.captions import _ASS_PATH_TRANS
+except ImportError:
+    from services.captions import _ASS_PATH_TRANS
+
 logger = logging.getLogger(__name__)
 
 
@@ -116,6 +121,23 @@ class OptimizedVideoProcessor:
             # CPU presets
             return speed
 
+    def get_video_encoder_args(self, use_gpu: bool = True, speed: str = "fast") -> List[str]:
+        """
+        Get FFmpeg video encoder arguments for a stream filtered on the CPU
+
+        Unlike get_ffmpeg_gpu_args, no hwaccel output format is requested, so
+        software filters (scale, ass) can run before the hardware encoder.
+        """
+        if use_gpu and self._gpu_available:
+            if self._gpu_device in ("cuda", "nvenc"):
+                return ["-c:v", "h264_nvenc", "-preset", self.get_optimized_preset(speed)]
+            elif self._gpu_device == "qsv":
+                return ["-c:v", "h264_qsv", "-preset", speed]
+            elif self._gpu_device == "videotoolbox":
+                return ["-c:v", "h264_videotoolbox"]
+
+        return ["-c:v", "libx264", "-preset", speed, "-crf", "18"]
+
     def fast_trim(
         self,
         input_path: Path,
@@ -246,6 +268,81 @@ class OptimizedVideoProcessor:
         logger.info(f"Resized video saved: {output_path}")
         return output_path
 
+    def fast_render(
+        self,
+        input_path: Path,
+        output_path: Path,
+        start_time: float,
+        end_time: float,
+        width: Optional[int] = None,
+        height: Optional[int] = None,
+        subtitles_path: Optional[Path] = None,
+        use_gpu: bool = True,
+        speed: str = "fast",
+    ) -> Path:
+        """
+        Trim, resize and burn subtitles in a single FFmpeg pass
+
+        Args:
+            input_path: Input video path
+            output_path: Output video path
+            start_time: Start time in seconds
+            end_time: End time in seconds
+            width: Target width (no resize if omitted)
+            height: Target height (no resize if omitted)
+            subtitles_path: Optional ASS file to burn in
+            use_gpu: Use GPU acceleration if available
+            speed: Encoding speed
+
+        Returns:
+            Path to rendered video
+        """
+        input_path = Path(input_path)
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        duration = end_time - start_time
+        gpu = use_gpu and self._gpu_available
+
+        cmd = ["ffmpeg", "-y"]
+
+        # Decode on the GPU; frames come back to system memory for the filters
+        if gpu and self._gpu_device in ("cuda", "nvenc"):
+            cmd.extend(["-hwaccel", "cuda"])
+
+        # Input-side seek, so only the clip range is decoded
+        cmd.extend([
+            "-ss", str(start_time),
+            "-i", str(input_path),
+            "-t", str(duration),
+        ])
+
+        filters = []
+        if width and height:
+            filters.append(f"scale={width}:{height}")
+        if subtitles_path is not None:
+            subtitles_escaped = str(subtitles_path).translate(_ASS_PATH_TRANS)
+            filters.append(f"ass='{subtitles_escaped}'")
+        if filters:
+            cmd.extend(["-filter_complex", ",".join(filters)])
+
+        cmd.extend(self.get_video_encoder_args(use_gpu, speed))
+        cmd.extend([
+            "-c:a", "aac",
+            "-b:a", "192k",
+            str(output_path)
+        ])
+
+        logger.info(f"Rendering clip in a single pass (GPU: {gpu})")
+        result = subprocess.run(cmd, capture_output=True, text=True)
+
+        if result.returncode != 0:
+            logger.error(f"FFmpeg error: {result.stderr}")
+            raise RuntimeError(f"Failed to render video: {result.stderr}")
+
+        logger.info(f"Rendered video saved: {output_path}")
+        return output_path
+
     def fast_composite(
         self,
         input_path: Path,
@@ -0,0 +1,72 @@
+"""
+Tests for karaoke caption generation
+"""
+import re
+
+import pytest
+
+from services.captions import (
+    CaptionsService,
+    CaptionStyle,
+    _build_karaoke_dialogues,
+    _centiseconds,
+    build_karaoke_dialogues,
+)
+
+
+_K_TAG = re.compile(r"\{\\k(\d+)\}")
+_ASS_TIME = re.compile(r"Dialogue: 0,(\d+):(\d+):(\d+)\.(\d+),(\d+):(\d+):(\d+)\.(\d+),")
+
+
+def _to_cs(h, m, s, cs):
+    return ((int(h) * 60 + int(m)) * 60 + int(s)) * 100 + int(cs)
+
+
+class TestKaraokeCaptions:
+    """Test karaoke ASS output"""
+
+    @pytest.fixture
+    def words(self):
+        """Words with pauses between some of them"""
+        return [
+            {"text": "This", "start_time": 0.0, "end_time": 0.4},
+            {"text": "is", "start_time": 0.5, "end_time": 0.7},
+            {"text": "amazing!", "start_time": 1.2, "end_time": 1.9},
+            {"text": "Check", "start_time": 2.31, "end_time": 2.6},
+            {"text": "this", "start_time": 2.6, "end_time": 2.84},
+            {"text": "{out}", "start_time": 3.5, "end_time": 4.07},
+            {"text": "now", "start_time": 4.2, "end_time": 4.6},
+        ]
+
+    @pytest.mark.parametrize("builder", [_build_karaoke_dialogues, build_karaoke_dialogues])
+    def test_k_durations_sum_to_line_span(self, words, builder):
+        """Each line's \\k durations add up to its start-to-end span"""
+        lines = CaptionsService()._group_words_into_lines(words, 3, 0.0)
+        assert len(lines) == 3
+
+        for line in lines:
+            dialogue = builder([line])
+            durations = [int(k) for k in _K_TAG.findall(dialogue)]
+            assert len(durations) == len(line["words"])
+            assert sum(durations) == _centiseconds(line["end"]) - _centiseconds(line["start"])
+
+            times = _ASS_TIME.match(dialogue).groups()
+            assert sum(durations) == _to_cs(*times[4:]) - _to_cs(*times[:4])
+
+    def test_k_durations_with_offset(self, words):
+        """The time offset shifts lines without changing the \\k total"""
+        lines = CaptionsService()._group_words_into_lines(words, 4, 0.25)
+        for line in lines:
+            durations = [int(k) for k in _K_TAG.findall(build_karaoke_dialogues([line]))]
+            assert sum(durations) == _centiseconds(line["end"]) - _centiseconds(line["start"])
+
+    def test_karaoke_header_styles(self, words, tmp_path):
+        """Karaoke files only declare the styles their dialogues use"""
+        output = CaptionsService().generate_captions_ass(
+            words, tmp_path / "nested" / "captions.ass", style=CaptionStyle.KARAOKE
+        )
+        content = output.read_text(encoding="utf-8")
+
+        assert "Style: Active," not in content
+        assert "Style: Highlight," in content
+        assert r"\{OUT\}" in content
@@ -0,0 +1,287 @@
+"""
+Tests for LLM reply parsing, provider retries and batch caching in the
+description service
+"""
+import asyncio
+
+import pytest
+
+from services import description
+from services.description import (
+    DescriptionGeneratorService,
+    _RETRY_AFTER_MAX,
+    _parse_json_response,
+    _parse_multi_response,
+    _retry_delay,
+    _with_retries,
+)
+
+
+class _Response:
+    def __init__(self, headers):
+        self.headers = headers
+
+
+class APIStatusError(Exception):
+    """Shaped like the openai/anthropic status errors"""
+
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        self.response = _Response(headers or {}) if headers is not None else None
+
+
+class GoogleAPIError(Exception):
+    """Shaped like the google.api_core errors"""
+
+    def __init__(self, code):
+        super().__init__(f"code {code}")
+        self.code = code
+
+
+class APIConnectionError(Exception):
+    """Retried by name, it has no status"""
+
+
+class TestParseJsonResponse:
+    """Test single-description reply parsing"""
+
+    def test_plain_json(self):
+        text = '{"description": "Watch this", "hashtags": ["viral", "fyp"]}'
+        assert _parse_json_response(text) == {"description": "Watch this", "hashtags": ["viral", "fyp"]}
+
+    @pytest.mark.parametrize("text", [
+        '```json\n{"description": "Fenced", "hashtags": ["a"]}\n```',
+        '```\n{"description": "Fenced", "hashtags": ["a"]}\n```',
+        '```{"description": "Fenced", "hashtags": ["a"]}```',
+    ])
+    def test_fenced_reply(self, text):
+        assert _parse_json_response(text) == {"description": "Fenced", "hashtags": ["a"]}
+
+    def test_json_inside_text(self):
+        text = 'Sure! Here it is: {"description": "Inner", "hashtags": []} Hope it helps.'
+        assert _parse_json_response(text) == {"description": "Inner", "hashtags": []}
+
+    def test_missing_fields(self):
+        assert _parse_json_response('{"hashtags": ["x"]}') == {"description": "", "hashtags": ["x"]}
+        assert _parse_json_response('{"description": "Only"}') == {"description": "Only", "hashtags": []}
+
+    def test_plain_text_fallback(self):
+        """Replies without JSON become the description, cut to the fallback length"""
+        text = "Just a sentence with no JSON at all"
+        assert _parse_json_response(text, fallback_length=10) == {"description": text[:10], "hashtags": []}
+        assert _parse_json_response(text) == {"description": text, "hashtags": []}
+
+
+class TestParseMultiResponse:
+    """Test multiplexed reply parsing"""
+
+    def test_results_object(self):
+        text = (
+            '{"results": [{"description": "One", "hashtags": ["a"]},'
+            ' {"description": "Two"}]}'
+        )
+        assert _parse_multi_response(text, 2) == [
+            {"description": "One", "hashtags": ["a"]},
+            {"description": "Two", "hashtags": []},
+        ]
+
+    def test_bare_array(self):
+        text = '[{"description": "One", "hashtags": []}]'
+        assert _parse_multi_response(text, 1) == [{"description": "One", "hashtags": []}]
+
+    def test_fenced_reply(self):
+        text = '```json\n{"results": [{"description": "One", "hashtags": ["a"]}]}\n```'
+        assert _parse_multi_response(text, 1) == [{"description": "One", "hashtags": ["a"]}]
+
+    @pytest.mark.parametrize("count", [1, 3])
+    def test_count_mismatch(self, count):
+        """Replies with too few or too many entries are rejected as a whole"""
+        text = '{"results": [{"description": "One"}, {"description": "Two"}]}'
+        assert _parse_multi_response(text, count) is None
+
+    def test_entries_missing_description(self):
+        """Entries without a usable description are None, the rest are kept"""
+        text = (
+            '{"results": [{"description": "One"}, {"hashtags": ["a"]},'
+            ' {"description": ""}, "not an object", null]}'
+        )
+        assert _parse_multi_response(text, 5) == [
+            {"description": "One", "hashtags": []}, None, None, None, None,
+        ]
+
+    @pytest.mark.parametrize("text", [
+        "not json",
+        '{"description": "single"}',
+        '{"results": {"description": "One"}}',
+        '"results"',
+    ])
+    def test_malformed_reply(self, text):
+        assert _parse_multi_response(text, 1) is None
+
+
+class TestRetryDelay:
+    """Test retry decisions for failed provider calls"""
+
+    @pytest.mark.parametrize("error", [
+        APIStatusError(400),
+        APIStatusError(401),
+        APIStatusError(404),
+        GoogleAPIError(400),
+        ValueError("bad input"),
+        KeyError("description"),
+    ])
+    def test_non_retryable(self, error):
+        assert _retry_delay(error, 0, 0.5) is None
+
+    @pytest.mark.parametrize("error", [
+        APIStatusError(429),
+        APIStatusError(503),
+        APIStatusError(529),
+        GoogleAPIError(503),
+        APIConnectionError("reset"),
+    ])
+    def test_exponential_backoff(self, error):
+        """Retryable errors back off exponentially with up to a second of jitter"""
+        for attempt in range(4):
+            delay = _retry_delay(error, attempt, 0.5)
+            assert 0.5 * 2 ** attempt <= delay < 0.5 * 2 ** attempt + 1.0
+
+    def test_retry_after(self):
+        error = APIStatusError(429, headers={"retry-after": "7"})
+        assert _retry_delay(error, 3, 0.5) == 7.0
+
+    def test_retry_after_capped(self):
+        error = APIStatusError(429, headers={"retry-after": "3600"})
+        assert _retry_delay(error, 0, 0.5) == _RETRY_AFTER_MAX
+
+    @pytest.mark.parametrize("headers", [
+        {"retry-after": "Wed, 21 Oct 2026 07:28:00 GMT"},
+        {"retry-after": ""},
+        {},
+    ])
+    def test_retry_after_unusable(self, headers):
+        """HTTP-date, empty or missing Retry-After falls back to backoff"""
+        delay = _retry_delay(APIStatusError(503, headers=headers), 1, 0.5)
+        assert 1.0 <= delay < 2.0
+
+    def test_retry_after_ignored_when_not_retryable(self):
+        error = APIStatusError(400, headers={"retry-after": "1"})
+        assert _retry_delay(error, 0, 0.5) is None
+
+
+class TestWithRetries:
+    """Test the retry decorator"""
+
+    @pytest.fixture
+    def sleeps(self, monkeypatch):
+        """Recorded sleep calls instead of real waits"""
+        calls = []
+
+        async def fake_async_sleep(delay):
+            calls.append(delay)
+
+        monkeypatch.setattr(description.time, "sleep", calls.append)
+        monkeypatch.setattr(description.asyncio, "sleep", fake_async_sleep)
+        return calls
+
+    def test_retries_until_success(self, sleeps):
+        attempts = []
+
+        @_with_retries(max_tries=4, base=0.5)
+        def call():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise APIStatusError(503, headers={"retry-after": "2"})
+            return "ok"
+
+        assert call() == "ok"
+        assert len(attempts) == 3
+        assert sleeps == [2.0, 2.0]
+
+    def test_non_retryable_raises_immediately(self, sleeps):
+        attempts = []
+
+        @_with_retries(max_tries=4)
+        def call():
+            attempts.append(1)
+            raise APIStatusError(401)
+
+        with pytest.raises(APIStatusError):
+            call()
+        assert len(attempts) == 1
+        assert sleeps == []
+
+    def test_gives_up_after_max_tries(self, sleeps):
+        attempts = []
+
+        @_with_retries(max_tries=3)
+        def call():
+            attempts.append(1)
+            raise APIConnectionError("reset")
+
+        with pytest.raises(APIConnectionError):
+            call()
+        assert len(attempts) == 3
+        assert len(sleeps) == 2
+
+    def test_async_retries(self, sleeps):
+        attempts = []
+
+        @_with_retries(max_tries=4)
+        async def call():
+            attempts.append(1)
+            if len(attempts) < 2:
+                raise APIStatusError(429, headers={"retry-after": "1.5"})
+            return "ok"
+
+        assert asyncio.run(call()) == "ok"
+        assert len(attempts) == 2
+        assert sleeps == [1.5]
+
+
+class TestBatchCache:
+    """Test that Batch API runs share the description cache"""
+
+    @pytest.fixture
+    def service(self, monkeypatch):
+        """OpenAI-configured service with a recorded, fake Batch API"""
+        monkeypatch.setattr(description, "HAS_DISKCACHE", False)
+        for var in ("GOOGLE_API_KEY", "ANTHROPIC_API_KEY"):
+            monkeypatch.delenv(var, raising=False)
+        service = DescriptionGeneratorService(openai_api_key="test")
+        service._openai_client = object()
+        service.submitted = []
+
+        def fake_batch(prompts, timeout):
+            service.submitted.append(prompts)
+            return {idx: {"description": f"batch {idx}", "hashtags": ["b"]} for idx in range(len(prompts))}
+
+        def fake_single(prompt):
+            raise AssertionError("regular request made for a batched clip")
+
+        monkeypatch.setattr(service, "_submit_openai_batch", fake_batch)
+        monkeypatch.setattr(service, "_providers", (("OpenAI", "gpt-4o-mini", fake_single, None),))
+        return service
+
+    def test_only_misses_submitted(self, service):
+        cached = {"description": "cached", "hashtags": ["c"]}
+        service._cache_set(service._cache_key("clip two", "en", "social_media", 200, True), cached)
+
+        results = service.generate_descriptions_batch(["clip one", "clip two", "clip three"])
+
+        assert len(service.submitted) == 1
+        assert len(service.submitted[0]) == 2
+        assert "clip two" not in "".join(service.submitted[0])
+        assert results == [
+            {"description": "batch 0", "hashtags": ["b"]},
+            cached,
+            {"description": "batch 1", "hashtags": ["b"]},
+        ]
+
+    def test_batch_results_cached(self, service):
+        first = service.generate_descriptions_batch(["clip one", "clip two"])
+        second = service.generate_descriptions_batch(["clip two", "clip one"])
+
+        assert len(service.submitted) == 1
+        assert second == [first[1], first[0]]
@@ -0,0 +1,203 @@
+"""
+Tests for the FFmpeg filter graph builders in the editor service
+"""
+import re
+
+import pytest
+
+from services.editor import _crop_graph, _pip_graph, _stacked_graph
+
+
+_LEADING_PADS = re.compile(r"^((?:\[[^\]]+\])+)")
+_TRAILING_PADS = re.compile(r"((?:\[[^\]]+\])+)$")
+_PAD = re.compile(r"\[([^\]]+)\]")
+
+
+def _wiring(graph):
+    """Input and output pad labels of each chain in a graph"""
+    inputs, outputs = [], []
+    for chain in graph:
+        head = _LEADING_PADS.match(chain)
+        tail = _TRAILING_PADS.search(chain)
+        inputs += _PAD.findall(head.group(1)) if head else []
+        outputs += _PAD.findall(tail.group(1)) if tail else []
+    return inputs, outputs
+
+
+def _assert_wired(graph, out_pads, sources=("0:v", "0:a")):
+    """Every pad is produced once and consumed once, except the sources and outputs"""
+    inputs, outputs = _wiring(graph)
+    out_labels = [p.strip("[]") for p in out_pads]
+    assert len(outputs) == len(set(outputs))
+    assert len(inputs) == len(set(inputs))
+    assert set(inputs) - set(outputs) <= set(sources)
+    assert set(outputs) - set(inputs) == set(out_labels)
+
+
+class TestCropGraph:
+    """Test _crop_graph for each segment layout"""
+
+    @pytest.fixture
+    def contiguous_crops(self):
+        """Back-to-back segments like face tracking produces"""
+        return {
+            "crop_width": 608,
+            "crop_height": 1080,
+            "segments": [
+                {"start_time": 0.0, "end_time": 2.0, "x": 100, "y": 0},
+                {"start_time": 2.0, "end_time": 5.5, "x": 340, "y": 0},
+                {"start_time": 5.5, "end_time": None, "x": 340, "y": 20},
+            ],
+        }
+
+    @pytest.fixture
+    def gapped_crops(self):
+        """Segments with a gap between them"""
+        return {
+            "crop_width": 608,
+            "crop_height": 1080,
+            "segments": [
+                {"start_time": 1.0, "end_time": 3.0, "x": 100, "y": 0},
+                {"start_time": 4.0, "end_time": 6.0, "x": 400, "y": 10},
+            ],
+        }
+
+    def test_contiguous_step_expression(self, contiguous_crops):
+        """Back-to-back segments become one crop with step x/y expressions"""
+        graph, video_pad, audio_pad = _crop_graph(contiguous_crops, 10.0, has_audio=True)
+
+        assert graph == [
+            "[0:v]crop=608:1080:x='100+(240)*gte(t,2.0)':y='0+(20)*gte(t,5.5)'[cropv]"
+        ]
+        assert video_pad == "[cropv]"
+        assert audio_pad == "0:a"
+
+    def test_contiguous_without_audio(self, contiguous_crops):
+        """Audio-less inputs get no audio pad to map"""
+        graph, video_pad, audio_pad = _crop_graph(contiguous_crops, 10.0, has_audio=False)
+
+        assert len(graph) == 1
+        assert audio_pad is None
+
+    def test_contiguous_within_tolerance(self):
+        """Boundaries a frame apart still count as back to back"""
+        crops = {
+            "crop_width": 608,
+            "crop_height": 1080,
+            "segments": [
+                {"start_time": 0.02, "end_time": 2.0, "x": 0, "y": 0},
+                {"start_time": 2.03, "end_time": 4.0, "x": 50, "y": 0},
+            ],
+        }
+        graph, _, _ = _crop_graph(crops, 4.0, has_audio=True)
+
+        assert graph == ["[0:v]crop=608:1080:x='0+(50)*gte(t,2.03)':y='0'[cropv]"]
+
+    def test_gap_trim_split_concat(self, gapped_crops):
+        """Segments with gaps are split, trimmed, cropped and concatenated"""
+        graph, video_pad, audio_pad = _crop_graph(gapped_crops, 10.0, has_audio=True)
+
+        assert graph == [
+            "[0:v]split=2[s0][s1]",
+            "[0:a]asplit=2[as0][as1]",
+            "[s0]trim=start=1.0:end=3.0,setpts=PTS-STARTPTS,crop=608:1080:100:0[v0]",
+            "[as0]atrim=start=1.0:end=3.0,asetpts=PTS-STARTPTS[a0]",
+            "[s1]trim=start=4.0:end=6.0,setpts=PTS-STARTPTS,crop=608:1080:400:10[v1]",
+            "[as1]atrim=start=4.0:end=6.0,asetpts=PTS-STARTPTS[a1]",
+            "[v0][a0][v1][a1]concat=n=2:v=1:a=1[cropv][cropa]",
+        ]
+        assert (video_pad, audio_pad) == ("[cropv]", "[cropa]")
+        _assert_wired(graph, [video_pad, audio_pad])
+
+    def test_gap_without_audio(self, gapped_crops):
+        """Audio-less inputs skip asplit/atrim and concat video only"""
+        graph, video_pad, audio_pad = _crop_graph(gapped_crops, 10.0, has_audio=False)
+
+        assert not any("0:a" in chain or "atrim" in chain for chain in graph)
+        assert graph[-1] == "[v0][v1]concat=n=2:v=1:a=0[cropv]"
+        assert audio_pad is None
+        _assert_wired(graph, [video_pad])
+
+    def test_segments_clamped_to_duration(self, gapped_crops):
+        """Segments past the duration are cut short or dropped"""
+        graph, _, _ = _crop_graph(gapped_crops, 5.0, has_audio=False)
+
+        assert graph[0] == "[0:v]split=2[s0][s1]"
+        assert "[s1]trim=start=4.0:end=5.0," in graph[2]
+
+        graph, _, _ = _crop_graph(gapped_crops, 3.5, has_audio=False)
+        assert graph == [
+            "[0:v]split=1[s0]",
+            "[s0]trim=start=1.0:end=3.0,setpts=PTS-STARTPTS,crop=608:1080:100:0[v0]",
+            "[v0]concat=n=1:v=1:a=0[cropv]",
+        ]
+
+    def test_no_segments_center_crop(self):
+        """Without usable segments the frame is scaled and center-cropped"""
+        crops = {"crop_width": 608, "crop_height": 1080, "segments": []}
+
+        assert _crop_graph(crops, 10.0, has_audio=True) == (
+            ["[0:v]scale=-2:1080,crop=608:1080[cropv]"], "[cropv]", "0:a"
+        )
+        assert _crop_graph(crops, 10.0, has_audio=False)[2] is None
+
+    def test_custom_source_pad(self, gapped_crops):
+        """The crop reads from the given source pad"""
+        graph, _, _ = _crop_graph(gapped_crops, 10.0, has_audio=False, source="[facesrc]")
+
+        assert graph[0].startswith("[facesrc]split=2")
+        _assert_wired(graph, ["[cropv]"], sources=("facesrc",))
+
+
+class TestLayoutGraphs:
+    """Test the stacked and picture-in-picture graphs"""
+
+    @pytest.mark.parametrize("segments", [
+        [{"start_time": 0.0, "end_time": None, "x": 200, "y": 0}],
+        [
+            {"start_time": 1.0, "end_time": 3.0, "x": 100, "y": 0},
+            {"start_time": 4.0, "end_time": 6.0, "x": 400, "y": 0},
+        ],
+        [],
+    ])
+    def test_stacked_pad_wiring(self, segments):
+        """The face crop branches off the split and lands under the full frame"""
+        crops = {"crop_width": 608, "crop_height": 1080, "segments": segments}
+        graph, video_pad = _stacked_graph(crops, 8.0)
+
+        assert video_pad == "[stackv]"
+        assert graph[0] == "[0:v]split=2[full][facesrc]"
+        assert graph[1].startswith("[facesrc]")
+        assert "[full]scale=1080:-2,crop=1080:'min(ih,1920)':0:0,pad=1080:1920:0:0:black[top]" in graph
+        assert "[cropv]scale=1080:-2[face]" in graph
+        assert graph[-1] == "[top][face]overlay=x=0:y=H-h:eof_action=pass[stackv]"
+        # The face crop never touches audio; the input's own audio is mapped
+        assert not any("0:a" in chain for chain in graph)
+        _assert_wired(graph, [video_pad], sources=("0:v",))
+
+    @pytest.mark.parametrize("position, x, y", [
+        ("top-left", "40", "40"),
+        ("top-right", "W-w-40", "40"),
+        ("bottom-left", "40", "H-h-40"),
+        ("bottom-right", "W-w-40", "H-h-40"),
+    ])
+    def test_pip_pad_wiring(self, position, x, y):
+        """The facecam branch is cropped, scaled and overlaid in its corner"""
+        region = {"x": 1500, "y": 800, "width": 400, "height": 300}
+        graph, video_pad = _pip_graph((1920, 1080), region, position, 0.3)
+
+        assert video_pad == "[pipv]"
+        assert graph == [
+            "[0:v]split=2[main][cam]",
+            "[main]scale=1080:1920:force_original_aspect_ratio=increase,crop=1080:1920[vertv]",
+            "[cam]crop=400:300:1500:780,scale=324:-2[pip]",
+            f"[vertv][pip]overlay=x={x}:y={y}[pipv]",
+        ]
+        _assert_wired(graph, [video_pad], sources=("0:v",))
+
+    def test_pip_region_clamped(self):
+        """Facecam regions past the frame edges are clamped to the input"""
+        region = {"x": -50, "y": 900, "width": 2500, "height": 300}
+        graph, _ = _pip_graph((1920, 1080), region, "top-left", 0.25)
+
+        assert graph[2] == "[cam]crop=1920:300:0:780,scale=270:-2[pip]"
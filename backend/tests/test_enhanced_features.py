@@ -120,6 +120,34 @@ class TestEnhancedFeatures:
         assert hasattr(CaptionStyle, "GLOW")
         print(f"OK - Caption styles: {len(CaptionStyle)} styles available")
 
+    def test_camera_views_short_segment_merge(self):
+        """Test that short camera segments merge into the longer neighbor"""
+        from services.camera_switching import camera_switching_service
+
+        def segment(view_type, start, end):
+            return {
+                "view_type": view_type,
+                "start_time": start,
+                "end_time": end,
+                "duration": end - start,
+                "confidence": 0.5,
+            }
+
+        views = camera_switching_service._post_process_camera_views([
+            segment("unknown", 0.0, 0.5),
+            segment("gameplay", 0.5, 4.0),
+            segment("facecam", 4.0, 4.4),
+            segment("unknown", 4.4, 4.8),
+            segment("facecam", 4.8, 20.0),
+        ])
+
+        assert [v["view_type"] for v in views] == ["gameplay", "facecam"]
+        assert views[0]["start_time"] == 0.0
+        assert views[0]["end_time"] == 4.0
+        assert views[1]["start_time"] == 4.0
+        assert views[1]["duration"] == 16.0
+        assert views[0]["transition_time"] == 4.5
+
     def test_quality_presets_complete(self):
         """Test that all quality presets are defined"""
         from services.quality_presets import QUALITY_PRESETS
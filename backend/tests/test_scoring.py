@@ -0,0 +1,201 @@
+"""
+Tests for the shared heuristic scoring used by the clip finders
+"""
+import random
+
+import pytest
+
+from services import _scoring
+from services._scoring import (
+    HeuristicScorer,
+    remove_overlaps,
+    word_time_index,
+    words_between,
+)
+
+
+_KEYWORDS = [
+    ("secret", 1.5),
+    ("the secret", 2.0),
+    ("crazy", 1.2),
+    ("never", 1.0),
+    ("you won't believe", 2.0),
+]
+_POSITIVE = ["amazing", "love", "best"]
+_NEGATIVE = ["hate", "worst", "terrible"]
+
+_SENTENCES = [
+    "You won't believe THIS!",
+    "The secret is simple, and I love it.",
+    "Nobody tells you the secret.",
+    "This is the worst and the best day!!",
+    "CRAZY results, NEVER seen before",
+    "I hate waiting, it is terrible",
+    "just a quiet sentence",
+]
+
+
+@pytest.fixture(params=["ahocorasick", "regex"])
+def scorer(request, monkeypatch):
+    """Scorer built with each keyword matcher"""
+    if request.param == "ahocorasick":
+        pytest.importorskip("ahocorasick")
+        monkeypatch.setattr(_scoring, "HAS_AHOCORASICK", True)
+    else:
+        monkeypatch.setattr(_scoring, "HAS_AHOCORASICK", False)
+    return HeuristicScorer(_KEYWORDS, _POSITIVE, _NEGATIVE, ((3.0, 6.0), (2.0, 3.0)))
+
+
+class TestHeuristicScorer:
+    """Test keyword matching and window scoring"""
+
+    def test_matcher_path(self, scorer, request):
+        """Each fixture variant builds the matcher it asks for"""
+        if request.node.callspec.params["scorer"] == "regex":
+            assert scorer._automaton is None and scorer._keyword_re is not None
+        else:
+            assert scorer._automaton is not None and scorer._keyword_re is None
+
+    def test_match_keywords_overlapping(self, scorer):
+        """Keywords contained in longer matches are still reported"""
+        assert scorer.match_keywords("the secret of the crazy") == {0, 1, 2}
+        assert scorer.match_keywords("you won't believe it, never") == {3, 4}
+        assert scorer.match_keywords("nothing to see here") == set()
+
+    def test_window_scores_match_joined_text(self, scorer):
+        """Cumulative-sum window scores equal scoring the joined sentence text"""
+        features = scorer.sentence_features(_SENTENCES)
+        n = len(_SENTENCES)
+
+        for start in range(n):
+            for end in range(start + 1, n + 1):
+                for duration in (2.0, 7.5, 40.0):
+                    joined = " ".join(_SENTENCES[start:end])
+                    assert scorer.score_window(features, start, end, duration) == pytest.approx(
+                        scorer.calculate_heuristic_score(joined, duration)
+                    ), (start, end, duration)
+
+    def test_repeated_hits_count_once(self, scorer):
+        """A keyword or emotional word counts once per window"""
+        features = scorer.sentence_features(["crazy love", "crazy love"])
+        assert scorer.score_window(features, 0, 2, 100.0) == pytest.approx(
+            scorer.score_window(features, 0, 1, 100.0)
+        )
+
+    def test_score_components(self, scorer):
+        """Keywords, pace and intensity add to the base score"""
+        assert scorer.calculate_heuristic_score("just a quiet sentence", 10.0) == 70.0
+        # 1.2 * 5 keyword, 2 emotional words, one exclamation, one CAPS word
+        assert scorer.calculate_heuristic_score("CRAZY love and worst day!", 10.0) == pytest.approx(
+            70.0 + 6.0 + 4.0 + 1.0 + 1.0
+        )
+        # 4 words in 1.5s is above the 2.0 wps threshold only
+        assert scorer.calculate_heuristic_score("just a quiet sentence", 1.5) == 73.0
+        assert scorer.calculate_heuristic_score("just a quiet sentence", 1.0) == 76.0
+        assert scorer.calculate_heuristic_score("just a quiet sentence", 0.0) == 70.0
+
+    def test_score_capped(self, scorer):
+        """Scores never reach 100"""
+        text = " ".join(w for w, _ in _KEYWORDS) + " AMAZING LOVE BEST HATE!!!!"
+        assert scorer.calculate_heuristic_score(text, 1.0) == 99.9
+
+    def test_both_matchers_agree(self, monkeypatch):
+        """The automaton and the regex report the same keywords"""
+        pytest.importorskip("ahocorasick")
+        monkeypatch.setattr(_scoring, "HAS_AHOCORASICK", True)
+        fast = HeuristicScorer(_KEYWORDS, _POSITIVE, _NEGATIVE)
+        monkeypatch.setattr(_scoring, "HAS_AHOCORASICK", False)
+        slow = HeuristicScorer(_KEYWORDS, _POSITIVE, _NEGATIVE)
+
+        for text in _SENTENCES:
+            assert fast.match_keywords(text.lower()) == slow.match_keywords(text.lower())
+
+
+class TestWordIndex:
+    """Test word lookup by time"""
+
+    @pytest.fixture
+    def words(self):
+        return [
+            {"text": f"w{i}", "start_time": i * 0.5, "end_time": i * 0.5 + 0.4}
+            for i in range(20)
+        ]
+
+    def test_sorted_words_indexed(self, words):
+        """Time-ordered words get an index that matches the linear scan"""
+        index = word_time_index(words)
+        assert index is not None
+
+        for start, end in [(0.0, 10.0), (1.0, 3.4), (1.1, 3.3), (9.5, 9.9), (4.0, 4.1)]:
+            assert words_between(words, index, start, end) == words_between(words, None, start, end)
+
+    def test_unsorted_words_fall_back(self, words):
+        """Out-of-order words have no index and are scanned linearly"""
+        words[3], words[7] = words[7], words[3]
+        assert word_time_index(words) is None
+
+        selected = words_between(words, None, 1.0, 4.0)
+        assert sorted(w["text"] for w in selected) == sorted(f"w{i}" for i in range(2, 8))
+
+    def test_unsorted_ends_fall_back(self, words):
+        """Starts in order but ends out of order also fall back"""
+        words[5]["end_time"] = 10.0
+        assert word_time_index(words) is None
+
+    def test_empty_words(self):
+        """No words give an empty index and no matches"""
+        index = word_time_index([])
+        assert words_between([], index, 0.0, 10.0) == []
+
+
+def _clip(start, end, score):
+    return {"start_time": start, "end_time": end, "duration": end - start, "score": score}
+
+
+def _remove_overlaps_reference(clips):
+    """Pairwise check against every kept clip"""
+    kept = []
+    for clip in clips:
+        if all(
+            max(0, min(clip["end_time"], k["end_time"]) - max(clip["start_time"], k["start_time"]))
+            <= 0.3 * min(clip["duration"], k["duration"])
+            for k in kept
+        ):
+            kept.append(clip)
+    return kept
+
+
+class TestRemoveOverlaps:
+    """Test overlap pruning"""
+
+    def test_keeps_higher_scored(self):
+        """Significant overlaps lose to the better clip"""
+        clips = [_clip(10, 40, 95), _clip(20, 50, 90), _clip(38, 60, 80), _clip(0, 12, 70)]
+        assert remove_overlaps(clips) == [clips[0], clips[2], clips[3]]
+
+    def test_threshold_uses_shorter_clip(self):
+        """Overlap is measured against the shorter clip's duration"""
+        long_clip = _clip(0, 100, 90)
+        # 3s of a 10s clip is exactly 30%: kept
+        assert remove_overlaps([long_clip, _clip(97, 107, 80)]) == [long_clip, _clip(97, 107, 80)]
+        # 3.5s of a 10s clip: rejected
+        assert remove_overlaps([long_clip, _clip(96.5, 106.5, 80)]) == [long_clip]
+
+    def test_long_earlier_clip(self):
+        """A long kept clip still rejects candidates starting well after it"""
+        clips = [_clip(0, 60, 95), _clip(100, 110, 90), _clip(45, 55, 80)]
+        assert remove_overlaps(clips) == clips[:2]
+
+    def test_empty(self):
+        assert remove_overlaps([]) == []
+
+    def test_matches_pairwise_check(self):
+        """Pruning agrees with checking every kept clip"""
+        rng = random.Random(7)
+        for _ in range(50):
+            clips = []
+            for _ in range(rng.randint(1, 60)):
+                start = rng.uniform(0, 600)
+                clips.append(_clip(start, start + rng.uniform(5, 90), rng.uniform(0, 100)))
+            clips.sort(key=lambda c: c["score"], reverse=True)
+            assert remove_overlaps(clips) == _remove_overlaps_reference(clips)